@@ -1,13 +1,27 @@
 #!/usr/bin/env python3
+from contextlib import nullcontext
+
+from vre_data_lake.profiling import SynthProfiler
+
+# With VRE_DATA_LAKE_PROFILE set to a path prefix (e.g. cdk.out/profile), the imports, constructs and synthesis
+# of the app are profiled. It is started first so the imports below are timed.
+profiler = SynthProfiler.from_environment()
 
 from aws_cdk import core
 
-from vre_data_lake.vre_data_lake_stack import VreDataLakeStack
+from vre_data_lake.vre_data_lake_stack import LixarDataLakeStack
 
+if profiler is not None:
+    profiler.instrument()
 
 app = core.App()
 
 data_lake_name = "vre_data_lake" # Must be alphanumeric with underscores only for Athena
-VreDataLakeStack(app, "vre-data-lake", data_lake_name=data_lake_name)
+with profiler.phase('build') if profiler else nullcontext():
+    LixarDataLakeStack(app, "vre-data-lake", data_lake_name=data_lake_name)
+
+with profiler.phase('synth') if profiler else nullcontext():
+    app.synth()
 
-app.synth()
+if profiler is not None:
+    profiler.write()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Measures how synthesis scales with the size of the lake.
+
+Each size is a synthetic lake of ZONES x DATASETS (per zone) x ROLES built through the public Zone, Dataset
+and Role APIs, with every dataset granted to every role. Each size is synthesized in its own process so
+peak memory is not shared between sizes. Nothing is looked up or deployed, so the suite runs offline.
+
+    python benchmarks/synth_benchmark.py --sizes 1x5x1,2x20x3 --output results.json
+    python benchmarks/synth_benchmark.py --baseline benchmarks/baseline.json --threshold 0.25
+
+With --baseline, the exit code is 1 when any metric of any size regresses by more than the threshold.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METRICS = ['wall_seconds', 'peak_rss_mb', 'resource_count', 'template_bytes']
+DEFAULT_SIZES = '1x5x1,2x10x2,3x20x3'
+
+
+def parse_size(size: str):
+    zones, datasets, roles = (int(n) for n in size.lower().split('x'))
+    return zones, datasets, roles
+
+
+def build_and_synth(zones: int, datasets: int, roles: int, sharding: str) -> dict:
+    sys.path.insert(0, ROOT)
+    from aws_cdk import core, aws_iam as iam
+    from vre_data_lake.dataset import Dataset
+    from vre_data_lake.filetype import Filetype
+    from vre_data_lake.role import Role
+    from vre_data_lake.sharding import ShardingMode, StackSharder
+    from vre_data_lake.zone import DatabasePermission, TablePermission, Zone
+
+    started = time.perf_counter()
+    outdir = tempfile.mkdtemp(prefix='synth-benchmark-')
+    app = core.App(outdir=outdir)
+    stack = core.Stack(app, 'benchmark')
+    sharder = StackSharder(stack, mode=ShardingMode[sharding])
+
+    registration_role = iam.Role(stack, 'benchmark.iam.role.lake-service',
+        assumed_by=iam.ServicePrincipal('lakeformation.amazonaws.com')
+    )
+    lake_roles = [
+        Role(stack, f'benchmark.iam.role.{r}',
+            role_name=f'benchmark-role-{r}',
+            assumed_by=iam.AccountPrincipal(account_id='123456789012'),
+            create_athena_scratch_bucket=True
+        )
+        for r in range(roles)
+    ]
+    for z in range(zones):
+        zone = Zone(sharder.zone_scope(f'zone-{z}'), f'benchmark.zone.{z}',
+            zone_name=f'benchmark_zone_{z}',
+            location_registration_role=registration_role
+        )
+        for role in lake_roles:
+            zone.grant_db_access_to_role(role=role, database_permissions=[DatabasePermission.DESCRIBE])
+        for d in range(datasets):
+            dataset = Dataset(sharder.dataset_scope(zone), f'benchmark.dataset.{z}.{d}',
+                description=f'Synthetic dataset {d} of zone {z}.',
+                filetype=Filetype.CSV,
+                zone=zone,
+                s3_prefix=f'dataset_{d}',
+                lifecycle_rules=[]
+            )
+            for role in lake_roles:
+                dataset.grant_access_to_role(role=role, table_permissions=[TablePermission.DESCRIBE, TablePermission.SELECT])
+    built = time.perf_counter()
+
+    assembly = app.synth()
+    finished = time.perf_counter()
+
+    resource_count = 0
+    template_bytes = 0
+    for artifact in assembly.stacks:
+        resource_count += len(artifact.template.get('Resources', {}))
+        template_bytes += os.path.getsize(artifact.template_full_path)
+    return {
+        'build_seconds': round(built - started, 3),
+        'synth_seconds': round(finished - built, 3),
+        'wall_seconds': round(finished - started, 3),
+        'stack_count': len(assembly.stacks),
+        'resource_count': resource_count,
+        'template_bytes': template_bytes,
+    }
+
+
+def run_size(size: str, sharding: str) -> dict:
+    # wait4 reports the peak RSS of the child and of the jsii node process it spawned and waited for.
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--run', size, '--sharding', sharding],
+        stdout=subprocess.PIPE,
+        env={**os.environ, 'JSII_SILENCE_WARNING_DEPRECATED_NODE_VERSION': '1'},
+    )
+    output = process.stdout.read()
+    _, status, rusage = os.wait4(process.pid, 0)
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f'Synthesizing the {size} lake failed.')
+    result = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+    result['peak_rss_mb'] = round(rusage.ru_maxrss / 1024, 1)
+    return result
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float):
+    regressions = []
+    for size, result in results.items():
+        if size not in baseline:
+            continue
+        for metric in METRICS:
+            previous = baseline[size].get(metric)
+            if previous and result[metric] > previous * (1 + threshold):
+                regressions.append(f'{size} {metric}: {previous} -> {result[metric]} (+{result[metric] / previous - 1:.0%})')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f'Comma separated ZONESxDATASETSxROLES sizes (default: {DEFAULT_SIZES}).')
+    parser.add_argument('--sharding', default='DATASET_GROUP', choices=['NONE', 'ZONE', 'DATASET_GROUP'])
+    parser.add_argument('--output', help='Write the results to this JSON file.')
+    parser.add_argument('--baseline', help='Compare the results against this JSON file of earlier results.')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed relative increase of any metric (default: 0.25).')
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(build_and_synth(*parse_size(args.run), sharding=args.sharding)))
+        return 0
+
+    results = {}
+    for size in args.sizes.split(','):
+        parse_size(size)
+        results[size] = run_size(size, args.sharding)
+        print(f"{size:>12}  {results[size]['wall_seconds']:>8.2f}s  {results[size]['peak_rss_mb']:>8.1f}MB  "
+              f"{results[size]['resource_count']:>6} resources  {results[size]['template_bytes']:>9} bytes  "
+              f"{results[size]['stack_count']:>3} stacks")
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(results, fp, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+        regressions = find_regressions(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,7 +4,7 @@ import setuptools
 with open("README.md") as fp:
     long_description = fp.read()
 
-aws_sdk_version = '1.94.1'
+aws_sdk_version = '1.204.0'
 
 setuptools.setup(
     name="vre_data_lake",
@@ -15,14 +15,29 @@ setuptools.setup(
     author="Sandy Chapman, Lixar IT Inc.",
     package_dir={"": "vre_data_lake"},
     packages=setuptools.find_packages(where="vre_data_lake"),
+    package_data={"": ["glue_scripts/*.py", "glue_scripts/shared/*.py", "lambda_functions/*/*.py"]},
     install_requires=[
         f"aws-cdk.core=={aws_sdk_version}",
         f"aws-cdk.aws-iam=={aws_sdk_version}",
         f"aws-cdk.aws-s3=={aws_sdk_version}",
+        f"aws-cdk.aws-s3-assets=={aws_sdk_version}",
         f"aws-cdk.aws-s3-deployment=={aws_sdk_version}",
+        f"aws-cdk.aws-s3-notifications=={aws_sdk_version}",
+        f"aws-cdk.aws-sqs=={aws_sdk_version}",
         f"aws-cdk.aws-glue=={aws_sdk_version}",
         f"aws-cdk.aws-lakeformation=={aws_sdk_version}",
         f"aws-cdk.aws-athena=={aws_sdk_version}",
+        f"aws-cdk.aws-cloudwatch=={aws_sdk_version}",
+        f"aws-cdk.aws-events=={aws_sdk_version}",
+        f"aws-cdk.aws-events-targets=={aws_sdk_version}",
+        f"aws-cdk.aws-lambda=={aws_sdk_version}",
+        f"aws-cdk.aws-kinesisfirehose=={aws_sdk_version}",
+        f"aws-cdk.custom-resources=={aws_sdk_version}",
+        "PyYAML>=5.4",
     ],
+    extras_require={
+        "local": ["duckdb>=0.9", "fsspec>=2023.1"],
+        "test": ["pytest>=7", "boto3"],
+    },
     python_requires=">=3.9",
 )
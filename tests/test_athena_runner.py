@@ -0,0 +1,77 @@
+import importlib.util
+import os
+
+import pytest
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+_spec = importlib.util.spec_from_file_location('athena_runner_index', os.path.join(
+    os.path.dirname(__file__), '..', 'vre_data_lake', 'lambda_functions', 'athena_runner', 'index.py'))
+index = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(index)
+
+
+@pytest.fixture
+def performed(monkeypatch):
+    operations = []
+
+    def perform(operation, changed=False):
+        operations.append((operation, changed))
+        return 'query-execution-id'
+    monkeypatch.setattr(index, 'perform', perform)
+    return operations
+
+
+def _properties(create='CREATE', update=None, immutable=None):
+    properties = {'Id': 'db.table', 'Create': {'Action': 'Execute', 'Queries': [create]}}
+    if update is not None:
+        properties['Update'] = {'Action': 'Execute', 'Queries': [update]}
+    if immutable is not None:
+        properties['Immutable'] = immutable
+    return properties
+
+
+def _update(old, new):
+    return {
+        'RequestType': 'Update',
+        'PhysicalResourceId': 'db.table',
+        'LogicalResourceId': 'Table',
+        'ResourceProperties': new,
+        'OldResourceProperties': old,
+    }
+
+
+def test_create_runs_create(performed):
+    response = index.on_event({'RequestType': 'Create', 'LogicalResourceId': 'Table', 'ResourceProperties': _properties()}, None)
+    assert response == {'PhysicalResourceId': 'db.table', 'Data': {'QueryExecutionId': 'query-execution-id'}}
+    assert performed == [({'Action': 'Execute', 'Queries': ['CREATE']}, False)]
+
+
+def test_unchanged_update_does_nothing(performed):
+    properties = _properties(update='ALTER', immutable={'Columns': [['id', 'bigint']]})
+    assert index.on_event(_update(properties, properties), None) == {'PhysicalResourceId': 'db.table'}
+    assert performed == []
+
+
+def test_changed_update_runs_create_without_update_operation(performed):
+    index.on_event(_update(_properties('CREATE 1'), _properties('CREATE 2')), None)
+    assert performed == [({'Action': 'Execute', 'Queries': ['CREATE 2']}, True)]
+
+
+def test_changed_update_runs_update_operation(performed):
+    immutable = {'Columns': [['id', 'bigint']]}
+    index.on_event(_update(_properties('CREATE 1', 'ALTER 1', immutable), _properties('CREATE 2', 'ALTER 2', immutable)), None)
+    assert performed == [({'Action': 'Execute', 'Queries': ['ALTER 2']}, True)]
+
+
+def test_update_of_immutable_properties_fails(performed):
+    old = _properties('CREATE 1', 'ALTER', {'Columns': [['id', 'bigint']], 'Partitioning': []})
+    new = _properties('CREATE 2', 'ALTER', {'Columns': [['id', 'string']], 'Partitioning': []})
+    with pytest.raises(RuntimeError, match="Columns"):
+        index.on_event(_update(old, new), None)
+    assert performed == []
+
+
+def test_delete_without_delete_operation_retains(performed):
+    event = {'RequestType': 'Delete', 'PhysicalResourceId': 'db.table', 'LogicalResourceId': 'Table', 'ResourceProperties': _properties()}
+    assert index.on_event(event, None) == {'PhysicalResourceId': 'db.table', 'Data': {'QueryExecutionId': ''}}
+    assert performed == []
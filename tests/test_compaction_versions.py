@@ -0,0 +1,79 @@
+import importlib.util
+import os
+from datetime import datetime, timedelta, timezone
+
+_spec = importlib.util.spec_from_file_location('compaction_versions', os.path.join(
+    os.path.dirname(__file__), '..', 'vre_data_lake', 'glue_scripts', 'shared', 'compaction_versions.py'))
+versions = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(versions)
+
+NOW = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+BASE = 'raw/events/dt=2024-04-01/'
+CURRENT = f'{BASE}_compacted-20240430T000000-abcd1234/'
+
+
+def _object(key, etag='etag', age=timedelta(days=2), size=10):
+    return {'Key': key, 'ETag': etag, 'LastModified': NOW - age, 'Size': size}
+
+
+def _keys(objects):
+    return sorted(o['Key'] for o in objects)
+
+
+def test_base_prefix_strips_the_version_directory():
+    assert versions.base_prefix(CURRENT) == BASE
+    assert versions.base_prefix(BASE) == BASE
+
+
+def test_uncompacted_partition_reads_its_crawled_files():
+    objects = [_object(f'{BASE}a.parquet', 'a'), _object(f'{BASE}b.parquet', 'b'), _object(f'{BASE}_SUCCESS', size=0)]
+    files = versions.partition_files(objects, BASE, BASE, {}, None, NOW)
+    assert _keys(files.live) == [f'{BASE}a.parquet', f'{BASE}b.parquet']
+    assert files.late == []
+    assert files.retired == []
+    assert files.sources == {f'{BASE}a.parquet': 'a', f'{BASE}b.parquet': 'b'}
+
+
+def test_files_written_after_the_switch_are_late_until_a_version_holds_them():
+    objects = [
+        _object(f'{CURRENT}part-0.parquet'),
+        _object(f'{CURRENT}_sources.json'),
+        _object(f'{BASE}a.parquet', 'a'),
+        _object(f'{BASE}late.parquet', 'late', age=timedelta(minutes=5)),
+    ]
+    files = versions.partition_files(objects, BASE, CURRENT, {f'{BASE}a.parquet': 'a'}, NOW - timedelta(days=1), NOW)
+    assert _keys(files.live) == [f'{CURRENT}part-0.parquet']
+    assert _keys(files.late) == [f'{BASE}late.parquet']
+    # Only the crawled file the version holds is retired; the late one is kept for the next version.
+    assert files.retired == [f'{BASE}a.parquet']
+    assert files.sources == {f'{BASE}a.parquet': 'a', f'{BASE}late.parquet': 'late'}
+
+    # Once a new version holds it, the late file is retired like the others.
+    files = versions.partition_files(objects, BASE, CURRENT, files.sources, NOW - timedelta(days=1), NOW)
+    assert files.late == []
+    assert sorted(files.retired) == [f'{BASE}a.parquet', f'{BASE}late.parquet']
+
+
+def test_late_files_older_than_the_switch_are_not_retired():
+    # A file whose upload began before the switch but was not listed by the run that made the version.
+    objects = [_object(f'{CURRENT}part-0.parquet'), _object(f'{BASE}slow.parquet', 'slow', age=timedelta(days=3))]
+    files = versions.partition_files(objects, BASE, CURRENT, {}, NOW - timedelta(days=1), NOW)
+    assert _keys(files.late) == [f'{BASE}slow.parquet']
+    assert files.retired == []
+
+
+def test_rewritten_crawled_files_are_late():
+    objects = [_object(f'{CURRENT}part-0.parquet'), _object(f'{BASE}a.parquet', 'rewritten')]
+    files = versions.partition_files(objects, BASE, CURRENT, {f'{BASE}a.parquet': 'a'}, NOW - timedelta(days=1), NOW)
+    assert _keys(files.late) == [f'{BASE}a.parquet']
+    assert files.retired == []
+
+
+def test_nothing_is_retired_within_the_grace_period_of_a_switch():
+    failed = f'{BASE}_compacted-20240429T000000-ffff0000/part-0.parquet'
+    objects = [_object(f'{CURRENT}part-0.parquet'), _object(f'{BASE}a.parquet', 'a'), _object(failed)]
+    files = versions.partition_files(objects, BASE, CURRENT, {f'{BASE}a.parquet': 'a'}, NOW - timedelta(minutes=10), NOW)
+    assert files.retired == []
+
+    files = versions.partition_files(objects, BASE, CURRENT, {f'{BASE}a.parquet': 'a'}, NOW - timedelta(hours=2), NOW)
+    assert sorted(files.retired) == [f'{BASE}_compacted-20240429T000000-ffff0000/part-0.parquet', f'{BASE}a.parquet']
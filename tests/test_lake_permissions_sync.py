@@ -0,0 +1,279 @@
+import importlib.util
+import json
+import os
+
+import pytest
+from botocore.exceptions import ClientError
+
+_spec = importlib.util.spec_from_file_location('lake_permissions_index', os.path.join(
+    os.path.dirname(__file__), '..', 'vre_data_lake', 'lambda_functions', 'lake_permissions', 'index.py'))
+index = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(index)
+
+
+def _error(code):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'operation')
+
+
+class FakeLakeFormation:
+    """An in-memory stand-in for the Lake Formation permissions API."""
+
+    def __init__(self, page_size=1):
+        self.grants = {}
+        self.page_size = page_size
+        self.calls = []
+        # Errors raised by, and failures returned from, the next calls of an operation.
+        self.errors = {}
+        self.failures = {}
+
+    def seed(self, principal, resource, *permissions):
+        self.grants.setdefault((principal, json.dumps(resource, sort_keys=True)), set()).update(permissions)
+
+    def permissions(self, principal, resource):
+        return self.grants.get((principal, json.dumps(resource, sort_keys=True)), set())
+
+    def _raise_scripted(self, operation):
+        errors = self.errors.get(operation)
+        if errors:
+            raise _error(errors.pop(0))
+
+    def list_permissions(self, Resource, NextToken=None):
+        self.calls.append(('list_permissions', Resource))
+        self._raise_scripted('list_permissions')
+        resource = json.dumps(Resource, sort_keys=True)
+        grants = [
+            {'Principal': {'DataLakePrincipalIdentifier': principal}, 'Resource': Resource, 'Permissions': sorted(permissions)}
+            for (principal, key), permissions in sorted(self.grants.items())
+            if key == resource and permissions
+        ]
+        start = int(NextToken or 0)
+        response = {'PrincipalResourcePermissions': grants[start:start + self.page_size]}
+        if start + self.page_size < len(grants):
+            response['NextToken'] = str(start + self.page_size)
+        return response
+
+    def _batch(self, operation, Entries, apply):
+        self.calls.append((operation, [e['Id'] for e in Entries]))
+        self._raise_scripted(operation)
+        failures = []
+        scripted = self.failures.get(operation)
+        failing = scripted.pop(0) if scripted else {}
+        for i, entry in enumerate(Entries):
+            if i in failing:
+                failures.append({'RequestEntry': entry, 'Error': {'ErrorCode': failing[i], 'ErrorMessage': failing[i]}})
+                continue
+            key = (entry['Principal']['DataLakePrincipalIdentifier'], json.dumps(entry['Resource'], sort_keys=True))
+            apply(self.grants.setdefault(key, set()), entry['Permissions'])
+        return {'Failures': failures}
+
+    def batch_grant_permissions(self, Entries):
+        return self._batch('batch_grant_permissions', Entries, lambda granted, p: granted.update(p))
+
+    def batch_revoke_permissions(self, Entries):
+        return self._batch('batch_revoke_permissions', Entries, lambda granted, p: granted.difference_update(p))
+
+    def batch_calls(self, operation):
+        return [ids for name, ids in self.calls if name == operation]
+
+
+def _entry(principal, table, *permissions):
+    return {
+        'Principal': {'DataLakePrincipalIdentifier': principal},
+        'Resource': {'Table': {'DatabaseName': 'lake_raw', 'Name': table}},
+        'Permissions': list(permissions),
+    }
+
+
+def _table(table):
+    return {'Table': {'DatabaseName': 'lake_raw', 'Name': table}}
+
+
+@pytest.fixture
+def lakeformation():
+    return FakeLakeFormation()
+
+
+@pytest.fixture
+def sleeps():
+    return []
+
+
+def _sync(lakeformation, sleeps, **kwargs):
+    return index.LakePermissionsSync(lakeformation, sleep=sleeps.append, **kwargs)
+
+
+def test_grants_only_missing_permissions(lakeformation, sleeps):
+    lakeformation.seed('reader', _table('a'), 'SELECT')
+    granted, revoked = _sync(lakeformation, sleeps).sync(desired=[
+        _entry('reader', 'a', 'SELECT', 'DESCRIBE'),
+        _entry('reader', 'b', 'SELECT'),
+    ])
+    assert (granted, revoked) == (2, 0)
+    assert lakeformation.permissions('reader', _table('a')) == {'SELECT', 'DESCRIBE'}
+    assert lakeformation.permissions('reader', _table('b')) == {'SELECT'}
+    assert [len(ids) for ids in lakeformation.batch_calls('batch_grant_permissions')] == [2]
+    assert lakeformation.batch_calls('batch_revoke_permissions') == []
+
+
+def test_no_calls_when_everything_is_granted(lakeformation, sleeps):
+    lakeformation.seed('reader', _table('a'), 'SELECT')
+    assert _sync(lakeformation, sleeps).sync(desired=[_entry('reader', 'a', 'SELECT')]) == (0, 0)
+    assert lakeformation.batch_calls('batch_grant_permissions') == []
+    assert lakeformation.batch_calls('batch_revoke_permissions') == []
+
+
+def test_revokes_only_removed_permissions(lakeformation, sleeps):
+    lakeformation.seed('reader', _table('a'), 'SELECT', 'DESCRIBE')
+    lakeformation.seed('reader', _table('b'), 'SELECT')
+    # Granted outside of the resource, so it is never revoked by it.
+    lakeformation.seed('admin', _table('a'), 'ALTER')
+    previous = [_entry('reader', 'a', 'SELECT', 'DESCRIBE'), _entry('reader', 'b', 'SELECT')]
+    desired = [_entry('reader', 'a', 'SELECT')]
+    assert _sync(lakeformation, sleeps).sync(desired=desired, previous=previous) == (0, 2)
+    assert lakeformation.permissions('reader', _table('a')) == {'SELECT'}
+    assert lakeformation.permissions('reader', _table('b')) == set()
+    assert lakeformation.permissions('admin', _table('a')) == {'ALTER'}
+
+
+def test_removed_permissions_that_are_not_granted_are_not_revoked(lakeformation, sleeps):
+    previous = [_entry('reader', 'a', 'SELECT')]
+    assert _sync(lakeformation, sleeps).sync(desired=[], previous=previous) == (0, 0)
+    assert lakeformation.batch_calls('batch_revoke_permissions') == []
+
+
+def test_chunks_at_batch_size(lakeformation, sleeps):
+    desired = [_entry('reader', f't{i}', 'SELECT') for i in range(7)]
+    assert _sync(lakeformation, sleeps, batch_size=3).sync(desired=desired) == (7, 0)
+    assert [len(ids) for ids in lakeformation.batch_calls('batch_grant_permissions')] == [3, 3, 1]
+    assert all(lakeformation.permissions('reader', _table(f't{i}')) == {'SELECT'} for i in range(7))
+
+
+def test_retries_throttled_calls(lakeformation, sleeps):
+    lakeformation.errors['batch_grant_permissions'] = ['ThrottlingException', 'ThrottlingException']
+    lakeformation.errors['list_permissions'] = ['ThrottlingException']
+    assert _sync(lakeformation, sleeps).sync(desired=[_entry('reader', 'a', 'SELECT')]) == (1, 0)
+    assert lakeformation.permissions('reader', _table('a')) == {'SELECT'}
+    assert len(lakeformation.batch_calls('batch_grant_permissions')) == 3
+    assert len(sleeps) == 3
+
+
+def test_gives_up_after_max_attempts(lakeformation, sleeps):
+    lakeformation.errors['batch_grant_permissions'] = ['ThrottlingException'] * 3
+    with pytest.raises(ClientError):
+        _sync(lakeformation, sleeps, max_attempts=3).sync(desired=[_entry('reader', 'a', 'SELECT')])
+    assert len(lakeformation.batch_calls('batch_grant_permissions')) == 3
+
+
+def test_does_not_retry_other_errors(lakeformation, sleeps):
+    lakeformation.errors['batch_grant_permissions'] = ['AccessDeniedException']
+    with pytest.raises(ClientError):
+        _sync(lakeformation, sleeps).sync(desired=[_entry('reader', 'a', 'SELECT')])
+    assert len(lakeformation.batch_calls('batch_grant_permissions')) == 1
+    assert sleeps == []
+
+
+def test_retries_only_failed_entries(lakeformation, sleeps):
+    lakeformation.failures['batch_grant_permissions'] = [{1: 'ConcurrentModificationException'}]
+    desired = [_entry('reader', t, 'SELECT') for t in ('a', 'b', 'c')]
+    assert _sync(lakeformation, sleeps).sync(desired=desired) == (3, 0)
+    calls = lakeformation.batch_calls('batch_grant_permissions')
+    assert [len(ids) for ids in calls] == [3, 1]
+    assert calls[1] == [calls[0][1]]
+    assert all(lakeformation.permissions('reader', _table(t)) == {'SELECT'} for t in ('a', 'b', 'c'))
+
+
+def test_fails_when_entries_keep_failing(lakeformation, sleeps):
+    lakeformation.failures['batch_grant_permissions'] = [{0: 'ThrottlingException'}] * 2
+    with pytest.raises(RuntimeError):
+        _sync(lakeformation, sleeps, max_attempts=2).sync(desired=[_entry('reader', 'a', 'SELECT')])
+    assert len(lakeformation.batch_calls('batch_grant_permissions')) == 2
+
+
+def test_fails_on_entries_that_cannot_be_retried(lakeformation, sleeps):
+    lakeformation.failures['batch_grant_permissions'] = [{0: 'InvalidInputException'}]
+    with pytest.raises(RuntimeError):
+        _sync(lakeformation, sleeps).sync(desired=[_entry('reader', 'a', 'SELECT')])
+
+
+def test_ignores_revokes_of_missing_resources(lakeformation, sleeps):
+    lakeformation.seed('reader', _table('a'), 'SELECT')
+    lakeformation.failures['batch_revoke_permissions'] = [{0: 'EntityNotFoundException'}]
+    assert _sync(lakeformation, sleeps).sync(desired=[], previous=[_entry('reader', 'a', 'SELECT')]) == (0, 1)
+    assert len(lakeformation.batch_calls('batch_revoke_permissions')) == 1
+
+
+class FakeLedger:
+    """An in-memory stand-in for the S3 ledger of the grants a resource made."""
+
+    def __init__(self):
+        self.pairs = set()
+        self.writes = []
+
+    def read(self):
+        return set(self.pairs)
+
+    def write(self, pairs):
+        self.pairs = set(pairs)
+        self.writes.append(set(pairs))
+
+
+@pytest.fixture
+def ledger():
+    return FakeLedger()
+
+
+def _event(request_type, entries, old_entries=None):
+    event = {
+        'RequestType': request_type,
+        'LogicalResourceId': 'LakePermissions',
+        'ResourceProperties': {'Entries': entries},
+    }
+    if old_entries is not None:
+        event['OldResourceProperties'] = {'Entries': old_entries}
+    if request_type != 'Create':
+        event['PhysicalResourceId'] = 'LakePermissions'
+    return event
+
+
+def test_delete_revokes_what_the_resource_granted(lakeformation, ledger):
+    entries = [_entry('reader', 'a', 'SELECT', 'DESCRIBE'), _entry('writer', 'b', 'INSERT')]
+    index.on_event(_event('Create', entries), None, lakeformation=lakeformation, ledger=ledger)
+    assert lakeformation.permissions('writer', _table('b')) == {'INSERT'}
+    response = index.on_event(_event('Delete', entries), None, lakeformation=lakeformation, ledger=ledger)
+    assert response['Data'] == {'Granted': '0', 'Revoked': '3'}
+    assert response['PhysicalResourceId'] == 'LakePermissions'
+    assert lakeformation.permissions('reader', _table('a')) == set()
+    assert lakeformation.permissions('writer', _table('b')) == set()
+    assert ledger.pairs == set()
+
+
+def test_delete_keeps_permissions_granted_before_the_resource(lakeformation, ledger):
+    lakeformation.seed('reader', _table('a'), 'SELECT')
+    entries = [_entry('reader', 'a', 'SELECT', 'DESCRIBE')]
+    response = index.on_event(_event('Create', entries), None, lakeformation=lakeformation, ledger=ledger)
+    assert response['Data'] == {'Granted': '1', 'Revoked': '0'}
+    response = index.on_event(_event('Delete', entries), None, lakeformation=lakeformation, ledger=ledger)
+    assert response['Data'] == {'Granted': '0', 'Revoked': '1'}
+    assert lakeformation.permissions('reader', _table('a')) == {'SELECT'}
+
+
+def test_update_diffs_against_old_properties(lakeformation, ledger):
+    old = [_entry('reader', 'a', 'SELECT')]
+    new = [_entry('reader', 'b', 'SELECT')]
+    index.on_event(_event('Create', old), None, lakeformation=lakeformation, ledger=ledger)
+    response = index.on_event(_event('Update', new, old), None, lakeformation=lakeformation, ledger=ledger)
+    assert response['Data'] == {'Granted': '1', 'Revoked': '1'}
+    assert lakeformation.permissions('reader', _table('a')) == set()
+    assert lakeformation.permissions('reader', _table('b')) == {'SELECT'}
+    assert ledger.pairs == index.flatten(new)
+
+
+def test_grants_of_a_failed_run_are_recorded(lakeformation, ledger):
+    lakeformation.failures['batch_grant_permissions'] = [{1: 'InvalidInputException'}]
+    entries = [_entry('reader', 'a', 'SELECT'), _entry('reader', 'b', 'SELECT')]
+    with pytest.raises(RuntimeError):
+        index.on_event(_event('Create', entries), None, lakeformation=lakeformation, ledger=ledger)
+    assert lakeformation.permissions('reader', _table('a')) == {'SELECT'}
+    # The rollback deletes the resource, which revokes the grant that did get through.
+    index.on_event(_event('Delete', entries), None, lakeformation=lakeformation, ledger=ledger)
+    assert lakeformation.permissions('reader', _table('a')) == set()
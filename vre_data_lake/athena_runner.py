@@ -0,0 +1,118 @@
+import hashlib
+from typing import Dict, Optional
+from aws_cdk import (
+    core,
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_iam as iam,
+    aws_lambda as lambda_,
+    custom_resources as cr,
+)
+from vre_data_lake.lambda_function import LAMBDA_RUNTIME, lambda_code
+from vre_data_lake.role import Role
+
+
+class AthenaRunner(core.Construct):
+    """Runs Athena statements on behalf of the stack, from custom resources and from schedules.
+
+    The runner has its own role and workgroup. Other constructs grant that role access to the tables and
+    locations their statements need (`role`), and pass it operations with `run` and `schedule`. See the
+    handler in `lambda_functions/athena_runner` for the supported operations.
+    """
+
+    def __init__(self, scope: core.Construct, id: str):
+        super().__init__(scope, id)
+        stack = core.Stack.of(self)
+
+        # The role name also names the scratch bucket, which must fit in 63 characters whatever the stack's name.
+        digest = hashlib.sha256(stack.stack_name.encode()).hexdigest()[:8]
+        self.role = Role(self, f'{id}.iam.role.lambda',
+            role_name=f'{stack.stack_name[:20].rstrip("-")}-{digest}-Athena-Runner',
+            assumed_by=iam.ServicePrincipal('lambda.amazonaws.com'),
+            create_athena_scratch_bucket=True,
+            managed_policies=[
+                iam.ManagedPolicy.from_aws_managed_policy_name('service-role/AWSLambdaBasicExecutionRole')
+            ]
+        )
+        self.role.add_to_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "athena:StartQueryExecution",
+                    "athena:GetQueryExecution",
+                    "athena:GetQueryResults",
+                    "athena:StopQueryExecution",
+                ],
+                resources=[stack.format_arn(service='athena', resource='workgroup', resource_name=self.role.workgroup_name)]
+            )
+        )
+
+        def function(name: str, handler: str, description: str) -> lambda_.Function:
+            return lambda_.Function(self, f'{id}.lambda.{name}',
+                description=description,
+                runtime=LAMBDA_RUNTIME,
+                handler=handler,
+                code=lambda_code('athena_runner'),
+                role=self.role,
+                timeout=core.Duration.minutes(15),
+                memory_size=256
+            )
+
+        self.function = function('scheduled', 'index.handler', 'Runs scheduled Athena statements of the data lake.')
+        # Long running statements are polled by the provider rather than waited for in a single invocation.
+        provider = cr.Provider(self, f'{id}.provider',
+            on_event_handler=function('on-event', 'index.on_event', 'Starts the Athena statements of data lake resources.'),
+            is_complete_handler=function('is-complete', 'index.is_complete', 'Polls the Athena statements of data lake resources.'),
+            query_interval=core.Duration.seconds(30),
+            total_timeout=core.Duration.hours(2)
+        )
+        self.service_token = provider.service_token
+
+    @staticmethod
+    def of(scope: core.Construct) -> 'AthenaRunner':
+        # One runner per stack, since a custom resource can only reference values of its own stack (or exports).
+        stack = core.Stack.of(scope)
+        id = 'athena-runner'
+        runner = stack.node.try_find_child(id)
+        if runner is None:
+            runner = AthenaRunner(stack, id)
+        return runner
+
+    def operation(self, action: str, **spec) -> Dict:
+        return {'Action': action, 'Workgroup': self.role.workgroup_name, **spec}
+
+    def run(self, scope: core.Construct, id: str, *,
+            resource_type: str,
+            physical_id: str,
+            create: Dict,
+            delete: Optional[Dict]=None,
+            update: Optional[Dict]=None,
+            immutable: Optional[Dict]=None,
+    ) -> core.CustomResource:
+        # `create` runs on creation and whenever it changes, unless an `update` is given to run instead, and
+        # `delete` when the resource is deleted. Updates that change `immutable` fail rather than being ignored.
+        properties = {'Id': physical_id, 'Create': create}
+        if delete is not None:
+            properties['Delete'] = delete
+        if update is not None:
+            properties['Update'] = update
+        if immutable is not None:
+            properties['Immutable'] = immutable
+        resource = core.CustomResource(scope, id,
+            service_token=self.service_token,
+            resource_type=resource_type,
+            properties=properties
+        )
+        resource.node.add_dependency(self.role)
+        return resource
+
+    def schedule(self, scope: core.Construct, id: str, *, schedule: str, operation: Dict) -> events.Rule:
+        return events.Rule(scope, id,
+            schedule=events.Schedule.expression(schedule),
+            targets=[
+                targets.LambdaFunction(self.function,
+                    event=events.RuleTargetInput.from_object({'Operation': operation}),
+                    retry_attempts=2
+                )
+            ]
+        )
@@ -0,0 +1,70 @@
+import hashlib
+import json
+from typing import Dict, List, Optional
+from aws_cdk import (
+    core,
+    aws_glue as glue,
+)
+
+
+class ClassifierRegistry(core.Construct):
+    """The custom Glue classifiers of a zone, one per distinct definition.
+
+    Datasets that ask for the same definition share its classifier, so the zone does not create a classifier
+    per crawler. Crawlers only use a custom classifier when their dataset passes one, e.g. `tsv()` for
+    tab-separated files without a header row, which the built-in CSV classifier can't recognize.
+    """
+
+    kinds = {
+        'csv': (glue.CfnClassifier.CsvClassifierProperty, 'csv_classifier'),
+        'grok': (glue.CfnClassifier.GrokClassifierProperty, 'grok_classifier'),
+        'json': (glue.CfnClassifier.JsonClassifierProperty, 'json_classifier'),
+        'xml': (glue.CfnClassifier.XMLClassifierProperty, 'xml_classifier'),
+    }
+
+    def __init__(self, scope: core.Construct, id: str, *, name_prefix: str):
+        super().__init__(scope, id)
+        self._name_prefix = name_prefix
+        self._classifiers: Dict[str, glue.CfnClassifier] = {}
+
+    def csv(self,
+            delimiter: str=',',
+            contains_header: str='UNKNOWN',
+            quote_symbol: str='"',
+            header: Optional[List[str]]=None,
+            allow_single_column: bool=False,
+            disable_value_trimming: bool=False,
+    ) -> glue.CfnClassifier:
+        if contains_header not in ('UNKNOWN', 'PRESENT', 'ABSENT'):
+            raise AttributeError(f'"contains_header" must be UNKNOWN, PRESENT or ABSENT. contains_header given was {contains_header}')
+        return self._classifier('csv', dict(
+            delimiter=delimiter,
+            contains_header=contains_header,
+            quote_symbol=quote_symbol,
+            header=header,
+            allow_single_column=allow_single_column,
+            disable_value_trimming=disable_value_trimming,
+        ))
+
+    def grok(self, classification: str, grok_pattern: str, custom_patterns: Optional[str]=None) -> glue.CfnClassifier:
+        return self._classifier('grok', dict(classification=classification, grok_pattern=grok_pattern, custom_patterns=custom_patterns))
+
+    def json(self, json_path: str) -> glue.CfnClassifier:
+        return self._classifier('json', dict(json_path=json_path))
+
+    def xml(self, classification: str, row_tag: str) -> glue.CfnClassifier:
+        return self._classifier('xml', dict(classification=classification, row_tag=row_tag))
+
+    def tsv(self, contains_header: str='UNKNOWN') -> glue.CfnClassifier:
+        # The built-in CSV classifier detects tab-separated files with a header row only.
+        return self.csv(delimiter='\t', contains_header=contains_header)
+
+    def _classifier(self, kind: str, definition: dict) -> glue.CfnClassifier:
+        digest = hashlib.sha256(json.dumps([kind, definition], sort_keys=True).encode()).hexdigest()[:8]
+        if digest not in self._classifiers:
+            # Classifier names are unique per account and region, so they are derived from the zone and the definition.
+            name = f'{self._name_prefix}-{kind}-{digest}'
+            definition = {k: v for k, v in definition.items() if v is not None}
+            property_class, keyword = self.kinds[kind]
+            self._classifiers[digest] = glue.CfnClassifier(self, f'{self.node.id}.{kind}.{digest}', **{keyword: property_class(name=name, **definition)})
+        return self._classifiers[digest]
@@ -0,0 +1,84 @@
+from typing import Optional
+from aws_cdk import (
+    core,
+)
+from vre_data_lake.filetype import Compression, Filetype
+from vre_data_lake.glue_job import GlueJob
+from vre_data_lake.zone import TablePermission, Zone
+
+
+class Compaction(core.Construct):
+    """Merges the small objects of a dataset's closed partitions into files of a target size.
+
+    A compacted partition is written to a new, hidden version directory within the partition's directory, and the
+    partition is then pointed to it in the catalog, so readers switch from the old files to the new ones at once.
+    The partitions must therefore be registered in the catalog by the dataset's crawler. Files written to a
+    partition's directory after the switch are not read until the next run takes them into a new version. The
+    files a partition no longer points to are deleted by a later run.
+    """
+
+    spark_formats = {
+        Filetype.APACHE_PARQUET: ('parquet', Compression.SNAPPY),
+        Filetype.APACHE_ORC: ('orc', Compression.SNAPPY),
+        Filetype.APACHE_AVRO: ('avro', Compression.SNAPPY),
+        Filetype.JSON: ('json', Compression.NONE),
+    }
+    # Codec names of the Spark writers of Glue 3.0. Its ORC writer has no zstd.
+    spark_codecs = {
+        'parquet': {Compression.ZSTD: 'zstd', Compression.SNAPPY: 'snappy', Compression.GZIP: 'gzip', Compression.NONE: 'none'},
+        'orc': {Compression.SNAPPY: 'snappy', Compression.GZIP: 'zlib', Compression.NONE: 'none'},
+        'avro': {Compression.ZSTD: 'zstandard', Compression.SNAPPY: 'snappy', Compression.GZIP: 'deflate', Compression.NONE: 'uncompressed'},
+        'json': {Compression.ZSTD: 'org.apache.hadoop.io.compress.ZStandardCodec', Compression.SNAPPY: 'snappy', Compression.GZIP: 'gzip', Compression.NONE: 'none'},
+    }
+
+    def __init__(self, scope: core.Construct, id: str, *,
+            zone: Zone,
+            s3_prefix: str,
+            filetype: Filetype,
+            schedule: str,
+            target_file_size_mb: int=128,
+            closed_after: core.Duration=core.Duration.days(1),
+            number_of_workers: int=2,
+            compression: Optional[Compression]=None,
+    ):
+        super().__init__(scope, id=id)
+
+        if filetype not in self.spark_formats:
+            raise AttributeError(f'Compaction is only supported for the filetypes {list(self.spark_formats)}. filetype given was {filetype}')
+        spark_format, default_compression = self.spark_formats[filetype]
+        compression = compression or default_compression
+        if compression not in self.spark_codecs[spark_format]:
+            raise AttributeError(f'Compaction cannot write {filetype} files with {compression}.')
+
+        zone.grant_table_access_to_role(
+            role=zone.job_role,
+            s3_prefix=s3_prefix,
+            table_permissions=[
+                TablePermission.ALTER,
+                TablePermission.DESCRIBE,
+                TablePermission.SELECT,
+                TablePermission.INSERT,
+                TablePermission.DELETE,
+            ],
+            scope=self
+        )
+
+        self.job = GlueJob(self, f'{id}.job',
+            job_name=f'{zone.zone_name}-{s3_prefix}-compaction',
+            script='compact_small_files.py',
+            shared_modules=True,
+            role=zone.job_role,
+            description=f"Compacts small files in the closed partitions of the data lake dataset named '{s3_prefix}'.",
+            arguments={
+                "database": zone.glue_db.database_name,
+                "table": s3_prefix,
+                "format": spark_format,
+                "compression": self.spark_codecs[spark_format][compression],
+                "target_file_size_mb": str(target_file_size_mb),
+                "closed_after_hours": str(int(closed_after.to_hours())),
+            },
+            schedule=schedule,
+            number_of_workers=number_of_workers
+        )
+        if zone.monitoring is not None:
+            zone.monitoring.add_compaction(zone.zone_name, s3_prefix)
@@ -0,0 +1,107 @@
+from typing import Optional
+from aws_cdk import (
+    core,
+    aws_iam as iam,
+)
+from vre_data_lake.dataset import Dataset
+from vre_data_lake.filetype import Compression, Filetype, TableFormat
+from vre_data_lake.glue_job import GlueJob
+from vre_data_lake.policy_aggregator import PolicyAggregator
+from vre_data_lake.role import Role
+from vre_data_lake.zone import DatabasePermission, TablePermission
+
+
+class ColumnarConversion(core.Construct):
+    """Rewrites a source dataset (e.g. raw CSV/JSON) as partitioned, compressed Parquet in a target dataset."""
+
+    spark_codecs = {
+        Compression.ZSTD: 'zstd',
+        Compression.SNAPPY: 'snappy',
+        Compression.GZIP: 'gzip',
+        Compression.NONE: 'uncompressed',
+    }
+
+    def __init__(self, scope: core.Construct, id: str, *,
+            source: Dataset,
+            target: Dataset,
+            schedule: Optional[str]=None,
+            number_of_workers: int=2,
+    ):
+        super().__init__(scope, id=id)
+
+        if target.filetype != Filetype.APACHE_PARQUET:
+            raise AttributeError(f'The target dataset of a conversion must have the filetype {Filetype.APACHE_PARQUET}. filetype given was {target.filetype}')
+        if TableFormat.ICEBERG in (source.table_format, target.table_format):
+            # The job reads and writes the files of the datasets directly, which Iceberg's metadata would not track.
+            raise AttributeError('Conversions read and write Hive tables. Load Iceberg datasets with INSERT INTO or MERGE INTO instead.')
+        if not target.hive_layout:
+            # The job writes partitions to key=value directories, which the target's projection would not read.
+            raise AttributeError(f'The target dataset of a conversion must store its partitions in key=value directories. storage_location_template given was {target.storage_location_template}')
+        if target.bucket_columns and not all(c.ascending for c in target.sort_columns):
+            raise AttributeError('Spark only sorts bucketed files in ascending order, so the sort columns of a bucketed target must be ascending.')
+
+        self.role = Role(self, f'{id}.iam.role.glue',
+            role_name=f'{id}-Conversion-Role',
+            assumed_by=iam.ServicePrincipal('glue.amazonaws.com'),
+            managed_policies=[
+                iam.ManagedPolicy.from_aws_managed_policy_name('service-role/AWSGlueServiceRole')
+            ]
+        )
+
+        source.grant_access_to_role(
+            role=self.role,
+            # The job registers the partitions of a source with partition projection before reading them.
+            table_permissions=[TablePermission.DESCRIBE, TablePermission.SELECT] + ([TablePermission.INSERT] if source.partition_keys else []),
+            scope=self
+        )
+        target.grant_access_to_role(
+            role=self.role,
+            table_permissions=[TablePermission.DESCRIBE, TablePermission.INSERT],
+            scope=self
+        )
+
+        arguments = {
+            "source_database": source.zone.glue_db.database_name,
+            "source_table": source.s3_prefix,
+            "target_path": target.location,
+            # Written with the target dataset's codec.
+            "compression": self.spark_codecs[target.compression or Compression.SNAPPY],
+        }
+        if target.partition_keys:
+            arguments["partition_keys"] = ','.join(k.name for k in target.partition_keys)
+        if target.sort_columns:
+            arguments["sort_columns"] = ','.join(f"{c.name}:{'asc' if c.ascending else 'desc'}" for c in target.sort_columns)
+        if target.bucket_columns:
+            arguments["bucket_columns"] = ','.join(target.bucket_columns)
+            arguments["number_of_buckets"] = str(target.number_of_buckets)
+            arguments["target_database"] = target.zone.glue_db.database_name
+            arguments["target_table"] = target.s3_prefix
+            # Spark only writes buckets through a catalog table, so the job writes through a scratch table
+            # over the target location and drops it afterwards.
+            target.zone.grant_db_access_to_role(self.role, [DatabasePermission.CREATE_TABLE, DatabasePermission.DESCRIBE], scope=self)
+            target.zone.grant_location_access_to_role(self.role, target.s3_prefix, scope=self)
+            stack = core.Stack.of(self)
+            PolicyAggregator.of(self.role, self).add_statements(
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=["glue:GetTable", "glue:CreateTable", "glue:DeleteTable"],
+                    resources=[
+                        stack.format_arn(service='glue', resource='catalog'),
+                        target.zone.glue_db.database_arn,
+                        stack.format_arn(service='glue', resource='table', resource_name=f'{target.zone.glue_db.database_name}/{target.s3_prefix}_bucketing_*'),
+                    ]
+                )
+            )
+
+        self.job = GlueJob(self, f'{id}.job',
+            job_name=f'{target.zone.zone_name}-{target.s3_prefix}-conversion',
+            script='convert_to_parquet.py',
+            shared_modules=True,
+            role=self.role,
+            description=f"Converts '{source.s3_prefix}' in '{source.zone.zone_name}' to Parquet in '{target.s3_prefix}' in '{target.zone.zone_name}'.",
+            arguments=arguments,
+            schedule=schedule,
+            job_bookmarks=True,
+            number_of_workers=number_of_workers
+        )
+        self.job.node.add_dependency(source.table, target.table)
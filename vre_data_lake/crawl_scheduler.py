@@ -0,0 +1,120 @@
+from typing import List, Optional, Sequence, Union
+from aws_cdk import (
+    core,
+    aws_glue as glue,
+)
+from vre_data_lake.glue_job import GlueJob
+from vre_data_lake.zone import Zone
+
+
+class CrawlScheduler(core.Construct):
+    """Runs the crawlers of one or more zones as a Glue workflow instead of on individual schedules.
+
+    Stages run in the given order, so raw zone crawls finish before the jobs and crawls of downstream zones
+    start. Within a zone stage, crawlers run in batches of at most `max_concurrency`, each batch starting when
+    the previous one has succeeded. A failed, cancelled or stopped crawl or job doesn't stop the rest of the run:
+    the next batch then starts at once, without waiting for the rest of the batch that failed, so it may briefly
+    run alongside it.
+
+    Crawlers that are scheduled here have their own schedules removed. The workflow's triggers depend on the
+    crawlers and jobs they start, so with a sharded lake this must be built in a stack that may depend on
+    every dataset stack (see `StackSharder.orchestration_scope`).
+    """
+
+    def __init__(self, scope: core.Construct, id: str, *,
+            workflow_name: str,
+            stages: Sequence[Union[Zone, GlueJob, List[GlueJob]]],
+            schedule: str='cron(0 0 * * ? *)',
+            max_concurrency: int=5,
+    ):
+        super().__init__(scope, id=id)
+
+        if max_concurrency < 1:
+            raise AttributeError(f'"max_concurrency" must be at least 1. max_concurrency given was {max_concurrency}')
+
+        self.workflow = glue.CfnWorkflow(self, f'{id}.glue.workflow',
+            name=workflow_name,
+            description='Runs the crawls and jobs of the data lake in order, with a bounded number of crawls at once.',
+            max_concurrent_runs=1
+        )
+
+        batches = []
+        for stage in stages:
+            if isinstance(stage, Zone):
+                for crawler in stage.crawlers:
+                    crawler.schedule = None
+                for start in range(0, len(stage.crawlers), max_concurrency):
+                    batches.append(stage.crawlers[start:start + max_concurrency])
+            elif isinstance(stage, GlueJob):
+                batches.append([stage])
+            elif stage:
+                batches.append(list(stage))
+
+        self.triggers: List[glue.CfnTrigger] = []
+        previous_batch = None
+        for i, batch in enumerate(batches):
+            if previous_batch is None:
+                self._trigger(f'{id}.glue.trigger.{i}', f'{workflow_name}-{i}', workflow_name, batch,
+                    trigger_type='SCHEDULED', schedule=schedule
+                )
+            else:
+                conditions = [self._succeeded(step) for step in previous_batch]
+                self._trigger(f'{id}.glue.trigger.{i}', f'{workflow_name}-{i}', workflow_name, batch,
+                    trigger_type='CONDITIONAL',
+                    predicate=glue.CfnTrigger.PredicateProperty(
+                        conditions=conditions,
+                        logical='AND' if len(conditions) > 1 else None
+                    )
+                )
+                # A condition matches a single state, so the steps that end otherwise start the batch separately.
+                self._trigger(f'{id}.glue.trigger.{i}.failed', f'{workflow_name}-{i}-failed', workflow_name, batch,
+                    trigger_type='CONDITIONAL',
+                    predicate=glue.CfnTrigger.PredicateProperty(
+                        conditions=[condition for step in previous_batch for condition in self._failed(step)],
+                        logical='ANY'
+                    )
+                )
+            previous_batch = batch
+
+    def _trigger(self, id: str, name: str, workflow_name: str, batch: List[Union[glue.CfnCrawler, GlueJob]], *,
+            trigger_type: str,
+            schedule: Optional[str]=None,
+            predicate: Optional[glue.CfnTrigger.PredicateProperty]=None,
+    ):
+        trigger = glue.CfnTrigger(self, id,
+            name=name,
+            workflow_name=workflow_name,
+            type=trigger_type,
+            schedule=schedule,
+            predicate=predicate,
+            start_on_creation=True,
+            actions=[self._action(step) for step in batch]
+        )
+        trigger.add_depends_on(self.workflow)
+        for step in batch:
+            trigger.node.add_dependency(step)
+        self.triggers.append(trigger)
+
+    @staticmethod
+    def _action(step: Union[glue.CfnCrawler, GlueJob]) -> glue.CfnTrigger.ActionProperty:
+        if isinstance(step, GlueJob):
+            return glue.CfnTrigger.ActionProperty(job_name=step.job_name)
+        return glue.CfnTrigger.ActionProperty(crawler_name=step.name)
+
+    @staticmethod
+    def _succeeded(step: Union[glue.CfnCrawler, GlueJob]) -> glue.CfnTrigger.ConditionProperty:
+        if isinstance(step, GlueJob):
+            return glue.CfnTrigger.ConditionProperty(job_name=step.job_name, state='SUCCEEDED', logical_operator='EQUALS')
+        return glue.CfnTrigger.ConditionProperty(crawler_name=step.name, crawl_state='SUCCEEDED', logical_operator='EQUALS')
+
+    @staticmethod
+    def _failed(step: Union[glue.CfnCrawler, GlueJob]) -> List[glue.CfnTrigger.ConditionProperty]:
+        if isinstance(step, GlueJob):
+            return [
+                glue.CfnTrigger.ConditionProperty(job_name=step.job_name, state=state, logical_operator='EQUALS')
+                for state in ['FAILED', 'STOPPED', 'TIMEOUT']
+            ]
+        return [
+            glue.CfnTrigger.ConditionProperty(crawler_name=step.name, crawl_state=state, logical_operator='EQUALS')
+            for state in ['FAILED', 'CANCELLED', 'ERROR']
+        ]
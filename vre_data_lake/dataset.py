@@ -4,11 +4,18 @@ from aws_cdk import (
     aws_glue as glue,
     aws_iam as iam,
 )
-from typing import List, Optional
+from typing import Dict, List, Optional
 
+from vre_data_lake.compaction import Compaction
+from vre_data_lake.iceberg import IcebergTable
+from vre_data_lake.lake_permissions import LakePermissionsMode
 from vre_data_lake.role import Role
-from vre_data_lake.zone import TablePermission, Zone
-from vre_data_lake.filetype import Filetype
+from vre_data_lake.schema import Schema, SortColumn
+from vre_data_lake.statistics import TableStatistics
+from vre_data_lake.streaming import StreamingIngestion
+from vre_data_lake.zone import CrawlMode, SchemaDeleteBehavior, SchemaUpdateBehavior, TablePermission, Zone
+from vre_data_lake.filetype import Compression, Filetype, TableFormat
+from vre_data_lake.partition import PartitionKey
 
 
 class Dataset(core.Construct):
@@ -21,21 +28,193 @@ class Dataset(core.Construct):
             lifecycle_rules: List[s3.LifecycleRule],
             crawler_classifer: Optional[glue.CfnClassifier]=None,
             crawler_schedule: Optional[glue.CfnCrawler.ScheduleProperty]=None,
+            partition_keys: Optional[List[PartitionKey]]=None,
+            storage_location_template: Optional[str]=None,
+            crawl_mode: CrawlMode=CrawlMode.FULL,
+            crawler_exclusions: Optional[List[str]]=None,
+            crawler_sample_size: Optional[int]=None,
+            crawler_update_behavior: Optional[SchemaUpdateBehavior]=None,
+            crawler_delete_behavior: Optional[SchemaDeleteBehavior]=None,
+            compaction_schedule: Optional[str]=None,
+            compaction_target_file_size_mb: int=128,
+            compaction_closed_after: core.Duration=core.Duration.days(1),
+            schema: Optional[Schema]=None,
+            crawler_enabled: Optional[bool]=None,
+            sample_data_prune: Optional[bool]=None,
+            streaming_enabled: bool=False,
+            streaming_buffering_size_mb: int=128,
+            streaming_buffering_interval: core.Duration=core.Duration.seconds(300),
+            streaming_partition_key_queries: Optional[Dict[str, str]]=None,
+            statistics_enabled: bool=False,
+            statistics_schedule: Optional[str]=None,
+            bucket_columns: Optional[List[str]]=None,
+            number_of_buckets: Optional[int]=None,
+            sort_columns: Optional[List[SortColumn]]=None,
+            compression: Optional[Compression]=None,
+            allow_unsplittable_compression: bool=False,
+            table_format: TableFormat=TableFormat.HIVE,
+            iceberg_partitioning: Optional[List[str]]=None,
+            iceberg_optimize_schedule: Optional[str]='cron(0 2 * * ? *)',
+            iceberg_vacuum_schedule: Optional[str]='cron(0 4 * * ? *)',
+            iceberg_snapshot_retention: core.Duration=core.Duration.days(5),
+            iceberg_removal_policy: core.RemovalPolicy=core.RemovalPolicy.RETAIN,
     ):
         super().__init__(scope, id=id)
 
+        if bucket_columns and (compaction_schedule is not None or streaming_enabled):
+            # Compaction merges files across buckets and Firehose cannot hash records into buckets.
+            raise AttributeError('Bucketed datasets cannot be compacted or loaded by streaming ingestion.')
+        if table_format == TableFormat.ICEBERG:
+            if schema is None:
+                raise AttributeError('Iceberg tables are created with their columns, so the dataset must declare a schema.')
+            if crawler_enabled or compaction_schedule is not None or streaming_enabled or statistics_enabled:
+                raise AttributeError('Iceberg datasets are not crawled, compacted, loaded by streaming ingestion or analyzed by the statistics job. Their files are merged by OPTIMIZE instead.')
+            if partition_keys or storage_location_template or bucket_columns or sort_columns:
+                raise AttributeError('Iceberg datasets are partitioned with "iceberg_partitioning" rather than partition keys, storage location templates or buckets.')
+        elif iceberg_partitioning:
+            raise AttributeError(f'"iceberg_partitioning" only applies to datasets with the table format {TableFormat.ICEBERG}.')
+
         self._s3_prefix = s3_prefix
         self._zone = zone
+        self.filetype = filetype
+        self.partition_keys = partition_keys or []
+        self.schema = schema
+        self.bucket_columns = bucket_columns or []
+        self.number_of_buckets = number_of_buckets
+        self.sort_columns = sort_columns or []
+        self.compression = compression
+        self.table_format = table_format
+        self.storage_location_template = storage_location_template
+        if bucket_columns and not self.hive_layout:
+            # Bucketed files are only written by Spark, which writes partitions to key=value directories.
+            raise AttributeError(f'Bucketed datasets must store their partitions in key=value directories. storage_location_template given was {storage_location_template}')
+        if crawler_enabled is None:
+            # Datasets with a declared schema don't need a crawler to become queryable.
+            crawler_enabled = schema is None
+        if compaction_schedule is not None and (partition_keys or not crawler_enabled or crawl_mode != CrawlMode.NEW_FOLDERS_ONLY):
+            # Projected partitions can't be pointed to compacted files, and a full crawl would point them back.
+            raise AttributeError(f'Compaction switches partitions registered by the crawler to their compacted files, so compacted datasets must be crawled in {CrawlMode.NEW_FOLDERS_ONLY} and have no partition keys.')
 
-        zone.register_resource(s3_prefix=s3_prefix)
-        self.table = zone.create_table(s3_prefix=s3_prefix, description=description)
-        zone.create_crawler(s3_prefix=s3_prefix, filetype=filetype, crawler_classifer=crawler_classifer, crawler_schedule=crawler_schedule)
+        zone.register_resource(s3_prefix=s3_prefix, scope=self)
+        self.iceberg = None
+        if table_format == TableFormat.ICEBERG:
+            self.iceberg = IcebergTable(self, f'{id}.iceberg',
+                zone=zone,
+                s3_prefix=s3_prefix,
+                description=description,
+                schema=schema,
+                filetype=filetype,
+                partitioning=iceberg_partitioning,
+                compression=compression,
+                optimize_schedule=iceberg_optimize_schedule,
+                vacuum_schedule=iceberg_vacuum_schedule,
+                snapshot_retention=iceberg_snapshot_retention,
+                removal_policy=iceberg_removal_policy
+            )
+            self.table = self.iceberg.resource
+        else:
+            self.table = zone.create_table(
+                s3_prefix=s3_prefix,
+                description=description,
+                partition_keys=partition_keys,
+                storage_location_template=storage_location_template,
+                filetype=filetype,
+                schema=schema,
+                statistics_enabled=statistics_enabled,
+                bucket_columns=bucket_columns,
+                number_of_buckets=number_of_buckets,
+                sort_columns=sort_columns,
+                compression=compression,
+                allow_unsplittable_compression=allow_unsplittable_compression,
+                scope=self
+            )
+        self.crawler = None
+        if crawler_enabled:
+            self.crawler = zone.create_crawler(
+                s3_prefix=s3_prefix,
+                filetype=filetype,
+                crawler_classifer=crawler_classifer,
+                crawler_schedule=crawler_schedule,
+                crawl_mode=crawl_mode,
+                exclusions=crawler_exclusions,
+                sample_size=crawler_sample_size,
+                update_behavior=crawler_update_behavior,
+                delete_behavior=crawler_delete_behavior,
+                scope=self
+            )
         zone.add_lifecycle_rules(s3_prefix=s3_prefix, lifecycle_rules=lifecycle_rules)
+        if sample_data_prune is not None:
+            zone.set_sample_data_prune(s3_prefix=s3_prefix, prune=sample_data_prune)
+
+        self.compaction = None
+        if compaction_schedule is not None:
+            self.compaction = Compaction(self, f'{id}.compaction',
+                zone=zone,
+                s3_prefix=s3_prefix,
+                filetype=filetype,
+                schedule=compaction_schedule,
+                target_file_size_mb=compaction_target_file_size_mb,
+                closed_after=compaction_closed_after,
+                compression=compression
+            )
+            self.compaction.node.add_dependency(self.table)
+
+        self.streaming = None
+        if streaming_enabled:
+            if schema is None:
+                raise AttributeError('Streaming ingestion converts records against the table schema, so the dataset must declare a schema.')
+            self.streaming = StreamingIngestion(self, f'{id}.streaming',
+                zone=zone,
+                s3_prefix=s3_prefix,
+                table=self.table,
+                filetype=filetype,
+                partition_keys=self.partition_keys,
+                storage_location_template=storage_location_template,
+                partition_key_queries=streaming_partition_key_queries,
+                buffering_size_mb=streaming_buffering_size_mb,
+                buffering_interval=streaming_buffering_interval,
+                compression=compression
+            )
+
+        self.statistics = None
+        if statistics_enabled:
+            # Statistics are recomputed after every crawl or compaction of the dataset, and on the schedule if given.
+            after = [step for step in [self.crawler, self.compaction and self.compaction.job] if step is not None]
+            self.statistics = TableStatistics(self, f'{id}.statistics',
+                zone=zone,
+                s3_prefix=s3_prefix,
+                schedule=statistics_schedule,
+                after=after
+            )
+            self.statistics.node.add_dependency(self.table)
+
+    @property
+    def s3_prefix(self) -> str:
+        return self._s3_prefix
+
+    @property
+    def zone(self) -> Zone:
+        return self._zone
+
+    @property
+    def location(self) -> str:
+        return self._zone.table_location(self._s3_prefix)
+
+    @property
+    def hive_layout(self) -> bool:
+        """Whether the partitions are stored in `key=value` directories, the layout Spark and Athena write."""
+        if self.storage_location_template is None:
+            return True
+        return self.storage_location_template.strip('/') == '/'.join(f'{k.name}=${{{k.name}}}' for k in self.partition_keys)
 
-    def grant_access_to_role(self, role: Role, table_permissions: Optional[List[TablePermission]]=[]):
+    def grant_access_to_role(self, role: Role, table_permissions: Optional[List[TablePermission]]=[], scope: Optional[core.Construct]=None):
         lake_permissions = self._zone.grant_table_access_to_role(
             role=role,
             s3_prefix=self._s3_prefix,
-            table_permissions=table_permissions
+            table_permissions=table_permissions,
+            scope=scope or self,
+            # Iceberg tables are created by the AthenaRunner, after the stack's batch is applied.
+            lake_permissions_mode=LakePermissionsMode.INDIVIDUAL if self.iceberg is not None else None
         )
         lake_permissions.node.add_dependency(self.table)
+        return lake_permissions
@@ -1,4 +1,50 @@
 from enum import Enum, auto
+from typing import Dict, Optional
+
+
+class Compression(Enum):
+    ZSTD = 'zstd'
+    SNAPPY = 'snappy'
+    GZIP = 'gzip'
+    NONE = 'none'
+
+
+class TableFormat(Enum):
+    # HIVE tables are plain Glue tables over the files of a prefix. ICEBERG tables track their files in
+    # metadata of their own, which allows row-level changes (see IcebergTable).
+    HIVE = auto()
+    ICEBERG = auto()
+
+
+class FileFormat:
+    """How Glue and Athena read and write a filetype: its input/output formats, SerDe and default compression.
+
+    Container formats (Parquet, ORC, Avro) compress blocks within the file, so compressed files can still be
+    split across readers. Text formats compress the whole file, which a single reader then has to read.
+    """
+
+    def __init__(self,
+            input_format: str,
+            output_format: str,
+            serialization_library: str,
+            compression_type: str,
+            columnar: bool,
+            serde_parameters: Optional[Dict[str, str]]=None,
+            compression_parameter: str='write.compression',
+            codecs: Optional[Dict[Compression, str]]=None,
+            block_compressed: bool=False,
+    ):
+        self.input_format = input_format
+        self.output_format = output_format
+        self.serialization_library = serialization_library
+        self.compression_type = compression_type
+        self.columnar = columnar
+        self.serde_parameters = serde_parameters or {}
+        # The table and SerDe property naming the codec, and the codec names it takes.
+        self.compression_parameter = compression_parameter
+        self.codecs = codecs or {c: c.value.upper() for c in Compression}
+        self.block_compressed = block_compressed
+
 
 class Filetype(Enum):
     APACHE_AVRO = auto()
@@ -17,6 +63,7 @@ class Filetype(Enum):
     REDIS_MONITOR_LOG = auto()
     REDIS_LOG = auto()
     CSV = auto()
+    TSV = auto()
     AMAZON_REDSHIFT = auto()
     MYSQL = auto()
     POSTGRESQL = auto()
@@ -43,6 +90,7 @@ class Filetype(Enum):
             Filetype.REDIS_MONITOR_LOG: "redismonlog",
             Filetype.REDIS_LOG: "redislog",
             Filetype.CSV: "csv",
+            Filetype.TSV: "csv",
             Filetype.AMAZON_REDSHIFT: "redshift",
             Filetype.MYSQL: "mysql",
             Filetype.POSTGRESQL: "postgresql",
@@ -51,3 +99,75 @@ class Filetype(Enum):
             Filetype.AMAZON_DYNAMODB: "dynamicdb",
             Filetype.OTHER: "UNKNOWN",
         }[self]
+
+    def file_format(self) -> Optional[FileFormat]:
+        return _FILE_FORMATS.get(self)
+
+
+_TEXT_INPUT_FORMAT = "org.apache.hadoop.mapred.TextInputFormat"
+_TEXT_OUTPUT_FORMAT = "org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat"
+
+_FILE_FORMATS = {
+    Filetype.APACHE_AVRO: FileFormat(
+        input_format="org.apache.hadoop.hive.ql.io.avro.AvroContainerInputFormat",
+        output_format="org.apache.hadoop.hive.ql.io.avro.AvroContainerOutputFormat",
+        serialization_library="org.apache.hadoop.hive.serde2.avro.AvroSerDe",
+        compression_type="none",
+        columnar=False,
+        compression_parameter="avro.output.codec",
+        codecs={Compression.ZSTD: "zstandard", Compression.SNAPPY: "snappy", Compression.GZIP: "deflate", Compression.NONE: "null"},
+        block_compressed=True,
+    ),
+    Filetype.APACHE_ORC: FileFormat(
+        input_format="org.apache.hadoop.hive.ql.io.orc.OrcInputFormat",
+        output_format="org.apache.hadoop.hive.ql.io.orc.OrcOutputFormat",
+        serialization_library="org.apache.hadoop.hive.ql.io.orc.OrcSerde",
+        compression_type="zlib",
+        columnar=True,
+        compression_parameter="orc.compress",
+        codecs={Compression.ZSTD: "ZSTD", Compression.SNAPPY: "SNAPPY", Compression.GZIP: "ZLIB", Compression.NONE: "NONE"},
+        block_compressed=True,
+    ),
+    Filetype.APACHE_PARQUET: FileFormat(
+        input_format="org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat",
+        output_format="org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat",
+        serialization_library="org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe",
+        serde_parameters={"serialization.format": "1"},
+        compression_type="snappy",
+        columnar=True,
+        compression_parameter="parquet.compression",
+        codecs={Compression.ZSTD: "ZSTD", Compression.SNAPPY: "SNAPPY", Compression.GZIP: "GZIP", Compression.NONE: "UNCOMPRESSED"},
+        block_compressed=True,
+    ),
+    Filetype.JSON: FileFormat(
+        input_format=_TEXT_INPUT_FORMAT,
+        output_format=_TEXT_OUTPUT_FORMAT,
+        serialization_library="org.openx.data.jsonserde.JsonSerDe",
+        serde_parameters={"ignore.malformed.json": "false"},
+        compression_type="none",
+        columnar=False,
+    ),
+    Filetype.CSV: FileFormat(
+        input_format=_TEXT_INPUT_FORMAT,
+        output_format=_TEXT_OUTPUT_FORMAT,
+        serialization_library="org.apache.hadoop.hive.serde2.lazy.LazySimpleSerDe",
+        serde_parameters={"field.delim": ",", "serialization.format": ","},
+        compression_type="none",
+        columnar=False,
+    ),
+    Filetype.TSV: FileFormat(
+        input_format=_TEXT_INPUT_FORMAT,
+        output_format=_TEXT_OUTPUT_FORMAT,
+        serialization_library="org.apache.hadoop.hive.serde2.lazy.LazySimpleSerDe",
+        serde_parameters={"field.delim": "\t", "serialization.format": "\t"},
+        compression_type="none",
+        columnar=False,
+    ),
+    Filetype.AMAZON_ION: FileFormat(
+        input_format="com.amazon.ionhiveserde.formats.IonInputFormat",
+        output_format="com.amazon.ionhiveserde.formats.IonOutputFormat",
+        serialization_library="com.amazon.ionhiveserde.IonHiveSerDe",
+        compression_type="none",
+        columnar=False,
+    ),
+}
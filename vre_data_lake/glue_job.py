@@ -0,0 +1,92 @@
+import os
+from typing import Dict, Optional
+from aws_cdk import (
+    core,
+    aws_glue as glue,
+    aws_iam as iam,
+    aws_s3_assets as s3_assets,
+)
+from vre_data_lake.policy_aggregator import PolicyAggregator
+from vre_data_lake.role import Role
+
+GLUE_SCRIPTS_PATH = os.path.join(os.path.dirname(__file__), 'glue_scripts')
+GLUE_SHARED_MODULES_PATH = os.path.join(GLUE_SCRIPTS_PATH, 'shared')
+
+
+class GlueJob(core.Construct):
+
+    def __init__(self, scope: core.Construct, id: str, *,
+            job_name: str,
+            script: str,
+            role: Role,
+            description: str,
+            arguments: Optional[Dict[str, str]]=None,
+            shared_modules: bool=False,
+            schedule: Optional[str]=None,
+            job_bookmarks: bool=False,
+            glue_version: str='3.0',
+            worker_type: str='G.1X',
+            number_of_workers: int=2,
+            timeout: core.Duration=core.Duration.hours(2),
+    ):
+        super().__init__(scope, id=id)
+
+        self.job_name = job_name
+
+        script_asset = s3_assets.Asset(self, f'{id}.s3.script',
+            path=os.path.join(GLUE_SCRIPTS_PATH, script)
+        )
+        # The modules the scripts share, zipped so Glue can add them to the job's Python path under their own names.
+        module_assets = [
+            s3_assets.Asset(self, f'{id}.s3.shared',
+                path=GLUE_SHARED_MODULES_PATH,
+                exclude=['__pycache__', '*.pyc']
+            )
+        ] if shared_modules else []
+        # Granted in this stack rather than on the role, which may live in a stack that must not depend on this one.
+        PolicyAggregator.of(role, self).add_statements(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["s3:GetObject"],
+                resources=[asset.bucket.arn_for_objects(asset.s3_object_key) for asset in [script_asset, *module_assets]]
+            )
+        )
+
+        default_arguments = {
+            "--job-language": "python",
+            "--enable-metrics": "true",
+            "--enable-glue-datacatalog": "true",
+            "--enable-continuous-cloudwatch-log": "true",
+            # Bookmarks record which objects a run has processed, so the next run only reads new ones.
+            "--job-bookmark-option": "job-bookmark-enable" if job_bookmarks else "job-bookmark-disable",
+        }
+        if module_assets:
+            default_arguments["--extra-py-files"] = ','.join(asset.s3_object_url for asset in module_assets)
+        for name, value in (arguments or {}).items():
+            default_arguments[f'--{name}'] = value
+
+        self.job = glue.CfnJob(self, f'{id}.glue.job',
+            name=job_name,
+            description=description,
+            role=role.role_arn,
+            command=glue.CfnJob.JobCommandProperty(
+                name='glueetl',
+                python_version='3',
+                script_location=script_asset.s3_object_url
+            ),
+            default_arguments=default_arguments,
+            execution_property=glue.CfnJob.ExecutionPropertyProperty(max_concurrent_runs=1),
+            glue_version=glue_version,
+            worker_type=worker_type,
+            number_of_workers=number_of_workers,
+            timeout=int(timeout.to_minutes())
+        )
+
+        if schedule is not None:
+            glue.CfnTrigger(self, f'{id}.glue.trigger',
+                name=f'{job_name}-trigger',
+                type='SCHEDULED',
+                schedule=schedule,
+                start_on_creation=True,
+                actions=[glue.CfnTrigger.ActionProperty(job_name=job_name)]
+            ).add_depends_on(self.job)
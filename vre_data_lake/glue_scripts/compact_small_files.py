@@ -0,0 +1,162 @@
+import json
+import math
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+
+import boto3
+from awsglue.context import GlueContext
+from awsglue.job import Job
+from awsglue.utils import getResolvedOptions
+from pyspark.context import SparkContext
+
+from compaction_versions import COMMITTED_AT, SOURCES_FILE, VERSION_DIRECTORY, base_prefix, is_hidden, partition_files
+
+args = getResolvedOptions(sys.argv, [
+    'JOB_NAME',
+    'database',
+    'table',
+    'format',
+    'compression',
+    'target_file_size_mb',
+    'closed_after_hours',
+])
+
+METRIC_NAMESPACE = 'VreDataLake/Compaction'
+
+glue_context = GlueContext(SparkContext.getOrCreate())
+spark = glue_context.spark_session
+job = Job(glue_context)
+job.init(args['JOB_NAME'], args)
+
+s3 = boto3.client('s3')
+glue = boto3.client('glue')
+now = datetime.now(timezone.utc)
+run_id = f"{now.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+target_file_size = int(args['target_file_size_mb']) * 1024 * 1024
+closed_before = now - timedelta(hours=int(args['closed_after_hours']))
+
+
+def is_hidden(key: str, prefix: str) -> bool:
+    # Athena, Hive and Spark skip any path component starting with '_' or '.'.
+    return any(part.startswith(('_', '.')) for part in key[len(prefix):].split('/'))
+
+
+def list_objects(bucket: str, prefix: str):
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            yield obj
+
+
+def delete_objects(bucket: str, keys):
+    keys = list(keys)
+    for i in range(0, len(keys), 1000):
+        s3.delete_objects(
+            Bucket=bucket,
+            Delete={'Objects': [{'Key': k} for k in keys[i:i + 1000]], 'Quiet': True}
+        )
+
+
+def split_location(location: str):
+    parsed = urlparse(location)
+    prefix = parsed.path.lstrip('/')
+    if prefix and not prefix.endswith('/'):
+        prefix = f'{prefix}/'
+    return parsed.netloc, prefix
+
+
+def read_sources(bucket: str, version: str) -> dict:
+    return json.loads(s3.get_object(Bucket=bucket, Key=f'{version}{SOURCES_FILE}')['Body'].read())
+
+
+def switch(partition: dict, location: str):
+    """Points the partition to its new version, which readers then see at once in place of the old files."""
+    fields = ('Values', 'StorageDescriptor', 'Parameters', 'LastAccessTime', 'LastAnalyzedTime')
+    partition_input = {k: v for k, v in partition.items() if k in fields}
+    partition_input['StorageDescriptor'] = {**partition['StorageDescriptor'], 'Location': location}
+    partition_input['Parameters'] = {**partition.get('Parameters', {}), COMMITTED_AT: datetime.now(timezone.utc).isoformat()}
+    glue.update_partition(
+        DatabaseName=args['database'],
+        TableName=args['table'],
+        PartitionValueList=partition['Values'],
+        PartitionInput=partition_input
+    )
+
+
+table = glue.get_table(DatabaseName=args['database'], Name=args['table'])['Table']
+if table.get('Parameters', {}).get('projection.enabled') == 'true':
+    raise RuntimeError(f"{args['database']}.{args['table']} uses partition projection, so its partitions can't be switched to compacted files.")
+partitions = []
+for page in glue.get_paginator('get_partitions').paginate(DatabaseName=args['database'], TableName=args['table']):
+    partitions.extend(page['Partitions'])
+if not partitions:
+    print(f"{args['database']}.{args['table']} has no partitions in the catalog, so there is nothing to compact.")
+
+files_before = 0
+files_after = 0
+for partition in partitions:
+    bucket, current = split_location(partition['StorageDescriptor']['Location'])
+    base = base_prefix(current)
+    committed_at = partition.get('Parameters', {}).get(COMMITTED_AT)
+    committed_at = datetime.fromisoformat(committed_at) if committed_at else None
+
+    files = partition_files(
+        list_objects(bucket, base), base, current,
+        read_sources(bucket, current) if current != base else {}, committed_at, now
+    )
+    delete_objects(bucket, files.retired)
+
+    objects = files.live + files.late
+    files_before += len(objects)
+    small_objects = [o for o in objects if o['Size'] < target_file_size]
+    # Only closed partitions are compacted, so producers are never racing the switch. Late files are taken into
+    # a new version on the next run whatever the partition's state, as they are not read until then.
+    if not files.late and (len(small_objects) < 2 or max(o['LastModified'] for o in objects) > closed_before):
+        files_after += len(objects)
+        continue
+    if files.late:
+        print(f's3://{bucket}/{base}: {len(files.late)} files written after the switch to s3://{bucket}/{current}')
+
+    # The new version holds the compacted small files and copies of the others, and is hidden until switched to.
+    version = f'{base}{VERSION_DIRECTORY}{run_id}/'
+    if small_objects:
+        output_files = max(1, math.ceil(sum(o['Size'] for o in small_objects) / target_file_size))
+        spark.read.format(args['format']) \
+            .load([f's3://{bucket}/{o["Key"]}' for o in small_objects]) \
+            .coalesce(output_files) \
+            .write.format(args['format']) \
+            .option('compression', args['compression']) \
+            .mode('overwrite') \
+            .save(f's3://{bucket}/{version}')
+    for obj in files.live:
+        if obj['Size'] >= target_file_size:
+            s3.copy({'Bucket': bucket, 'Key': obj['Key']}, bucket, f"{version}{obj['Key'][len(current):]}")
+    for obj in files.late:
+        # Named after the run, as a late file may have the name of a file the current version holds.
+        if obj['Size'] >= target_file_size:
+            directory, _, name = obj['Key'][len(base):].rpartition('/')
+            s3.copy({'Bucket': bucket, 'Key': obj['Key']}, bucket, f"{version}{directory + '/' if directory else ''}{run_id}-{name}")
+    written = sum(1 for o in list_objects(bucket, version) if o['Size'] > 0 and not is_hidden(o['Key'], version))
+    # Files written to the crawled directory from here on are not in the sources, so the next run finds them late.
+    s3.put_object(Bucket=bucket, Key=f'{version}{SOURCES_FILE}', Body=json.dumps(files.sources).encode())
+
+    switch(partition, f's3://{bucket}/{version}')
+    files_after += written
+    print(f's3://{bucket}/{current}: {len(objects)} files -> {written} files in s3://{bucket}/{version}')
+
+print(f"Compacted {args['database']}.{args['table']}: {files_before} files before, {files_after} files after")
+dimensions = [
+    {'Name': 'Database', 'Value': args['database']},
+    {'Name': 'Table', 'Value': args['table']},
+]
+boto3.client('cloudwatch').put_metric_data(
+    Namespace=METRIC_NAMESPACE,
+    MetricData=[
+        {'MetricName': 'FileCountBefore', 'Dimensions': dimensions, 'Value': files_before, 'Unit': 'Count'},
+        {'MetricName': 'FileCountAfter', 'Dimensions': dimensions, 'Value': files_after, 'Unit': 'Count'},
+    ]
+)
+
+job.commit()
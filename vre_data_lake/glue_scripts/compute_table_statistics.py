@@ -0,0 +1,176 @@
+import sys
+from datetime import datetime, timezone
+from decimal import Decimal
+from urllib.parse import urlparse
+
+import boto3
+from awsglue.context import GlueContext
+from awsglue.job import Job
+from awsglue.utils import getResolvedOptions
+from pyspark.context import SparkContext
+from pyspark.sql import functions as F
+
+from projected_partitions import register_projected_partitions
+
+args = getResolvedOptions(sys.argv, [
+    'JOB_NAME',
+    'database',
+    'table',
+])
+
+# UpdateColumnStatisticsForTable accepts at most 25 columns per call.
+COLUMN_STATISTICS_BATCH_SIZE = 25
+TABLE_INPUT_KEYS = [
+    'Name', 'Description', 'Owner', 'LastAccessTime', 'LastAnalyzedTime', 'Retention', 'StorageDescriptor',
+    'PartitionKeys', 'ViewOriginalText', 'ViewExpandedText', 'TableType', 'Parameters', 'TargetTable',
+]
+
+glue_context = GlueContext(SparkContext.getOrCreate())
+spark = glue_context.spark_session
+job = Job(glue_context)
+job.init(args['JOB_NAME'], args)
+
+glue = boto3.client('glue')
+s3 = boto3.client('s3')
+table = glue.get_table(DatabaseName=args['database'], Name=args['table'])['Table']
+partition_columns = {c['Name'] for c in table.get('PartitionKeys', [])}
+columns = [c for c in table['StorageDescriptor']['Columns'] if c['Name'] not in partition_columns]
+
+
+def statistics_kind(column_type: str):
+    column_type = column_type.lower()
+    if column_type in ('tinyint', 'smallint', 'int', 'integer', 'bigint'):
+        return 'LONG'
+    if column_type in ('float', 'double'):
+        return 'DOUBLE'
+    if column_type.startswith('decimal'):
+        return 'DECIMAL'
+    if column_type == 'string' or column_type.startswith(('varchar', 'char')):
+        return 'STRING'
+    if column_type == 'boolean':
+        return 'BOOLEAN'
+    if column_type == 'date':
+        return 'DATE'
+    if column_type == 'binary':
+        return 'BINARY'
+    return None  # Timestamps and complex types have no Glue column statistics.
+
+
+def decimal_value(value: Decimal):
+    sign, digits, exponent = value.as_tuple()
+    unscaled = int(''.join(map(str, digits)) or '0') * (-1 if sign else 1)
+    return {'UnscaledValue': unscaled.to_bytes((unscaled.bit_length() + 8) // 8, 'big', signed=True), 'Scale': -exponent}
+
+
+registered = register_projected_partitions(glue, s3, args['database'], table)
+if registered:
+    print(f"Registered {registered} partitions of {args['database']}.{args['table']} in the catalog")
+
+# All statistics are computed in a single pass over the table.
+df = spark.table(f"`{args['database']}`.`{args['table']}`")
+supported = [(c['Name'], statistics_kind(c['Type'])) for c in columns if statistics_kind(c['Type'])]
+aggregates = [F.count(F.lit(1)).alias('row_count')]
+for name, kind in supported:
+    column = F.col(f'`{name}`')
+    aggregates.append(F.sum(F.when(column.isNull(), 1).otherwise(0)).alias(f'{name}__nulls'))
+    if kind in ('LONG', 'DOUBLE', 'DECIMAL', 'STRING', 'DATE'):
+        aggregates.append(F.approx_count_distinct(column).alias(f'{name}__ndv'))
+    if kind in ('LONG', 'DOUBLE', 'DECIMAL', 'DATE'):
+        aggregates.append(F.min(column).alias(f'{name}__min'))
+        aggregates.append(F.max(column).alias(f'{name}__max'))
+    if kind in ('STRING', 'BINARY'):
+        aggregates.append(F.max(F.length(column)).alias(f'{name}__max_length'))
+        aggregates.append(F.avg(F.length(column)).alias(f'{name}__avg_length'))
+    if kind == 'BOOLEAN':
+        aggregates.append(F.sum(F.when(column, 1).otherwise(0)).alias(f'{name}__trues'))
+        aggregates.append(F.sum(F.when(~column, 1).otherwise(0)).alias(f'{name}__falses'))
+row = df.agg(*aggregates).collect()[0]
+row_count = row['row_count']
+
+now = datetime.now(timezone.utc)
+column_statistics = []
+for name, kind in supported:
+    nulls = row[f'{name}__nulls'] or 0
+    if kind == 'LONG':
+        data = {'LongColumnStatisticsData': {
+            'MinimumValue': int(row[f'{name}__min'] or 0), 'MaximumValue': int(row[f'{name}__max'] or 0),
+            'NumberOfNulls': nulls, 'NumberOfDistinctValues': row[f'{name}__ndv'],
+        }}
+    elif kind == 'DOUBLE':
+        data = {'DoubleColumnStatisticsData': {
+            'MinimumValue': float(row[f'{name}__min'] or 0), 'MaximumValue': float(row[f'{name}__max'] or 0),
+            'NumberOfNulls': nulls, 'NumberOfDistinctValues': row[f'{name}__ndv'],
+        }}
+    elif kind == 'DECIMAL':
+        data = {'DecimalColumnStatisticsData': {
+            'MinimumValue': decimal_value(row[f'{name}__min'] or Decimal(0)), 'MaximumValue': decimal_value(row[f'{name}__max'] or Decimal(0)),
+            'NumberOfNulls': nulls, 'NumberOfDistinctValues': row[f'{name}__ndv'],
+        }}
+    elif kind == 'DATE':
+        minimum, maximum = row[f'{name}__min'], row[f'{name}__max']
+        data = {'DateColumnStatisticsData': {
+            'NumberOfNulls': nulls, 'NumberOfDistinctValues': row[f'{name}__ndv'],
+            **({'MinimumValue': datetime.combine(minimum, datetime.min.time())} if minimum else {}),
+            **({'MaximumValue': datetime.combine(maximum, datetime.min.time())} if maximum else {}),
+        }}
+    elif kind == 'STRING':
+        data = {'StringColumnStatisticsData': {
+            'MaximumLength': int(row[f'{name}__max_length'] or 0), 'AverageLength': float(row[f'{name}__avg_length'] or 0),
+            'NumberOfNulls': nulls, 'NumberOfDistinctValues': row[f'{name}__ndv'],
+        }}
+    elif kind == 'BINARY':
+        data = {'BinaryColumnStatisticsData': {
+            'MaximumLength': int(row[f'{name}__max_length'] or 0), 'AverageLength': float(row[f'{name}__avg_length'] or 0),
+            'NumberOfNulls': nulls,
+        }}
+    else:
+        data = {'BooleanColumnStatisticsData': {
+            'NumberOfTrues': row[f'{name}__trues'] or 0, 'NumberOfFalses': row[f'{name}__falses'] or 0, 'NumberOfNulls': nulls,
+        }}
+    data['Type'] = kind
+    column_type = next(c['Type'] for c in columns if c['Name'] == name)
+    column_statistics.append({'ColumnName': name, 'ColumnType': column_type, 'AnalyzedTime': now, 'StatisticsData': data})
+
+for i in range(0, len(column_statistics), COLUMN_STATISTICS_BATCH_SIZE):
+    response = glue.update_column_statistics_for_table(
+        DatabaseName=args['database'],
+        TableName=args['table'],
+        ColumnStatisticsList=column_statistics[i:i + COLUMN_STATISTICS_BATCH_SIZE]
+    )
+    for error in response.get('Errors', []):
+        print(f"Failed to update the statistics of column {error['ColumnStatistics']['ColumnName']}: {error['Error']}")
+
+# Table level statistics are taken from the objects under the partition locations, or the table location.
+locations = set()
+for page in glue.get_paginator('get_partitions').paginate(DatabaseName=args['database'], TableName=args['table']):
+    locations.update(p['StorageDescriptor']['Location'] for p in page['Partitions'])
+object_count = 0
+size = 0
+for location in locations or {table['StorageDescriptor']['Location']}:
+    location = urlparse(location.rstrip('/') + '/')
+    prefix = location.path.lstrip('/')
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket=location.netloc, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            if any(part.startswith(('_', '.')) for part in obj['Key'][len(prefix):].split('/')):
+                continue
+            object_count += 1
+            size += obj['Size']
+
+statistics = {
+    'recordCount': str(row_count),
+    'averageRecordSize': str(size // row_count if row_count else 0),
+    'sizeKey': str(size),
+    'objectCount': str(object_count),
+}
+table_input = {k: v for k, v in table.items() if k in TABLE_INPUT_KEYS}
+table_input['LastAnalyzedTime'] = now
+table_input['Parameters'] = {**table.get('Parameters', {}), **statistics}
+table_input['StorageDescriptor'] = {
+    **table['StorageDescriptor'],
+    'Parameters': {**table['StorageDescriptor'].get('Parameters', {}), **statistics},
+}
+glue.update_table(DatabaseName=args['database'], TableInput=table_input, SkipArchive=True)
+print(f"{args['database']}.{args['table']}: {row_count} rows, {object_count} objects, {size} bytes, "
+      f"statistics for {len(column_statistics)} of {len(columns)} columns")
+
+job.commit()
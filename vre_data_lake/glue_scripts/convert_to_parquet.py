@@ -0,0 +1,106 @@
+import sys
+import uuid
+
+import boto3
+from awsglue.context import GlueContext
+from awsglue.dynamicframe import DynamicFrame
+from awsglue.job import Job
+from awsglue.utils import getResolvedOptions
+from pyspark.context import SparkContext
+from pyspark.sql import functions as F
+
+from projected_partitions import register_projected_partitions
+
+args = getResolvedOptions(sys.argv, [
+    'JOB_NAME',
+    'source_database',
+    'source_table',
+    'target_path',
+    'compression',
+])
+partition_keys = []
+if '--partition_keys' in sys.argv:
+    partition_keys = getResolvedOptions(sys.argv, ['partition_keys'])['partition_keys'].split(',')
+sort_columns = []
+if '--sort_columns' in sys.argv:
+    sort_columns = [c.split(':') for c in getResolvedOptions(sys.argv, ['sort_columns'])['sort_columns'].split(',')]
+bucketing = None
+if '--bucket_columns' in sys.argv:
+    bucketing = getResolvedOptions(sys.argv, ['bucket_columns', 'number_of_buckets', 'target_database', 'target_table'])
+
+glue_context = GlueContext(SparkContext.getOrCreate())
+job = Job(glue_context)
+job.init(args['JOB_NAME'], args)
+
+glue = boto3.client('glue')
+s3 = boto3.client('s3')
+
+registered = register_projected_partitions(
+    glue, s3,
+    args['source_database'],
+    glue.get_table(DatabaseName=args['source_database'], Name=args['source_table'])['Table']
+)
+if registered:
+    print(f"Registered {registered} partitions of {args['source_database']}.{args['source_table']} in the catalog")
+
+# The transformation contexts are what the job bookmark is keyed on, so a run only reads objects
+# that were added to the source table since the last successful run.
+source = glue_context.create_dynamic_frame.from_catalog(
+    database=args['source_database'],
+    table_name=args['source_table'],
+    transformation_ctx='source'
+)
+
+
+def spark_write(df):
+    # Used for what the glueparquet writer cannot do: buckets and the zstd codec.
+    writer = df.write.mode('append').format('parquet') \
+        .option('path', args['target_path']) \
+        .option('compression', args['compression'])
+    if partition_keys:
+        writer = writer.partitionBy(*partition_keys)
+    if bucketing is None:
+        writer.save()
+        return
+    # Spark only writes bucketed files through a catalog table. The scratch table points at the target
+    # location and is external, so dropping it keeps the files, which the target table reads as Spark buckets.
+    scratch_table = f"`{bucketing['target_database']}`.`{bucketing['target_table']}_bucketing_{uuid.uuid4().hex[:8]}`"
+    writer = writer.bucketBy(int(bucketing['number_of_buckets']), *bucketing['bucket_columns'].split(','))
+    if sort_columns:
+        writer = writer.sortBy(*[name for name, _ in sort_columns])
+    try:
+        writer.saveAsTable(scratch_table)
+    finally:
+        glue_context.spark_session.sql(f'DROP TABLE IF EXISTS {scratch_table}')
+
+
+def sorted_frame(frame):
+    # Each output file is sorted, so the Parquet min/max statistics of the sort columns prune row groups.
+    df = frame.toDF()
+    if partition_keys:
+        df = df.repartition(*partition_keys)
+    df = df.sortWithinPartitions(*[F.col(name).desc() if order == 'desc' else F.col(name).asc() for name, order in sort_columns])
+    return DynamicFrame.fromDF(df, glue_context, 'sorted')
+
+
+if source.toDF().head(1):
+    if bucketing is not None:
+        spark_write(source.toDF())
+    elif args['compression'] == 'zstd':
+        spark_write((sorted_frame(source) if sort_columns else source).toDF())
+    else:
+        glue_context.write_dynamic_frame.from_options(
+            frame=sorted_frame(source) if sort_columns else source,
+            connection_type='s3',
+            connection_options={
+                'path': args['target_path'],
+                'partitionKeys': partition_keys,
+            },
+            format='glueparquet',
+            format_options={'compression': args['compression']},
+            transformation_ctx='target'
+        )
+else:
+    print(f"No new objects in {args['source_database']}.{args['source_table']} since the last run")
+
+job.commit()
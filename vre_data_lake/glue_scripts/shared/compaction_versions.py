@@ -0,0 +1,58 @@
+import re
+from datetime import timedelta
+from typing import NamedTuple
+
+VERSION_DIRECTORY = '_compacted-'
+# Lists the crawled files, by key and ETag, that a version holds the data of.
+SOURCES_FILE = '_sources.json'
+COMMITTED_AT = 'compaction.committed_at'
+# Files a partition no longer points to are kept this long, for the queries that were already reading them.
+RETIRED_GRACE = timedelta(hours=1)
+
+
+class PartitionFiles(NamedTuple):
+    live: list
+    late: list
+    sources: dict
+    retired: list
+
+
+def is_hidden(key: str, prefix: str) -> bool:
+    # Athena, Hive and Spark skip any path component starting with '_' or '.'.
+    return any(part.startswith(('_', '.')) for part in key[len(prefix):].split('/'))
+
+
+def base_prefix(prefix: str) -> str:
+    # A compacted partition points to a version directory within the directory it was crawled from.
+    match = re.fullmatch(rf'(.*/){re.escape(VERSION_DIRECTORY)}[^/]+/', prefix)
+    return match.group(1) if match else prefix
+
+
+def partition_files(objects, base: str, current: str, current_sources: dict, committed_at, now) -> PartitionFiles:
+    """Sorts the objects under a partition's crawled directory.
+
+    live are the files the partition is read from. Once the partition points to a version, files written to the
+    crawled directory that the version does not hold are late: they are not read until a version holds them.
+    sources are the crawled files a new version would hold. retired are the objects no longer read through the
+    partition, which are deleted once it has pointed elsewhere for RETIRED_GRACE: the crawled files the version
+    holds, previous version directories, and those of runs that failed before switching to them.
+    """
+    grace_over = committed_at is None or committed_at <= now - RETIRED_GRACE
+    live, late, sources, retired = [], [], {}, []
+    for obj in objects:
+        key = obj['Key']
+        if key.startswith(current) and current != base:
+            if obj['Size'] > 0 and not is_hidden(key, current):
+                live.append(obj)
+        elif key[len(base):].startswith(VERSION_DIRECTORY):
+            if grace_over and obj['LastModified'] <= now - RETIRED_GRACE:
+                retired.append(key)
+        elif obj['Size'] > 0 and not is_hidden(key, base):
+            sources[key] = obj['ETag']
+            if current == base:
+                live.append(obj)
+            elif current_sources.get(key) != obj['ETag']:
+                late.append(obj)
+            elif grace_over:
+                retired.append(key)
+    return PartitionFiles(live, late, sources, retired)
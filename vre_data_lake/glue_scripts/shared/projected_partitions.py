@@ -0,0 +1,44 @@
+import re
+from urllib.parse import urlparse
+
+
+def register_projected_partitions(glue, s3, database: str, table: dict) -> int:
+    """Registers the existing partitions of a table with partition projection in the catalog.
+
+    Athena computes the partitions of such a table from its projection and ignores the catalog, but Spark and
+    Glue only read the partitions registered there. Partitions are found by matching the objects under the
+    table against its storage location template.
+    """
+    parameters = table.get('Parameters', {})
+    keys = [k['Name'] for k in table.get('PartitionKeys', [])]
+    if parameters.get('projection.enabled') != 'true' or not keys:
+        return 0
+    location = table['StorageDescriptor']['Location'].rstrip('/') + '/'
+    template = parameters.get('storage.location.template') or location + '/'.join(f'{k}=${{{k}}}' for k in keys) + '/'
+    template = urlparse(template.rstrip('/') + '/')
+    pattern = ''.join(
+        f'(?P<{part[2:-1]}>[^/]+)' if part.startswith('${') else re.escape(part)
+        for part in re.split(r'(\$\{\w+\})', template.path.lstrip('/'))
+    )
+    list_prefix = template.path.lstrip('/').split('${', 1)[0]
+    found = {}
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket=template.netloc, Prefix=list_prefix):
+        for obj in page.get('Contents', []):
+            match = re.match(pattern, obj['Key'])
+            if match is None or obj['Size'] == 0 or any(part.startswith(('_', '.')) for part in obj['Key'][match.end():].split('/')):
+                continue
+            found[tuple(match.group(k) for k in keys)] = f's3://{template.netloc}/{match.group(0)}'
+    existing = set()
+    for page in glue.get_paginator('get_partitions').paginate(DatabaseName=database, TableName=table['Name']):
+        existing.update(tuple(p['Values']) for p in page['Partitions'])
+    missing = [
+        {'Values': list(values), 'StorageDescriptor': {**table['StorageDescriptor'], 'Location': partition_location}}
+        for values, partition_location in sorted(found.items()) if values not in existing
+    ]
+    for i in range(0, len(missing), 100):
+        response = glue.batch_create_partition(DatabaseName=database, TableName=table['Name'], PartitionInputList=missing[i:i + 100])
+        for error in response.get('Errors', []):
+            if error['ErrorDetail']['ErrorCode'] != 'AlreadyExistsException':
+                raise RuntimeError(f"Failed to register the partition {error['PartitionValues']}: {error['ErrorDetail']}")
+    return len(missing)
+
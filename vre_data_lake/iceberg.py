@@ -0,0 +1,169 @@
+import re
+from typing import List, Optional
+from aws_cdk import (
+    core,
+    aws_iam as iam,
+)
+from vre_data_lake.athena_runner import AthenaRunner
+from vre_data_lake.filetype import Compression, Filetype
+from vre_data_lake.policy_aggregator import PolicyAggregator
+from vre_data_lake.schema import Schema
+from vre_data_lake.zone import DatabasePermission, Zone
+
+
+class IcebergTable(core.Construct):
+    """An Apache Iceberg table over a prefix of a zone, created and maintained with Athena by the stack's AthenaRunner.
+
+    Iceberg tables support UPDATE, DELETE and MERGE INTO, and are partitioned with transforms of their columns
+    (e.g. `day(event_time)`, `bucket(16, id)`) that readers don't have to filter on explicitly. Athena prunes
+    files with the table's metadata rather than by listing partitions.
+
+    The files written by row-level changes are merged by a scheduled OPTIMIZE, and snapshots older than
+    `snapshot_retention` are expired, with the files only they reference, by a scheduled VACUUM.
+
+    The table is created once. Changes to its table properties are applied with ALTER TABLE, but deployments
+    that change its schema, partitioning, location or description fail: those must be migrated by hand.
+
+    Athena drops the data of an Iceberg table along with it, so the table is retained when it leaves the stack
+    (e.g. when its dataset moves to another shard) unless `removal_policy` is DESTROY.
+    """
+
+    formats = {
+        Filetype.APACHE_PARQUET: 'parquet',
+        Filetype.APACHE_ORC: 'orc',
+        Filetype.APACHE_AVRO: 'avro',
+    }
+    # Hive types Athena cannot store in an Iceberg table.
+    unsupported_types = ['tinyint', 'smallint', 'char', 'varchar']
+
+    def __init__(self, scope: core.Construct, id: str, *,
+            zone: Zone,
+            s3_prefix: str,
+            description: str,
+            schema: Schema,
+            filetype: Filetype=Filetype.APACHE_PARQUET,
+            partitioning: Optional[List[str]]=None,
+            compression: Optional[Compression]=None,
+            optimize_schedule: Optional[str]='cron(0 2 * * ? *)',
+            vacuum_schedule: Optional[str]='cron(0 4 * * ? *)',
+            snapshot_retention: core.Duration=core.Duration.days(5),
+            removal_policy: core.RemovalPolicy=core.RemovalPolicy.RETAIN,
+    ):
+        super().__init__(scope, id=id)
+
+        if removal_policy not in (core.RemovalPolicy.RETAIN, core.RemovalPolicy.DESTROY):
+            raise AttributeError(f'Iceberg tables are either retained or destroyed. removal_policy given was {removal_policy}')
+
+        if filetype not in self.formats:
+            raise AttributeError(f'Iceberg tables are stored as one of {list(self.formats)}. filetype given was {filetype}')
+        for column in schema.columns:
+            found = [t for t in self.unsupported_types if re.search(rf'\b{t}\b', column.type.lower())]
+            if found:
+                raise AttributeError(f'Iceberg tables do not support the types {found}. Column {column.name} has the type {column.type}')
+        partitioning = partitioning or []
+        names = {c.name for c in schema.columns}
+        for transform in partitioning:
+            column = _partition_column(transform)
+            if column not in names:
+                raise AttributeError(f'Partitions of an Iceberg table must be a column or a transform of one (identity, year, month, day, hour, bucket, truncate). partitioning given was {transform}')
+
+        database = zone.glue_db.database_name
+        self.runner = AthenaRunner.of(self)
+        role = self.runner.role
+
+        grants = [
+            zone.grant_db_access_to_role(role, [DatabasePermission.CREATE_TABLE, DatabasePermission.DESCRIBE], scope=self),
+            zone.grant_location_access_to_role(role, s3_prefix, scope=self),
+        ]
+        stack = core.Stack.of(self)
+        aggregator = PolicyAggregator.of(role, self)
+        aggregator.add_statements(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "glue:GetDatabase",
+                    "glue:GetTable",
+                    "glue:CreateTable",
+                    "glue:UpdateTable",
+                    "glue:DeleteTable",
+                ],
+                resources=[
+                    stack.format_arn(service='glue', resource='catalog'),
+                    zone.glue_db.database_arn,
+                    stack.format_arn(service='glue', resource='table', resource_name=f'{database}/{s3_prefix}'),
+                ]
+            )
+        )
+
+        properties = {
+            'table_type': 'ICEBERG',
+            'format': self.formats[filetype],
+            'vacuum_max_snapshot_age_seconds': str(int(snapshot_retention.to_seconds())),
+        }
+        if compression is not None:
+            properties['write_compression'] = compression.value
+        columns = ',\n'.join(
+            f'  `{c.name}` {c.type}' + (f" COMMENT '{_ddl_string(c.comment)}'" if c.comment else '')
+            for c in schema.columns
+        )
+        ddl = f"CREATE TABLE IF NOT EXISTS `{database}`.`{s3_prefix}` (\n{columns}\n)"
+        if description:
+            ddl += f"\nCOMMENT '{_ddl_string(description)}'"
+        if partitioning:
+            ddl += f"\nPARTITIONED BY ({', '.join(partitioning)})"
+        location = zone.table_location(s3_prefix)
+        ddl += f"\nLOCATION '{location}'"
+        ddl += '\nTBLPROPERTIES (' + ', '.join(f"'{k}'='{v}'" for k, v in properties.items()) + ')'
+        # The table type can't be set on an existing table.
+        alter = f'ALTER TABLE `{database}`.`{s3_prefix}` SET TBLPROPERTIES (' + ', '.join(
+            f"'{k}'='{v}'" for k, v in properties.items() if k != 'table_type'
+        ) + ')'
+
+        self.resource = self.runner.run(self, f'{id}.athena.table',
+            resource_type='Custom::IcebergTable',
+            physical_id=f'{database}.{s3_prefix}',
+            create=self.runner.operation('Execute', Queries=[ddl]),
+            update=self.runner.operation('Execute', Queries=[alter]),
+            delete=self.runner.operation('Execute', Queries=[f'DROP TABLE IF EXISTS `{database}`.`{s3_prefix}`'])
+                if removal_policy == core.RemovalPolicy.DESTROY else None,
+            immutable={
+                'Columns': [[c.name, c.type, c.comment or ''] for c in schema.columns],
+                'Partitioning': partitioning,
+                'Location': location,
+                'Description': description or '',
+            }
+        )
+        self.resource.node.add_dependency(aggregator, *grants)
+
+        # The runner created the table, so Lake Formation lets it rewrite and expire its files.
+        self.optimize_rule = None
+        if optimize_schedule is not None:
+            self.optimize_rule = self.runner.schedule(self, f'{id}.events.rule.optimize',
+                schedule=optimize_schedule,
+                operation=self.runner.operation('Execute',
+                    Database=database,
+                    Queries=[f'OPTIMIZE "{database}"."{s3_prefix}" REWRITE DATA USING BIN_PACK']
+                )
+            )
+            self.optimize_rule.node.add_dependency(self.resource)
+        self.vacuum_rule = None
+        if vacuum_schedule is not None:
+            self.vacuum_rule = self.runner.schedule(self, f'{id}.events.rule.vacuum',
+                schedule=vacuum_schedule,
+                operation=self.runner.operation('Execute',
+                    Database=database,
+                    Queries=[f'VACUUM "{database}"."{s3_prefix}"']
+                )
+            )
+            self.vacuum_rule.node.add_dependency(self.resource)
+
+
+def _partition_column(transform: str) -> Optional[str]:
+    match = re.fullmatch(r'\s*(?:(?:year|month|day|hour)\(\s*(\w+)\s*\)|(?:bucket|truncate)\(\s*\d+\s*,\s*(\w+)\s*\)|(\w+))\s*', transform)
+    if match is None:
+        return None
+    return next(g for g in match.groups() if g is not None)
+
+
+def _ddl_string(value: str) -> str:
+    return value.replace('\\', '\\\\').replace("'", "\\'")
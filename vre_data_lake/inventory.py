@@ -0,0 +1,213 @@
+from typing import List, Optional
+from aws_cdk import (
+    core,
+    aws_glue as glue,
+    aws_iam as iam,
+    aws_s3 as s3,
+)
+from vre_data_lake.athena_runner import AthenaRunner
+from vre_data_lake.lake_permissions import LakePermissionsMode
+from vre_data_lake.partition import DatePartitionKey
+from vre_data_lake.policy_aggregator import PolicyAggregator
+from vre_data_lake.role import Role
+from vre_data_lake.schema import Column
+from vre_data_lake.zone import DatabasePermission, TablePermission, Zone
+
+INVENTORY_ID = 'daily'
+# The first inventory date Athena projects. Queries should filter on `dt`, e.g. the latest day.
+PROJECTION_START = '2024-01-01-00-00'
+_COLUMNS = [
+    Column('bucket', 'string'),
+    Column('key', 'string'),
+    Column('size', 'bigint'),
+    Column('last_modified_date', 'timestamp'),
+    Column('storage_class', 'string'),
+    Column('intelligent_tiering_access_tier', 'string'),
+]
+
+
+class ZoneInventory(core.Construct):
+    """A daily Parquet S3 Inventory of a zone's bucket, queryable in the zone's database.
+
+    The inventory is delivered to a bucket of its own and read through the symlink manifests S3 writes for
+    Hive, one `dt` partition per delivery. Views over it summarize the layout of the files (hidden files
+    excluded) for each day:
+
+    - `s3_inventory_prefixes`: file count, bytes, average, median and p90 size, and small files per dataset prefix.
+    - `s3_inventory_partitions`: the same per directory, i.e. per partition of a dataset.
+    - `s3_inventory_sizes`: the number of files and bytes per size range, per dataset prefix.
+    """
+
+    table_name = 's3_inventory'
+
+    def __init__(self, scope: core.Construct, id: str, *,
+            zone: Zone,
+            bucket: s3.Bucket,
+            bucket_name: str,
+            retention: core.Duration=core.Duration.days(30),
+            small_file_bytes: int=32 * 1024 * 1024,
+    ):
+        super().__init__(scope, id)
+        self._zone = zone
+        database = zone.glue_db.database_name
+
+        self.bucket = s3.Bucket(self, f'{id}.s3.bucket',
+            bucket_name=f'{bucket_name}-inventory',
+            removal_policy=core.RemovalPolicy.DESTROY,
+            lifecycle_rules=[s3.LifecycleRule(enabled=True, expiration=retention)]
+        )
+        bucket.add_inventory(
+            inventory_id=INVENTORY_ID,
+            destination=s3.InventoryDestination(bucket=self.bucket, prefix='inventory'),
+            frequency=s3.InventoryFrequency.DAILY,
+            format=s3.InventoryFormat.PARQUET,
+            include_object_versions=s3.InventoryObjectVersion.CURRENT,
+            optional_fields=['Size', 'LastModifiedDate', 'StorageClass', 'IntelligentTieringAccessTier']
+        )
+
+        location = self.bucket.s3_url_for_object(f'inventory/{bucket_name}/{INVENTORY_ID}/hive/')
+        # Deliveries are named after the hour they were made in, which varies, so every hour is projected.
+        dt = DatePartitionKey('dt',
+            range_start=PROJECTION_START,
+            format='yyyy-MM-dd-HH-mm',
+            interval=1,
+            interval_unit='HOURS'
+        )
+        self.table = glue.CfnTable(self, f'{id}.glue.table',
+            catalog_id=zone.glue_db.catalog_id,
+            database_name=database,
+            table_input=glue.CfnTable.TableInputProperty(
+                description=f"The daily S3 Inventory of the zone '{zone.zone_name}'.",
+                name=self.table_name,
+                storage_descriptor=glue.CfnTable.StorageDescriptorProperty(
+                    columns=[c.column() for c in _COLUMNS],
+                    location=location,
+                    # Each partition holds a symlink.txt that lists the Parquet files of that delivery.
+                    input_format='org.apache.hadoop.hive.ql.io.SymlinkTextInputFormat',
+                    output_format='org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat',
+                    serde_info=glue.CfnTable.SerdeInfoProperty(
+                        serialization_library='org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe'
+                    )
+                ),
+                partition_keys=[dt.column()],
+                table_type='EXTERNAL_TABLE',
+                parameters={
+                    'projection.enabled': 'true',
+                    **dt.projection_parameters(),
+                    'storage.location.template': f'{location}dt=${{dt}}/',
+                }
+            )
+        )
+
+        self.views = {
+            f'{self.table_name}_prefixes': _prefixes_view(small_file_bytes),
+            f'{self.table_name}_partitions': _partitions_view(small_file_bytes),
+            f'{self.table_name}_sizes': _sizes_view(),
+        }
+        runner = AthenaRunner.of(self)
+        grants = [
+            zone.grant_db_access_to_role(runner.role, [DatabasePermission.CREATE_TABLE, DatabasePermission.DESCRIBE], scope=self),
+            zone.grant_table_access_to_role(runner.role, self.table_name, [TablePermission.DESCRIBE, TablePermission.SELECT], scope=self),
+        ]
+        grants[1].node.add_dependency(self.table)
+        stack = core.Stack.of(self)
+        aggregator = PolicyAggregator.of(runner.role, self)
+        aggregator.add_statements(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "glue:GetDatabase",
+                    "glue:GetTable",
+                    "glue:CreateTable",
+                    "glue:UpdateTable",
+                    "glue:DeleteTable",
+                ],
+                resources=[
+                    stack.format_arn(service='glue', resource='catalog'),
+                    zone.glue_db.database_arn,
+                    stack.format_arn(service='glue', resource='table', resource_name=f'{database}/{self.table_name}'),
+                ] + [stack.format_arn(service='glue', resource='table', resource_name=f'{database}/{name}') for name in self.views]
+            )
+        )
+        self.resource = runner.run(self, f'{id}.athena.views',
+            resource_type='Custom::InventoryViews',
+            physical_id=f'{database}.{self.table_name}.views',
+            create=runner.operation('Execute', Database=database, Queries=[
+                f'CREATE OR REPLACE VIEW "{name}" AS\n{sql.format(table=self.table_name)}' for name, sql in self.views.items()
+            ]),
+            delete=runner.operation('Execute', Database=database, Queries=[
+                f'DROP VIEW IF EXISTS "{name}"' for name in self.views
+            ])
+        )
+        self.resource.node.add_dependency(aggregator, *grants)
+
+    def grant_access_to_role(self, role: Role, scope: Optional[core.Construct]=None):
+        # Views are read with the permissions of the caller, who also needs SELECT on the inventory table.
+        scope = scope or self
+        grant = self._zone.grant_table_access_to_role(role, self.table_name, [TablePermission.DESCRIBE, TablePermission.SELECT], scope=scope)
+        grant.node.add_dependency(self.table)
+        for name in self.views:
+            view_grant = self._zone.grant_table_access_to_role(role, name, [TablePermission.DESCRIBE, TablePermission.SELECT], scope=scope,
+                # The views only exist once the AthenaRunner has created them, after the stack's batch is applied.
+                lake_permissions_mode=LakePermissionsMode.INDIVIDUAL
+            )
+            view_grant.node.add_dependency(self.resource)
+        PolicyAggregator.of(role, scope).add_statements(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["s3:GetObject"],
+                resources=[self.bucket.arn_for_objects('inventory/*')]
+            ),
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["s3:ListBucket"],
+                resources=[self.bucket.bucket_arn]
+            )
+        )
+
+
+# Hidden files (markers, staging and error records) and folder placeholders are not part of any table.
+_DATA_FILES = "WHERE NOT regexp_like(key, '(^|/)[_.]') AND NOT key LIKE '%/'"
+
+
+def _prefixes_view(small_file_bytes: int) -> str:
+    return f"""SELECT dt, split_part(key, '/', 1) AS s3_prefix,
+  count(*) AS file_count,
+  sum(size) AS total_bytes,
+  avg(size) AS average_bytes,
+  approx_percentile(size, 0.5) AS median_bytes,
+  approx_percentile(size, 0.9) AS p90_bytes,
+  count_if(size < {small_file_bytes}) AS small_file_count
+FROM "{{table}}"
+{_DATA_FILES}
+GROUP BY dt, split_part(key, '/', 1)"""
+
+
+def _partitions_view(small_file_bytes: int) -> str:
+    return f"""SELECT dt, split_part(key, '/', 1) AS s3_prefix, regexp_replace(key, '/[^/]*$', '') AS partition_path,
+  count(*) AS file_count,
+  sum(size) AS total_bytes,
+  avg(size) AS average_bytes,
+  min(size) AS min_bytes,
+  max(size) AS max_bytes,
+  count_if(size < {small_file_bytes}) AS small_file_count
+FROM "{{table}}"
+{_DATA_FILES}
+GROUP BY dt, split_part(key, '/', 1), regexp_replace(key, '/[^/]*$', '')"""
+
+
+def _sizes_view() -> str:
+    ranges: List[int] = [1, 16, 128, 1024]
+    bounds = '\n'.join(f'    WHEN size < {mb * 1024 * 1024} THEN {lower * 1024 * 1024}' for lower, mb in zip([0] + ranges, ranges))
+    return f"""SELECT dt, split_part(key, '/', 1) AS s3_prefix, size_range_min_bytes,
+  count(*) AS file_count,
+  sum(size) AS total_bytes
+FROM (
+  SELECT dt, key, size, CASE
+{bounds}
+    ELSE {ranges[-1] * 1024 * 1024}
+  END AS size_range_min_bytes
+  FROM "{{table}}"
+  {_DATA_FILES}
+)
+GROUP BY dt, split_part(key, '/', 1), size_range_min_bytes"""
@@ -0,0 +1,137 @@
+from enum import Enum, auto
+from typing import Dict, List
+import jsii
+from aws_cdk import (
+    core,
+    aws_iam as iam,
+    aws_lakeformation as lf,
+    aws_lambda as lambda_,
+    aws_s3 as s3,
+    custom_resources as cr,
+)
+from vre_data_lake.lambda_function import LAMBDA_RUNTIME, lambda_code
+
+
+class LakePermissionsMode(Enum):
+    INDIVIDUAL = auto()  # One lf.CfnPermissions per grant, applied one by one by CloudFormation.
+    BATCHED = auto()     # All grants of a stack are applied by one LakePermissionsBatch.
+
+
+def cfn_resource_property(resource: Dict) -> lf.CfnPermissions.ResourceProperty:
+    """Converts a resource in the shape of the Lake Formation API to the CloudFormation resource property."""
+    if 'Database' in resource:
+        return lf.CfnPermissions.ResourceProperty(
+            database_resource=lf.CfnPermissions.DatabaseResourceProperty(
+                catalog_id=resource['Database']['CatalogId'],
+                name=resource['Database']['Name']
+            )
+        )
+    if 'Table' in resource:
+        return lf.CfnPermissions.ResourceProperty(
+            table_resource=lf.CfnPermissions.TableResourceProperty(
+                catalog_id=resource['Table']['CatalogId'],
+                database_name=resource['Table']['DatabaseName'],
+                name=resource['Table']['Name']
+            )
+        )
+    if 'DataLocation' in resource:
+        return lf.CfnPermissions.ResourceProperty(
+            data_location_resource=lf.CfnPermissions.DataLocationResourceProperty(
+                catalog_id=resource['DataLocation']['CatalogId'],
+                s3_resource=resource['DataLocation']['ResourceArn']
+            )
+        )
+    raise AttributeError(f'Unsupported Lake Formation resource {list(resource)}')
+
+
+@jsii.implements(core.IAnyProducer)
+class _EntriesProducer:
+
+    def __init__(self, batch: 'LakePermissionsBatch'):
+        self._batch = batch
+
+    def produce(self, context: core.IResolveContext):
+        return self._batch.entries
+
+
+class LakePermissionsBatch(core.Construct):
+    """Applies every Lake Formation grant of a stack through a single custom resource.
+
+    The handler diffs the grants against the previous deployment and the current Lake Formation state, and
+    applies the difference with BatchGrantPermissions and BatchRevokePermissions. It keeps the grants it made in
+    a ledger bucket and only ever revokes those, so permissions granted before the stack are left alone.
+
+    Lake Formation only lets administrators grant permissions, so `handler_role` is added to the data lake
+    administrators. The settings are appended to rather than replaced, which keeps the existing administrators.
+    """
+
+    def __init__(self, scope: core.Construct, id: str):
+        super().__init__(scope, id)
+        self.entries: List[Dict] = []
+
+        ledger_bucket = s3.Bucket(self, f'{id}.s3.ledger',
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            removal_policy=core.RemovalPolicy.DESTROY
+        )
+        handler = lambda_.Function(self, f'{id}.lambda.handler',
+            description='Applies the Lake Formation permissions of the stack in batches.',
+            runtime=LAMBDA_RUNTIME,
+            handler='index.on_event',
+            code=lambda_code('lake_permissions'),
+            timeout=core.Duration.minutes(15),
+            memory_size=256,
+            environment={'LEDGER_BUCKET': ledger_bucket.bucket_name}
+        )
+        ledger_bucket.grant_read_write(handler)
+        handler.add_to_role_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "lakeformation:BatchGrantPermissions",
+                    "lakeformation:BatchRevokePermissions",
+                    "lakeformation:ListPermissions",
+                    "glue:GetDatabase",
+                    "glue:GetTable",
+                ],
+                resources=["*"] # Resource type must be * for lake formation.
+            )
+        )
+        self.handler_role = handler.role
+
+        self.admin_settings = lf.CfnDataLakeSettings(self, f'{id}.lf.settings',
+            admins=[lf.CfnDataLakeSettings.DataLakePrincipalProperty(
+                data_lake_principal_identifier=self.handler_role.role_arn
+            )]
+        )
+        # Without it, the settings resource would replace the account's administrators with the handler role.
+        self.admin_settings.add_property_override('MutationType', 'APPEND')
+
+        provider = cr.Provider(self, f'{id}.provider',
+            on_event_handler=handler
+        )
+        self.resource = core.CustomResource(self, f'{id}.resource',
+            service_token=provider.service_token,
+            resource_type='Custom::LakePermissionsBatch',
+            properties={
+                'Entries': core.Lazy.any(_EntriesProducer(self), omit_empty_array=False),
+            }
+        )
+        self.resource.node.add_dependency(self.admin_settings)
+
+    @staticmethod
+    def of(scope: core.Construct) -> 'LakePermissionsBatch':
+        # One batch per stack, since a custom resource can only reference values of its own stack (or exports).
+        stack = core.Stack.of(scope)
+        id = 'lake-permissions-batch'
+        batch = stack.node.try_find_child(id)
+        if batch is None:
+            batch = LakePermissionsBatch(stack, id)
+        return batch
+
+    def add(self, principal_arn: str, resource: Dict, permissions: List[str]) -> core.CustomResource:
+        self.entries.append({
+            'Principal': {'DataLakePrincipalIdentifier': principal_arn},
+            'Resource': resource,
+            'Permissions': list(permissions),
+        })
+        return self.resource
@@ -0,0 +1,12 @@
+import os
+from aws_cdk import (
+    aws_lambda as lambda_,
+)
+
+LAMBDA_FUNCTIONS_PATH = os.path.join(os.path.dirname(__file__), 'lambda_functions')
+# The runtime enum of this CDK release stops at Python 3.9, which Lambda no longer supports.
+LAMBDA_RUNTIME = lambda_.Runtime('python3.12', lambda_.RuntimeFamily.PYTHON)
+
+
+def lambda_code(name: str) -> lambda_.Code:
+    return lambda_.Code.from_asset(os.path.join(LAMBDA_FUNCTIONS_PATH, name))
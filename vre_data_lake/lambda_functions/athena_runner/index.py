@@ -0,0 +1,220 @@
+"""Runs Athena statements for the data lake, from schedules and from custom resources.
+
+An operation is either `Execute`, which runs a list of statements in order, or `Materialize`, which keeps a
+table in sync with a query:
+
+- When the table does not exist, it is created with CTAS `WITH NO DATA` and then filled with INSERT INTO.
+- When the query changed, the table's columns are replaced by those of the new query, its data is deleted and
+  it is filled again. The table itself is never dropped, so the Lake Formation grants on it are kept.
+- On refresh with an incremental column, the partitions holding the largest value of that column are dropped
+  and recomputed, and only rows at or beyond that value are inserted. Without one, the table is refilled.
+
+Every statement but the last is waited for. The last one (usually the long running INSERT INTO) is returned,
+and custom resources wait for it in `is_complete`.
+
+Custom resources run their `Create` operation on creation, and on updates that change it, unless they have an
+`Update` operation to run instead. Updates that change the resource's `Immutable` properties fail.
+"""
+import json
+import time
+import uuid
+from urllib.parse import urlparse
+
+import boto3
+from botocore.exceptions import ClientError
+
+POLL_SECONDS = 2
+athena = boto3.client('athena')
+glue = boto3.client('glue')
+s3 = boto3.client('s3')
+
+
+def start(query: str, spec: dict) -> str:
+    kwargs = {'QueryString': query, 'WorkGroup': spec['Workgroup']}
+    if spec.get('Database'):
+        kwargs['QueryExecutionContext'] = {'Database': spec['Database']}
+    query_execution_id = athena.start_query_execution(**kwargs)['QueryExecutionId']
+    print(json.dumps({'QueryExecutionId': query_execution_id, 'Query': query}))
+    return query_execution_id
+
+
+def status(query_execution_id: str) -> str:
+    execution = athena.get_query_execution(QueryExecutionId=query_execution_id)['QueryExecution']
+    state = execution['Status']['State']
+    if state in ('FAILED', 'CANCELLED'):
+        raise RuntimeError(f"Query {query_execution_id} {state}: {execution['Status'].get('StateChangeReason')}")
+    return state
+
+
+def run(query: str, spec: dict) -> str:
+    query_execution_id = start(query, spec)
+    while status(query_execution_id) != 'SUCCEEDED':
+        time.sleep(POLL_SECONDS)
+    return query_execution_id
+
+
+def first_value(query_execution_id: str):
+    rows = athena.get_query_results(QueryExecutionId=query_execution_id, MaxResults=2)['ResultSet']['Rows']
+    if len(rows) < 2 or not rows[1]['Data'] or 'VarCharValue' not in rows[1]['Data'][0]:
+        return None
+    return rows[1]['Data'][0]['VarCharValue']
+
+
+def get_table(database: str, table: str):
+    try:
+        return glue.get_table(DatabaseName=database, Name=table)['Table']
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'EntityNotFoundException':
+            return None
+        raise
+
+
+def delete_prefix(location: str):
+    url = urlparse(location)
+    keys = []
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket=url.netloc, Prefix=url.path.lstrip('/')):
+        keys.extend(o['Key'] for o in page.get('Contents', []))
+    for i in range(0, len(keys), 1000):
+        s3.delete_objects(Bucket=url.netloc, Delete={'Objects': [{'Key': k} for k in keys[i:i + 1000]], 'Quiet': True})
+
+
+def delete_partitions(database: str, table: str, expression: str=''):
+    partitions = []
+    for page in glue.get_paginator('get_partitions').paginate(DatabaseName=database, TableName=table, Expression=expression):
+        partitions.extend(page['Partitions'])
+    for partition in partitions:
+        delete_prefix(partition['StorageDescriptor']['Location'])
+    for i in range(0, len(partitions), 25):
+        glue.batch_delete_partition(
+            DatabaseName=database,
+            TableName=table,
+            PartitionsToDelete=[{'Values': p['Values']} for p in partitions[i:i + 25]]
+        )
+
+
+def sql_literal(value: str, column_type: str) -> str:
+    column_type = column_type.lower()
+    if column_type in ('tinyint', 'smallint', 'int', 'integer', 'bigint', 'float', 'double') or column_type.startswith('decimal'):
+        return value
+    if column_type in ('date', 'timestamp'):
+        return f"{column_type.upper()} '{value}'"
+    return "'" + value.replace("'", "''") + "'"
+
+
+def glue_literal(value: str, column_type: str) -> str:
+    if column_type.lower() in ('tinyint', 'smallint', 'int', 'integer', 'bigint'):
+        return value
+    return "'" + value.replace("'", "''") + "'"
+
+
+def ctas(spec: dict, table: str, location: str) -> str:
+    properties = [
+        f"format = '{spec['Format']}'",
+        f"external_location = '{location}'",
+    ]
+    if spec.get('Compression'):
+        properties.append(f"write_compression = '{spec['Compression']}'")
+    if spec.get('PartitionedBy'):
+        properties.append('partitioned_by = ARRAY[' + ', '.join(f"'{c}'" for c in spec['PartitionedBy']) + ']')
+    for name, value in spec.get('TableProperties', {}).items():
+        properties.append(f"{name} = {value}")
+    return f'CREATE TABLE "{spec["Database"]}"."{table}" WITH ({", ".join(properties)}) AS {spec["Query"]} WITH NO DATA'
+
+
+def insert(spec: dict, where: str='') -> str:
+    return f'INSERT INTO "{spec["Database"]}"."{spec["Table"]}" SELECT * FROM ({spec["Query"]}){where}'
+
+
+def replace_schema(spec: dict, table: dict):
+    # The new query's schema is taken from a scratch table created next to the data, in a hidden directory.
+    suffix = uuid.uuid4().hex[:8]
+    scratch_name = f"{spec['Table']}_schema_{suffix}"
+    scratch_location = f"{spec['Location']}_schema_{suffix}/"
+    run(ctas(spec, scratch_name, scratch_location), spec)
+    try:
+        scratch = get_table(spec['Database'], scratch_name)
+        table_input = {k: v for k, v in table.items() if k in ('Name', 'Description', 'Owner', 'Retention', 'StorageDescriptor', 'PartitionKeys', 'TableType', 'Parameters')}
+        table_input['StorageDescriptor'] = {**table['StorageDescriptor'], 'Columns': scratch['StorageDescriptor']['Columns']}
+        table_input['PartitionKeys'] = scratch.get('PartitionKeys', [])
+        glue.update_table(DatabaseName=spec['Database'], TableInput=table_input)
+    finally:
+        glue.delete_table(DatabaseName=spec['Database'], Name=scratch_name)
+        delete_prefix(scratch_location)
+
+
+def materialize(spec: dict, changed: bool=False) -> str:
+    table = get_table(spec['Database'], spec['Table'])
+    if table is None:
+        delete_prefix(spec['Location'])
+        run(ctas(spec, spec['Table'], spec['Location']), spec)
+        return start(insert(spec), spec)
+    if changed:
+        replace_schema(spec, table)
+    column = spec.get('IncrementalColumn')
+    if changed or not column:
+        delete_partitions(spec['Database'], spec['Table'])
+        delete_prefix(spec['Location'])
+        return start(insert(spec), spec)
+
+    maximum = first_value(run(f'SELECT CAST(max("{column}") AS varchar) FROM "{spec["Database"]}"."{spec["Table"]}"', spec))
+    if maximum is None:
+        return start(insert(spec), spec)
+    column_type = next(c['Type'] for c in table['StorageDescriptor']['Columns'] + table.get('PartitionKeys', []) if c['Name'] == column)
+    if column in spec.get('PartitionedBy', []):
+        # The latest partitions may have been computed from partial data, so they are recomputed.
+        delete_partitions(spec['Database'], spec['Table'], f'{column} = {glue_literal(maximum, column_type)}')
+        return start(insert(spec, f' WHERE "{column}" >= {sql_literal(maximum, column_type)}'), spec)
+    return start(insert(spec, f' WHERE "{column}" > {sql_literal(maximum, column_type)}'), spec)
+
+
+def execute(spec: dict, changed: bool=False) -> str:
+    query_execution_id = None
+    for i, query in enumerate(spec['Queries']):
+        if i < len(spec['Queries']) - 1:
+            run(query, spec)
+        else:
+            query_execution_id = start(query, spec)
+    return query_execution_id
+
+
+OPERATIONS = {
+    'Materialize': materialize,
+    'Execute': execute,
+}
+
+
+def perform(operation: dict, changed: bool=False) -> str:
+    return OPERATIONS[operation['Action']](operation, changed=changed)
+
+
+def handler(event, context):
+    # Invoked by EventBridge schedules with the operation as the event.
+    return perform(event['Operation'])
+
+
+def on_event(event, context):
+    properties = event['ResourceProperties']
+    physical_resource_id = event.get('PhysicalResourceId') or properties.get('Id') or event['LogicalResourceId']
+    if event['RequestType'] == 'Delete':
+        query_execution_id = perform(properties['Delete']) if properties.get('Delete') else None
+    elif event['RequestType'] == 'Update':
+        old_properties = event['OldResourceProperties']
+        old_immutable = old_properties.get('Immutable')
+        immutable = properties.get('Immutable') or {}
+        if old_immutable is not None:
+            changed_keys = sorted(k for k in set(old_immutable) | set(immutable) if old_immutable.get(k) != immutable.get(k))
+            if changed_keys:
+                raise RuntimeError(f'{physical_resource_id} cannot change {changed_keys} in place.')
+        if all(old_properties.get(k) == properties.get(k) for k in ('Create', 'Update')):
+            return {'PhysicalResourceId': physical_resource_id}
+        query_execution_id = perform(properties.get('Update') or properties['Create'], changed=True)
+    else:
+        query_execution_id = perform(properties['Create'])
+    return {'PhysicalResourceId': physical_resource_id, 'Data': {'QueryExecutionId': query_execution_id or ''}}
+
+
+def is_complete(event, context):
+    query_execution_id = event.get('Data', {}).get('QueryExecutionId')
+    if not query_execution_id:
+        return {'IsComplete': True}
+    return {'IsComplete': status(query_execution_id) == 'SUCCEEDED'}
@@ -0,0 +1,100 @@
+"""Custom resource handler that seeds a bucket incrementally from one zipped asset per top level prefix.
+
+Prefixes whose asset is unchanged since the previous deployment are skipped without being downloaded. For
+the others, every file of the asset is hashed and only uploaded when the sha256 recorded in the metadata of
+the existing object differs. Uploads run in parallel and use multipart transfers for large files. Objects
+that are not part of the asset are deleted from prefixes that are pruned.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+
+HASH_METADATA_KEY = 'sha256'
+MAX_WORKERS = int(os.environ.get('MAX_WORKERS', '16'))
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=64 * 1024 * 1024,
+    multipart_chunksize=64 * 1024 * 1024,
+    max_concurrency=4,
+)
+
+
+def _key(prefix: str, name: str) -> str:
+    return f'{prefix}/{name}' if prefix else name
+
+
+def _file_hash(archive: zipfile.ZipFile, name: str) -> str:
+    digest = hashlib.sha256()
+    with archive.open(name) as fp:
+        for chunk in iter(lambda: fp.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _existing_hash(s3, bucket: str, key: str):
+    try:
+        return s3.head_object(Bucket=bucket, Key=key)['Metadata'].get(HASH_METADATA_KEY)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        raise
+
+
+def seed_prefix(s3, bucket: str, prefix: dict) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        archive_path = os.path.join(workdir, 'asset.zip')
+        s3.download_file(prefix['AssetBucket'], prefix['AssetKey'], archive_path, Config=TRANSFER_CONFIG)
+        with zipfile.ZipFile(archive_path) as archive:
+            names = [i.filename for i in archive.infolist() if not i.is_dir()]
+
+            def upload_if_changed(name):
+                key = _key(prefix['Prefix'], name)
+                file_hash = _file_hash(archive, name)
+                if _existing_hash(s3, bucket, key) == file_hash:
+                    return False
+                with archive.open(name) as fp:
+                    s3.upload_fileobj(fp, bucket, key,
+                        ExtraArgs={'Metadata': {HASH_METADATA_KEY: file_hash}},
+                        Config=TRANSFER_CONFIG
+                    )
+                return True
+
+            # ZipFile.open is safe to call from several threads for reading.
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                uploaded = sum(executor.map(upload_if_changed, names))
+
+    deleted = 0
+    if prefix.get('Prune') == 'true' and prefix['Prefix']:
+        keys = {_key(prefix['Prefix'], name) for name in names}
+        stale = []
+        for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=f"{prefix['Prefix']}/"):
+            stale.extend(o['Key'] for o in page.get('Contents', []) if o['Key'] not in keys)
+        for start in range(0, len(stale), 1000):
+            s3.delete_objects(Bucket=bucket, Delete={'Objects': [{'Key': k} for k in stale[start:start + 1000]], 'Quiet': True})
+        deleted = len(stale)
+    return {'Prefix': prefix['Prefix'], 'Files': len(names), 'Uploaded': uploaded, 'Deleted': deleted}
+
+
+def on_event(event, context, s3=None):
+    s3 = s3 or boto3.client('s3')
+    if event['RequestType'] == 'Delete':
+        # Like BucketDeployment with retain_on_delete, seeded objects are kept when the resource is removed.
+        return {'PhysicalResourceId': event['PhysicalResourceId']}
+
+    properties = event['ResourceProperties']
+    previous = {}
+    if event['RequestType'] == 'Update' and event['OldResourceProperties'].get('Bucket') == properties['Bucket']:
+        previous = {p['Prefix']: p for p in event['OldResourceProperties'].get('Prefixes', [])}
+
+    for prefix in properties.get('Prefixes', []):
+        if previous.get(prefix['Prefix']) == prefix:
+            print(json.dumps({'Prefix': prefix['Prefix'], 'Skipped': 'asset unchanged'}))
+            continue
+        print(json.dumps(seed_prefix(s3, properties['Bucket'], prefix)))
+    return {'PhysicalResourceId': event.get('PhysicalResourceId') or f"{properties['Bucket']}-seed"}
@@ -0,0 +1,207 @@
+"""Custom resource handler that applies a batch of Lake Formation permissions.
+
+The resource properties hold the desired `Entries`, each a principal, a resource and a list of permissions in
+the shape the Lake Formation API uses. On every event the handler diffs the desired entries against the
+previous ones and against the permissions currently granted, then applies only the difference with
+BatchGrantPermissions and BatchRevokePermissions, in chunks, retrying throttled calls and failed entries.
+
+Permissions that were already granted when they were first desired belong to someone else, so the grants the
+resource made itself are kept in a ledger object in the `LEDGER_BUCKET`, and only those are ever revoked.
+
+The Lake Formation client is passed to `LakePermissionsSync`, so the diffing and batching can be exercised
+against a local stub of the API. `LAKEFORMATION_ENDPOINT_URL` points the handler itself at a local endpoint.
+"""
+import json
+import os
+import random
+import time
+import uuid
+
+import boto3
+from botocore.exceptions import ClientError
+
+BATCH_SIZE = 20
+MAX_ATTEMPTS = 8
+RETRYABLE_ERRORS = {
+    'ThrottlingException',
+    'ConcurrentModificationException',
+    'InternalServiceException',
+    'OperationTimeoutException',
+}
+# Revoking permissions whose principal or resource no longer exists (e.g. a dropped table) is not an error.
+IGNORED_REVOKE_ERRORS = {'EntityNotFoundException', 'InvalidInputException'}
+
+
+def _key(principal: str, resource: dict) -> str:
+    return json.dumps([principal, resource], sort_keys=True)
+
+
+def flatten(entries):
+    """Turns entries into a set of (principal/resource key, permission) pairs."""
+    pairs = set()
+    for entry in entries or []:
+        key = _key(entry['Principal']['DataLakePrincipalIdentifier'], entry['Resource'])
+        for permission in entry['Permissions']:
+            pairs.add((key, permission))
+    return pairs
+
+
+def group(pairs):
+    """Turns (principal/resource key, permission) pairs back into API entries, one per principal and resource."""
+    grouped = {}
+    for key, permission in sorted(pairs):
+        grouped.setdefault(key, []).append(permission)
+    entries = []
+    for key, permissions in grouped.items():
+        principal, resource = json.loads(key)
+        entries.append({
+            'Id': uuid.uuid4().hex,
+            'Principal': {'DataLakePrincipalIdentifier': principal},
+            'Resource': resource,
+            'Permissions': permissions,
+        })
+    return entries
+
+
+class LakePermissionsSync:
+
+    def __init__(self, client, batch_size: int=BATCH_SIZE, max_attempts: int=MAX_ATTEMPTS, sleep=time.sleep):
+        self.client = client
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.sleep = sleep
+
+    def _backoff(self, attempt: int):
+        self.sleep(min(20.0, 0.2 * 2 ** attempt) * random.uniform(0.5, 1.0))
+
+    def _call(self, operation, **kwargs):
+        for attempt in range(self.max_attempts):
+            try:
+                return getattr(self.client, operation)(**kwargs)
+            except ClientError as e:
+                if e.response['Error']['Code'] not in RETRYABLE_ERRORS or attempt == self.max_attempts - 1:
+                    raise
+                self._backoff(attempt)
+
+    def current(self, entries):
+        """Returns the (principal/resource key, permission) pairs currently granted on the entries' resources."""
+        resources = {json.dumps(e['Resource'], sort_keys=True): e['Resource'] for e in entries or []}
+        principals = {e['Principal']['DataLakePrincipalIdentifier'] for e in entries or []}
+        pairs = set()
+        for resource in resources.values():
+            kwargs = {'Resource': resource}
+            while True:
+                try:
+                    response = self._call('list_permissions', **kwargs)
+                except ClientError as e:
+                    if e.response['Error']['Code'] in IGNORED_REVOKE_ERRORS:
+                        break
+                    raise
+                for grant in response.get('PrincipalResourcePermissions', []):
+                    principal = grant['Principal']['DataLakePrincipalIdentifier']
+                    if principal not in principals:
+                        continue
+                    # The listed resource may carry extra fields, so pairs are keyed by the resource that was asked for.
+                    for permission in grant.get('Permissions', []):
+                        pairs.add((_key(principal, resource), permission))
+                if not response.get('NextToken'):
+                    break
+                kwargs['NextToken'] = response['NextToken']
+        return pairs
+
+    def _apply(self, operation: str, pairs, ignored_errors=()):
+        entries = group(pairs)
+        for start in range(0, len(entries), self.batch_size):
+            pending = entries[start:start + self.batch_size]
+            for attempt in range(self.max_attempts):
+                response = self._call(operation, Entries=pending)
+                failed_ids = set()
+                for failure in response.get('Failures', []):
+                    code = failure.get('Error', {}).get('ErrorCode')
+                    if code in ignored_errors:
+                        continue
+                    if code not in RETRYABLE_ERRORS or attempt == self.max_attempts - 1:
+                        raise RuntimeError(f"{operation} failed for {json.dumps(failure['RequestEntry'])}: {failure.get('Error')}")
+                    failed_ids.add(failure['RequestEntry']['Id'])
+                pending = [e for e in pending if e['Id'] in failed_ids]
+                if not pending:
+                    break
+                self._backoff(attempt)
+
+    def plan(self, desired, previous=None, owned=None):
+        """Returns the pairs to grant so the desired entries hold, and to revoke so the previous ones that were
+        dropped don't. With `owned`, only those of the dropped pairs are revoked.
+        """
+        desired_pairs = flatten(desired)
+        dropped_pairs = flatten(previous) - desired_pairs
+        if owned is not None:
+            dropped_pairs &= owned
+        current_pairs = self.current(list(desired or []) + list(previous or []))
+        return desired_pairs - current_pairs, dropped_pairs & current_pairs
+
+    def apply(self, to_grant, to_revoke):
+        self._apply('batch_revoke_permissions', to_revoke, ignored_errors=IGNORED_REVOKE_ERRORS)
+        self._apply('batch_grant_permissions', to_grant)
+
+    def sync(self, desired, previous=None, owned=None):
+        """Plans and applies the grants and revokes of the desired and previous entries.
+
+        Returns the number of (principal, resource, permission) grants and revokes that were applied.
+        """
+        to_grant, to_revoke = self.plan(desired, previous, owned)
+        self.apply(to_grant, to_revoke)
+        return len(to_grant), len(to_revoke)
+
+
+class Ledger:
+    """The (principal/resource key, permission) pairs a resource granted, kept as a JSON object in S3."""
+
+    def __init__(self, client, bucket: str, key: str):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+
+    def read(self):
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=self.key)['Body'].read()
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchKey':
+                return set()
+            raise
+        return {tuple(pair) for pair in json.loads(body)}
+
+    def write(self, pairs):
+        if not pairs:
+            self.client.delete_object(Bucket=self.bucket, Key=self.key)
+            return
+        self.client.put_object(Bucket=self.bucket, Key=self.key, Body=json.dumps(sorted(pairs)).encode())
+
+
+def client():
+    return boto3.client('lakeformation', endpoint_url=os.environ.get('LAKEFORMATION_ENDPOINT_URL'))
+
+
+def on_event(event, context, lakeformation=None, ledger=None):
+    sync = LakePermissionsSync(lakeformation or client())
+    physical_id = event.get('PhysicalResourceId') or event['LogicalResourceId']
+    ledger = ledger or Ledger(boto3.client('s3'), os.environ['LEDGER_BUCKET'], f'{physical_id}.json')
+    entries = event['ResourceProperties'].get('Entries', [])
+    request_type = event['RequestType']
+    if request_type == 'Create':
+        desired, previous = entries, []
+    elif request_type == 'Update':
+        desired, previous = entries, event['OldResourceProperties'].get('Entries', [])
+    else:
+        desired, previous = [], entries
+    owned = ledger.read()
+    to_grant, to_revoke = sync.plan(desired, previous, owned)
+    # Recorded before granting, so grants of a run that fails half way are still revoked later.
+    ledger.write(owned | to_grant)
+    sync.apply(to_grant, to_revoke)
+    ledger.write((owned | to_grant) & flatten(desired))
+    granted, revoked = len(to_grant), len(to_revoke)
+    print(json.dumps({'RequestType': request_type, 'Entries': len(entries), 'Granted': granted, 'Revoked': revoked}))
+    return {
+        'PhysicalResourceId': physical_id,
+        'Data': {'Granted': str(granted), 'Revoked': str(revoked)},
+    }
@@ -0,0 +1,384 @@
+"""Queries local copies of the lake's sample data with DuckDB, using the Glue tables of the synthesized templates.
+
+Each Glue table of the templates becomes a view named like its Athena table ("database"."table") over the files
+under the table's location, taken from the local directory given for its zone. Partitioned tables are read with
+hive partitioning, so filters on partition columns skip whole directories as partition projection does in
+Athena. Every query reports the bytes and files it read, to compare schema, format and partitioning choices
+before they are deployed.
+
+    cdk synth
+    python -m vre_data_lake.local_query cdk.out --sample-data lake_raw=sample_data/raw \\
+        'SELECT count(*) FROM "lake_raw"."example_data" WHERE year = 2021'
+
+DuckDB and fsspec are optional dependencies (pip install vre_data_lake[local]).
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, List, Optional
+
+PROTOCOL = 'lakelocal'
+
+# https://docs.aws.amazon.com/athena/latest/ug/data-types.html
+_DUCKDB_TYPES = {
+    'boolean': 'BOOLEAN',
+    'tinyint': 'TINYINT',
+    'smallint': 'SMALLINT',
+    'int': 'INTEGER',
+    'integer': 'INTEGER',
+    'bigint': 'BIGINT',
+    'float': 'FLOAT',
+    'double': 'DOUBLE',
+    'string': 'VARCHAR',
+    'date': 'DATE',
+    'timestamp': 'TIMESTAMP',
+    'binary': 'BLOB',
+}
+_PARQUET_SERDE = 'org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe'
+_CSV_SERDES = ('org.apache.hadoop.hive.serde2.lazy.LazySimpleSerDe', 'org.apache.hadoop.hive.serde2.OpenCSVSerde')
+_JSON_SERDES = ('org.openx.data.jsonserde.JsonSerDe', 'org.apache.hive.hcatalog.data.JsonSerDe')
+
+
+def duckdb_type(hive_type: str) -> str:
+    hive_type = hive_type.strip().lower()
+    if hive_type in _DUCKDB_TYPES:
+        return _DUCKDB_TYPES[hive_type]
+    if hive_type.startswith('decimal'):
+        return hive_type.upper()
+    if hive_type.startswith(('varchar', 'char')):
+        return 'VARCHAR'
+    # Complex types are left to DuckDB's own detection.
+    return None
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+class _Template:
+    """Resolves the intrinsic functions used by the lake's templates to the values they have at synthesis."""
+
+    def __init__(self, template: dict, exports: Dict[str, tuple]):
+        self.resources = template.get('Resources', {})
+        self.exports = exports
+
+    def resolve(self, value):
+        if isinstance(value, (str, int, float, bool)) or value is None:
+            return value
+        if isinstance(value, list):
+            return [self.resolve(v) for v in value]
+        if 'Ref' in value:
+            resource = self.resources.get(value['Ref'], {})
+            properties = resource.get('Properties', {})
+            if resource.get('Type') == 'AWS::Glue::Database':
+                return properties['DatabaseInput']['Name']
+            if resource.get('Type') == 'AWS::S3::Bucket':
+                return properties.get('BucketName')
+            return None
+        if 'Fn::Join' in value:
+            separator, parts = value['Fn::Join']
+            parts = [self.resolve(p) for p in parts]
+            return None if any(p is None for p in parts) else separator.join(str(p) for p in parts)
+        if 'Fn::ImportValue' in value:
+            template, exported = self.exports.get(self.resolve(value['Fn::ImportValue']), (None, None))
+            return template.resolve(exported) if template is not None else None
+        return {k: self.resolve(v) for k, v in value.items()}
+
+
+class CatalogTable:
+    """A Glue table of a synthesized template."""
+
+    def __init__(self, database: str, table_input: dict):
+        storage_descriptor = table_input.get('StorageDescriptor', {})
+        self.database = database
+        self.name = table_input['Name']
+        self.location = storage_descriptor.get('Location', '')
+        self.columns = [(c['Name'], c['Type']) for c in storage_descriptor.get('Columns', [])]
+        self.partition_keys = [(c['Name'], c['Type']) for c in table_input.get('PartitionKeys', [])]
+        serde_info = storage_descriptor.get('SerdeInfo', {})
+        self.serialization_library = serde_info.get('SerializationLibrary')
+        self.serde_parameters = serde_info.get('Parameters', {})
+        self.parameters = table_input.get('Parameters', {})
+
+    @property
+    def qualified_name(self) -> str:
+        return f'{_quote(self.database)}.{_quote(self.name)}'
+
+    @property
+    def storage_location_template(self) -> Optional[str]:
+        template = self.parameters.get('storage.location.template')
+        if not template:
+            return None
+        return template[len(self.location):] if template.startswith(self.location) else template
+
+    def hive_partitioned(self) -> bool:
+        template = self.storage_location_template
+        if template is None:
+            return True
+        expected = '/'.join(f'{k}=${{{k}}}' for k, _ in self.partition_keys)
+        return template.strip('/') == expected
+
+
+def _parse_templates(templates: List[dict]) -> List[_Template]:
+    # Exports are shared, so references across the stacks of a sharded lake resolve.
+    exports = {}
+    parsed = []
+    for template in templates:
+        parsed_template = _Template(template, exports)
+        parsed.append(parsed_template)
+        for output in template.get('Outputs', {}).values():
+            if 'Export' in output:
+                exports[parsed_template.resolve(output['Export']['Name'])] = (parsed_template, output['Value'])
+    return parsed
+
+
+def load_catalog(templates: List[dict]) -> List[CatalogTable]:
+    """Returns the Glue tables of the templates."""
+    tables = []
+    for template in _parse_templates(templates):
+        for resource in template.resources.values():
+            if resource.get('Type') != 'AWS::Glue::Table':
+                continue
+            properties = template.resolve(resource['Properties'])
+            if properties.get('DatabaseName') is None or properties['TableInput'].get('TableType') == 'VIRTUAL_VIEW':
+                continue
+            tables.append(CatalogTable(properties['DatabaseName'], properties['TableInput']))
+    return tables
+
+
+def load_views(templates: List[dict]) -> List[tuple]:
+    # Materialized aggregates are queried as views over their source tables.
+    views = []
+    for template in _parse_templates(templates):
+        for resource in template.resources.values():
+            if resource.get('Type') != 'Custom::MaterializedAggregate':
+                continue
+            operation = template.resolve(resource['Properties']['Create'])
+            if operation.get('Database') is not None:
+                views.append((operation['Database'], operation['Table'], operation['Query']))
+    return views
+
+
+def load_templates(path: str) -> List[dict]:
+    """Loads a template file, or every template of a cloud assembly directory (e.g. cdk.out)."""
+    paths = [path] if os.path.isfile(path) else sorted(glob.glob(os.path.join(path, '*.template.json')))
+    templates = []
+    for template_path in paths:
+        with open(template_path) as fp:
+            templates.append(json.load(fp))
+    return templates
+
+
+def _counting_filesystem():
+    from fsspec.implementations.local import LocalFileSystem
+
+    class _CountingFile:
+
+        def __init__(self, f, filesystem):
+            self._f = f
+            self._filesystem = filesystem
+
+        def read(self, *args, **kwargs):
+            data = self._f.read(*args, **kwargs)
+            self._filesystem.bytes_read += len(data)
+            return data
+
+        def readinto(self, buffer):
+            n = self._f.readinto(buffer)
+            self._filesystem.bytes_read += n or 0
+            return n
+
+        def __getattr__(self, name):
+            return getattr(self._f, name)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            self._f.close()
+
+    class CountingFileSystem(LocalFileSystem):
+        """A local filesystem that counts what DuckDB reads and, like Athena, skips files and
+        directories whose names start with `_` or `.`."""
+
+        protocol = PROTOCOL
+        root_marker = '/'
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.bytes_read = 0
+            self.files_opened = set()
+
+        @classmethod
+        def _strip_protocol(cls, path):
+            path = path[len(PROTOCOL) + 3:] if path.startswith(f'{PROTOCOL}://') else path
+            return super()._strip_protocol(path)
+
+        def glob(self, path, **kwargs):
+            return [
+                f'{PROTOCOL}://{p}' if not p.startswith(f'{PROTOCOL}://') else p
+                for p in super().glob(path, **kwargs)
+                if not any(part.startswith(('_', '.')) for part in self._strip_protocol(p).split('/'))
+                and not self.isdir(p)
+            ]
+
+        def _open(self, path, mode='rb', **kwargs):
+            self.files_opened.add(self._strip_protocol(path))
+            return _CountingFile(super()._open(path, mode=mode, **kwargs), self)
+
+    return CountingFileSystem(skip_instance_cache=True)
+
+
+class QueryReport:
+
+    def __init__(self, sql: str, columns: List[str], rows: List[tuple], seconds: float, bytes_scanned: int, files_scanned: int):
+        self.sql = sql
+        self.columns = columns
+        self.rows = rows
+        self.seconds = seconds
+        self.bytes_scanned = bytes_scanned
+        self.files_scanned = files_scanned
+
+    def summary(self) -> dict:
+        return {
+            'rows': len(self.rows),
+            'seconds': round(self.seconds, 4),
+            'bytes_scanned': self.bytes_scanned,
+            'files_scanned': self.files_scanned,
+        }
+
+
+class LocalLake:
+    """An in-memory DuckDB database with a view for every table of the templates that has local data.
+
+    `sample_data` maps zone names (the Glue database names) to local directories laid out like the zone's
+    bucket, which is what a zone's `sample_data_path` is.
+    """
+
+    def __init__(self, templates: List[dict], sample_data: Dict[str, str]):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError('Local queries need the optional dependencies: pip install vre_data_lake[local]') from e
+
+        self.filesystem = _counting_filesystem()
+        self.connection = duckdb.connect()
+        self.connection.register_filesystem(self.filesystem)
+        self.tables: Dict[str, CatalogTable] = {}
+        for table in load_catalog(templates):
+            if table.database not in sample_data:
+                continue
+            directory = os.path.abspath(os.path.join(sample_data[table.database], self._relative_location(table)))
+            self._create_schema(table.database)
+            self.connection.execute(f'CREATE VIEW {table.qualified_name} AS {self._scan(table, directory)}')
+            self.tables[f'{table.database}.{table.name}'] = table
+        for database, name, query in load_views(templates):
+            self._create_schema(database)
+            try:
+                self.connection.execute(f'CREATE VIEW {_quote(database)}.{_quote(name)} AS {query}')
+            except duckdb.Error as e:
+                print(f'Skipping the aggregate {database}.{name}: {e}', file=sys.stderr)
+
+    def _create_schema(self, database: str):
+        self.connection.execute(f'CREATE SCHEMA IF NOT EXISTS {_quote(database)}')
+
+    @staticmethod
+    def _relative_location(table: CatalogTable) -> str:
+        match = re.match('s3://[^/]+/?(.*)', table.location)
+        if match is None:
+            raise AttributeError(f'The location of the table {table.database}.{table.name} could not be resolved: {table.location}')
+        return match.group(1)
+
+    def _scan(self, table: CatalogTable, directory: str) -> str:
+        files = _literal(f'{PROTOCOL}://{directory}/**')
+        options = []
+        partition_columns = []
+        if table.partition_keys and table.hive_partitioned():
+            options.append('hive_partitioning = true')
+            hive_types = ', '.join(f'{_literal(k)}: {_literal(duckdb_type(t) or "VARCHAR")}' for k, t in table.partition_keys)
+            options.append(f'hive_types = {{{hive_types}}}')
+        else:
+            options.append('hive_partitioning = false')
+            if table.partition_keys:
+                # Custom storage location templates are matched against the file names, after the files are listed.
+                options.append('filename = true')
+                pattern = re.escape(table.storage_location_template.strip('/'))
+                for key, _ in table.partition_keys:
+                    pattern = pattern.replace(re.escape(f'${{{key}}}'), '([^/]+)')
+                pattern = f'{re.escape(directory)}/{pattern}/[^/]+$'
+                for i, (key, key_type) in enumerate(table.partition_keys, start=1):
+                    extracted = f"regexp_extract(filename, {_literal(pattern)}, {i})"
+                    partition_columns.append(f'CAST({extracted} AS {duckdb_type(key_type) or "VARCHAR"}) AS {_quote(key)}')
+
+        library = table.serialization_library
+        typed_columns = {k: duckdb_type(t) for k, t in table.columns}
+        if library == _PARQUET_SERDE:
+            reader = 'read_parquet'
+        elif library in _CSV_SERDES:
+            reader = 'read_csv'
+            delimiter = table.serde_parameters.get('field.delim', table.serde_parameters.get('separatorChar', ','))
+            options.append(f'delim = {_literal(delimiter)}')
+            options.append(f"header = {'true' if table.parameters.get('skip.header.line.count', '0') != '0' else 'false'}")
+            if table.columns and all(typed_columns.values()):
+                options.append('columns = {' + ', '.join(f'{_literal(k)}: {_literal(v)}' for k, v in typed_columns.items()) + '}')
+        elif library in _JSON_SERDES:
+            reader = 'read_json'
+            options.append("format = 'newline_delimited'")
+            if table.columns and all(typed_columns.values()):
+                options.append('columns = {' + ', '.join(f'{_literal(k)}: {_literal(v)}' for k, v in typed_columns.items()) + '}')
+        else:
+            raise AttributeError(f'The table {table.database}.{table.name} has a SerDe that cannot be read locally: {library}')
+
+        select = ', '.join(['*'] + partition_columns) if not partition_columns else f"* EXCLUDE (filename), {', '.join(partition_columns)}"
+        return f'SELECT {select} FROM {reader}({files}, {", ".join(options)})'
+
+    def query(self, sql: str) -> QueryReport:
+        self.filesystem.bytes_read = 0
+        self.filesystem.files_opened = set()
+        started = time.perf_counter()
+        cursor = self.connection.execute(sql)
+        rows = cursor.fetchall()
+        seconds = time.perf_counter() - started
+        columns = [d[0] for d in cursor.description or []]
+        return QueryReport(sql, columns, rows, seconds, self.filesystem.bytes_read, len(self.filesystem.files_opened))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('templates', help='A synthesized template, or a cloud assembly directory such as cdk.out.')
+    parser.add_argument('sql', nargs='+', help='The queries to run, in Athena syntax.')
+    parser.add_argument('--sample-data', action='append', default=[], metavar='ZONE=PATH',
+        help='The local directory with the data of a zone. Repeat for each zone.')
+    parser.add_argument('--output', help='Write the reports to this JSON file.')
+    args = parser.parse_args()
+
+    sample_data = {}
+    for mapping in args.sample_data:
+        zone_name, _, path = mapping.partition('=')
+        sample_data[zone_name] = path
+    lake = LocalLake(load_templates(args.templates), sample_data)
+    reports = []
+    for sql in args.sql:
+        report = lake.query(sql)
+        print(sql)
+        print(report.columns)
+        for row in report.rows[:20]:
+            print(row)
+        print(json.dumps(report.summary()))
+        reports.append({'sql': sql, **report.summary()})
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(reports, fp, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
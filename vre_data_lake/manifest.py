@@ -0,0 +1,392 @@
+import hashlib
+import inspect
+import json
+import os
+from typing import Any, Dict, List, Optional
+import yaml
+from aws_cdk import (
+    core,
+    aws_s3 as s3,
+    aws_glue as glue,
+    aws_iam as iam,
+)
+from vre_data_lake.dataset import Dataset
+from vre_data_lake.filetype import Compression, Filetype, TableFormat
+from vre_data_lake.lake_permissions import LakePermissionsMode
+from vre_data_lake.monitoring import MonitoringProfile
+from vre_data_lake.partition import DatePartitionKey, EnumPartitionKey, InjectedPartitionKey, IntegerPartitionKey
+from vre_data_lake.role import Role
+from vre_data_lake.schema import Column, Schema, SortColumn
+from vre_data_lake.seeding import SeedingMode
+from vre_data_lake.sharding import StackSharder
+from vre_data_lake.zone import CrawlMode, DatabasePermission, SchemaDeleteBehavior, SchemaUpdateBehavior, TablePermission, Zone
+
+
+_PARTITION_KEY_TYPES = {
+    'date': DatePartitionKey,
+    'integer': IntegerPartitionKey,
+    'enum': EnumPartitionKey,
+    'injected': InjectedPartitionKey,
+}
+
+_DATASET_KEYS = {
+    's3_prefix', 'description', 'filetype', 'lifecycle_rules', 'grants', 'crawler_schedule', 'crawl_mode',
+    'partition_keys', 'storage_location_template', 'schema', 'schema_file', 'compaction_schedule',
+    'compaction_target_file_size_mb', 'sample_data_prune', 'streaming_enabled', 'streaming_buffering_size_mb',
+    'streaming_buffering_interval_seconds', 'streaming_partition_key_queries', 'statistics_enabled',
+    'statistics_schedule', 'bucket_columns', 'number_of_buckets', 'sort_columns', 'compression',
+    'allow_unsplittable_compression', 'table_format', 'iceberg_partitioning', 'iceberg_optimize_schedule',
+    'iceberg_vacuum_schedule', 'iceberg_snapshot_retention_days', 'iceberg_removal_policy', 'crawler_exclusions',
+    'crawler_sample_size', 'crawler_update_behavior', 'crawler_delete_behavior', 'crawler_enabled',
+    'compaction_closed_after_hours',
+}
+
+
+def _check_keys(document: dict, allowed: set, path: str):
+    if not isinstance(document, dict):
+        raise AttributeError(f'{path} must be a mapping.')
+    unknown = sorted(set(document) - allowed)
+    if unknown:
+        raise AttributeError(f'{path} has unknown keys {unknown}. Allowed keys are {sorted(allowed)}')
+
+
+def _check_arguments(document: dict, cls: type, path: str, renamed: Optional[Dict[str, str]]=None):
+    # For mappings passed as keyword arguments, so a typo is reported with its path rather than as a TypeError.
+    renamed = renamed or {}
+    parameters = {renamed.get(p.name, p.name): p for p in list(inspect.signature(cls.__init__).parameters.values())[1:]}
+    _check_keys(document, set(parameters), path)
+    missing = [name for name, p in parameters.items() if p.default is inspect.Parameter.empty and name not in document]
+    if missing:
+        raise AttributeError(f'{path} is missing the keys {missing}')
+
+
+def _enum_value(enum, name: str, path: str):
+    try:
+        return enum[name]
+    except KeyError:
+        raise AttributeError(f'{path} must be one of {[e.name for e in enum]}. value given was {name}')
+
+
+class Manifest:
+    """A parsed and validated manifest of zones, datasets, and the lifecycle rules and grants they share.
+
+    Lifecycle rules and grants are declared once by name and referenced from any number of datasets, so
+    each distinct rule set and grant set is built once no matter how many datasets use it.
+    """
+
+    def __init__(self, document: Dict[str, Any], base_path: str='.'):
+        _check_keys(document, {'lifecycle_rules', 'grants', 'zones'}, 'manifest')
+        self.base_path = base_path
+        self.lifecycle_rules = {
+            name: [self._parse_lifecycle_rule(r, f'lifecycle_rules.{name}[{i}]') for i, r in enumerate(rules)]
+            for name, rules in (document.get('lifecycle_rules') or {}).items()
+        }
+        self.grants = {
+            name: [self._parse_grant(g, f'grants.{name}[{i}]') for i, g in enumerate(grants)]
+            for name, grants in (document.get('grants') or {}).items()
+        }
+        self.zones = [self._parse_zone(z, f'zones[{i}]') for i, z in enumerate(document.get('zones') or [])]
+
+        zone_names = [z['name'] for z in self.zones]
+        duplicates = sorted({n for n in zone_names if zone_names.count(n) > 1})
+        if duplicates:
+            raise AttributeError(f'Zone names must be unique. Duplicated names were {duplicates}')
+
+    @property
+    def role_names(self) -> List[str]:
+        names = {g['role'] for grants in self.grants.values() for g in grants}
+        names.update(g['role'] for z in self.zones for g in z['database_grants'])
+        return sorted(names)
+
+    @staticmethod
+    def _parse_lifecycle_rule(rule: dict, path: str) -> dict:
+        _check_keys(rule, {
+            'enabled', 'expiration_days', 'transitions', 'noncurrent_version_expiration_days',
+            'abort_incomplete_multipart_upload_days',
+        }, path)
+        for i, transition in enumerate(rule.get('transitions') or []):
+            _check_keys(transition, {'storage_class', 'days'}, f'{path}.transitions[{i}]')
+            if not isinstance(transition.get('storage_class'), str) or not hasattr(s3.StorageClass, transition['storage_class']):
+                raise AttributeError(f'{path}.transitions[{i}].storage_class is not a known S3 storage class. value given was {transition.get("storage_class")}')
+        return rule
+
+    @staticmethod
+    def _parse_grant(grant: dict, path: str) -> dict:
+        _check_keys(grant, {'role', 'table_permissions'}, path)
+        if not grant.get('role'):
+            raise AttributeError(f'{path}.role is required.')
+        return {
+            'role': grant['role'],
+            'table_permissions': [
+                _enum_value(TablePermission, p, f'{path}.table_permissions') for p in grant.get('table_permissions') or []
+            ],
+        }
+
+    def _parse_zone(self, zone: dict, path: str) -> dict:
+        _check_keys(zone, {'name', 'zone_name', 'sample_data_path', 'seeding_mode', 'lake_permissions_mode', 'database_grants', 'datasets', 'monitoring', 'inventory'}, path)
+        for key in ('name', 'zone_name'):
+            if not zone.get(key):
+                raise AttributeError(f'{path}.{key} is required.')
+        database_grants = []
+        for i, grant in enumerate(zone.get('database_grants') or []):
+            _check_keys(grant, {'role', 'database_permissions'}, f'{path}.database_grants[{i}]')
+            database_grants.append({
+                'role': grant['role'],
+                'database_permissions': [
+                    _enum_value(DatabasePermission, p, f'{path}.database_grants[{i}].database_permissions')
+                    for p in grant.get('database_permissions') or []
+                ],
+            })
+        datasets = [self._parse_dataset(d, f'{path}.datasets[{i}]') for i, d in enumerate(zone.get('datasets') or [])]
+        prefixes = [d['s3_prefix'] for d in datasets]
+        duplicates = sorted({p for p in prefixes if prefixes.count(p) > 1})
+        if duplicates:
+            raise AttributeError(f'{path} has duplicated dataset prefixes {duplicates}')
+        return {
+            'name': zone['name'],
+            'zone_name': zone['zone_name'],
+            'sample_data_path': zone.get('sample_data_path'),
+            'seeding_mode': _enum_value(SeedingMode, zone.get('seeding_mode', 'FULL'), f'{path}.seeding_mode'),
+            'lake_permissions_mode': _enum_value(LakePermissionsMode, zone.get('lake_permissions_mode', 'INDIVIDUAL'), f'{path}.lake_permissions_mode'),
+            'database_grants': database_grants,
+            'datasets': datasets,
+            'monitoring_profile': self._monitoring_profile(zone.get('monitoring'), f'{path}.monitoring'),
+            **self._inventory(zone.get('inventory'), f'{path}.inventory'),
+        }
+
+    @staticmethod
+    def _inventory(inventory, path: str) -> dict:
+        # Either true for the default retention, or a mapping with the retention_days of the inventory files.
+        if inventory is True:
+            inventory = {}
+        _check_keys(inventory or {}, {'retention_days'}, path)
+        return {
+            'inventory_enabled': inventory is not None and inventory is not False,
+            'inventory_retention': core.Duration.days((inventory or {}).get('retention_days', 30)),
+        }
+
+    @staticmethod
+    def _monitoring_profile(monitoring, path: str) -> Optional[MonitoringProfile]:
+        # Either true for the default thresholds, or a mapping of thresholds where null disables an alarm.
+        if not monitoring:
+            return None
+        if monitoring is True:
+            return MonitoringProfile()
+        _check_keys(monitoring, {'server_errors_per_5_minutes', 'query_latency_p90_seconds', 'processed_bytes_per_hour'}, path)
+        defaults = MonitoringProfile()
+        latency = monitoring.get('query_latency_p90_seconds', int(defaults.query_latency_p90.to_seconds()))
+        return MonitoringProfile(
+            server_errors_per_5_minutes=monitoring.get('server_errors_per_5_minutes', defaults.server_errors_per_5_minutes),
+            query_latency_p90=core.Duration.seconds(latency) if latency is not None else None,
+            processed_bytes_per_hour=monitoring.get('processed_bytes_per_hour', defaults.processed_bytes_per_hour)
+        )
+
+    def _parse_dataset(self, dataset: dict, path: str) -> dict:
+        _check_keys(dataset, _DATASET_KEYS, path)
+        for key in ('s3_prefix', 'description', 'filetype'):
+            if not dataset.get(key):
+                raise AttributeError(f'{path}.{key} is required.')
+        lifecycle_rules = dataset.get('lifecycle_rules')
+        if lifecycle_rules is not None and lifecycle_rules not in self.lifecycle_rules:
+            raise AttributeError(f'{path}.lifecycle_rules refers to an undeclared rule set {lifecycle_rules}')
+        grants = dataset.get('grants') or []
+        if isinstance(grants, str):
+            grants = [grants]
+        for grant in grants:
+            if grant not in self.grants:
+                raise AttributeError(f'{path}.grants refers to an undeclared grant set {grant}')
+        if dataset.get('schema') and dataset.get('schema_file'):
+            raise AttributeError(f'{path} must declare only one of schema and schema_file.')
+
+        partition_keys = []
+        for i, key in enumerate(dataset.get('partition_keys') or []):
+            key = dict(key)
+            key_type = key.pop('type', None)
+            if key_type not in _PARTITION_KEY_TYPES:
+                raise AttributeError(f'{path}.partition_keys[{i}].type must be one of {sorted(_PARTITION_KEY_TYPES)}. value given was {key_type}')
+            # `type` is the kind of partition key, so the column type is given as `column_type`.
+            _check_arguments(key, _PARTITION_KEY_TYPES[key_type], f'{path}.partition_keys[{i}]', renamed={'type': 'column_type'})
+            if 'column_type' in key:
+                key['type'] = key.pop('column_type')
+            partition_keys.append(_PARTITION_KEY_TYPES[key_type](**key))
+
+        schema = None
+        if dataset.get('schema'):
+            for i, column in enumerate(dataset['schema']):
+                _check_arguments(column, Column, f'{path}.schema[{i}]')
+            schema = Schema(columns=[Column(**c) for c in dataset['schema']])
+        elif dataset.get('schema_file'):
+            schema_file = os.path.join(self.base_path, dataset['schema_file'])
+            if schema_file.endswith(('.avsc', '.avro')):
+                schema = Schema.from_avro_file(schema_file)
+            else:
+                schema = Schema.from_json_file(schema_file)
+
+        sort_columns = []
+        for i, column in enumerate(dataset.get('sort_columns') or []):
+            # Either a column name, or {name: ..., ascending: false}.
+            if isinstance(column, str):
+                column = {'name': column}
+            _check_keys(column, {'name', 'ascending'}, f'{path}.sort_columns[{i}]')
+            sort_columns.append(SortColumn(**column))
+
+        return {
+            's3_prefix': dataset['s3_prefix'],
+            'description': dataset['description'],
+            'filetype': _enum_value(Filetype, dataset['filetype'], f'{path}.filetype'),
+            'lifecycle_rules': lifecycle_rules,
+            'grants': grants,
+            'crawler_enabled': dataset.get('crawler_enabled'),
+            'crawler_schedule': dataset.get('crawler_schedule'),
+            'crawl_mode': _enum_value(CrawlMode, dataset.get('crawl_mode', 'FULL'), f'{path}.crawl_mode'),
+            'crawler_exclusions': dataset.get('crawler_exclusions'),
+            'crawler_sample_size': dataset.get('crawler_sample_size'),
+            'crawler_update_behavior': _enum_value(SchemaUpdateBehavior, dataset['crawler_update_behavior'], f'{path}.crawler_update_behavior') if dataset.get('crawler_update_behavior') else None,
+            'crawler_delete_behavior': _enum_value(SchemaDeleteBehavior, dataset['crawler_delete_behavior'], f'{path}.crawler_delete_behavior') if dataset.get('crawler_delete_behavior') else None,
+            'partition_keys': partition_keys,
+            'storage_location_template': dataset.get('storage_location_template'),
+            'schema': schema,
+            'compaction_schedule': dataset.get('compaction_schedule'),
+            'compaction_target_file_size_mb': int(dataset.get('compaction_target_file_size_mb', 128)),
+            'compaction_closed_after': core.Duration.hours(int(dataset.get('compaction_closed_after_hours', 24))),
+            'sample_data_prune': dataset.get('sample_data_prune'),
+            'streaming_enabled': bool(dataset.get('streaming_enabled', False)),
+            'streaming_buffering_size_mb': int(dataset.get('streaming_buffering_size_mb', 128)),
+            'streaming_buffering_interval': core.Duration.seconds(int(dataset.get('streaming_buffering_interval_seconds', 300))),
+            'streaming_partition_key_queries': dataset.get('streaming_partition_key_queries'),
+            'statistics_enabled': bool(dataset.get('statistics_enabled', False)),
+            'statistics_schedule': dataset.get('statistics_schedule'),
+            'bucket_columns': dataset.get('bucket_columns'),
+            'number_of_buckets': dataset.get('number_of_buckets'),
+            'sort_columns': sort_columns,
+            'compression': _enum_value(Compression, dataset['compression'], f'{path}.compression') if dataset.get('compression') else None,
+            'allow_unsplittable_compression': bool(dataset.get('allow_unsplittable_compression', False)),
+            'table_format': _enum_value(TableFormat, dataset.get('table_format', 'HIVE'), f'{path}.table_format'),
+            'iceberg_partitioning': dataset.get('iceberg_partitioning'),
+            'iceberg_optimize_schedule': dataset.get('iceberg_optimize_schedule', 'cron(0 2 * * ? *)'),
+            'iceberg_vacuum_schedule': dataset.get('iceberg_vacuum_schedule', 'cron(0 4 * * ? *)'),
+            'iceberg_snapshot_retention': core.Duration.days(int(dataset.get('iceberg_snapshot_retention_days', 5))),
+            'iceberg_removal_policy': _enum_value(core.RemovalPolicy, dataset.get('iceberg_removal_policy', 'RETAIN'), f'{path}.iceberg_removal_policy'),
+        }
+
+
+_MANIFEST_CACHE: Dict[str, Manifest] = {}
+
+
+def load_manifest(path: str) -> Manifest:
+    # Parsed manifests are cached by path and content hash, so loading the same manifest again (e.g. from several
+    # stacks in one app) neither re-parses nor re-validates it. The path is part of the key since schema files are
+    # resolved relative to it.
+    path = os.path.abspath(path)
+    with open(path, 'rb') as fp:
+        content = fp.read()
+    key = f'{path}:{hashlib.sha256(content).hexdigest()}'
+    if key not in _MANIFEST_CACHE:
+        if path.endswith('.json'):
+            document = json.loads(content)
+        else:
+            document = yaml.safe_load(content)
+        _MANIFEST_CACHE[key] = Manifest(document or {}, base_path=os.path.dirname(path))
+    return _MANIFEST_CACHE[key]
+
+
+class ManifestLake:
+    """Builds the zones and datasets of a manifest through Zone and Dataset."""
+
+    def __init__(self, scope: core.Stack, id: str, *,
+            manifest: Manifest,
+            roles: Dict[str, Role],
+            location_registration_role: iam.Role,
+            sharder: Optional[StackSharder]=None,
+    ):
+        missing_roles = [r for r in manifest.role_names if r not in roles]
+        if missing_roles:
+            raise AttributeError(f'The manifest grants access to roles that were not given: {missing_roles}')
+
+        sharder = sharder or StackSharder(scope)
+        lifecycle_rules = {
+            name: [self._lifecycle_rule(r) for r in rules]
+            for name, rules in manifest.lifecycle_rules.items()
+        }
+        self.zones: Dict[str, Zone] = {}
+        self.datasets: Dict[str, Dataset] = {}
+
+        for zone_spec in manifest.zones:
+            zone = Zone(sharder.zone_scope(zone_spec['name']), f'{id}.zone.{zone_spec["name"]}',
+                zone_name=zone_spec['zone_name'],
+                location_registration_role=location_registration_role,
+                sample_data_path=zone_spec['sample_data_path'],
+                seeding_mode=zone_spec['seeding_mode'],
+                lake_permissions_mode=zone_spec['lake_permissions_mode'],
+                monitoring_profile=zone_spec['monitoring_profile'],
+                inventory_enabled=zone_spec['inventory_enabled'],
+                inventory_retention=zone_spec['inventory_retention']
+            )
+            self.zones[zone_spec['name']] = zone
+            for grant in zone_spec['database_grants']:
+                zone.grant_db_access_to_role(role=roles[grant['role']], database_permissions=grant['database_permissions'])
+
+            for dataset_spec in zone_spec['datasets']:
+                crawler_schedule = None
+                if dataset_spec['crawler_schedule']:
+                    crawler_schedule = glue.CfnCrawler.ScheduleProperty(schedule_expression=dataset_spec['crawler_schedule'])
+                dataset = Dataset(sharder.dataset_scope(zone), f'{id}.dataset.{zone_spec["name"]}.{dataset_spec["s3_prefix"]}',
+                    description=dataset_spec['description'],
+                    filetype=dataset_spec['filetype'],
+                    zone=zone,
+                    s3_prefix=dataset_spec['s3_prefix'],
+                    lifecycle_rules=lifecycle_rules.get(dataset_spec['lifecycle_rules'], []),
+                    crawler_enabled=dataset_spec['crawler_enabled'],
+                    crawler_schedule=crawler_schedule,
+                    crawl_mode=dataset_spec['crawl_mode'],
+                    crawler_exclusions=dataset_spec['crawler_exclusions'],
+                    crawler_sample_size=dataset_spec['crawler_sample_size'],
+                    crawler_update_behavior=dataset_spec['crawler_update_behavior'],
+                    crawler_delete_behavior=dataset_spec['crawler_delete_behavior'],
+                    partition_keys=dataset_spec['partition_keys'],
+                    storage_location_template=dataset_spec['storage_location_template'],
+                    schema=dataset_spec['schema'],
+                    compaction_schedule=dataset_spec['compaction_schedule'],
+                    compaction_target_file_size_mb=dataset_spec['compaction_target_file_size_mb'],
+                    compaction_closed_after=dataset_spec['compaction_closed_after'],
+                    sample_data_prune=dataset_spec['sample_data_prune'],
+                    streaming_enabled=dataset_spec['streaming_enabled'],
+                    streaming_buffering_size_mb=dataset_spec['streaming_buffering_size_mb'],
+                    streaming_buffering_interval=dataset_spec['streaming_buffering_interval'],
+                    streaming_partition_key_queries=dataset_spec['streaming_partition_key_queries'],
+                    statistics_enabled=dataset_spec['statistics_enabled'],
+                    statistics_schedule=dataset_spec['statistics_schedule'],
+                    bucket_columns=dataset_spec['bucket_columns'],
+                    number_of_buckets=dataset_spec['number_of_buckets'],
+                    sort_columns=dataset_spec['sort_columns'],
+                    compression=dataset_spec['compression'],
+                    allow_unsplittable_compression=dataset_spec['allow_unsplittable_compression'],
+                    table_format=dataset_spec['table_format'],
+                    iceberg_partitioning=dataset_spec['iceberg_partitioning'],
+                    iceberg_optimize_schedule=dataset_spec['iceberg_optimize_schedule'],
+                    iceberg_vacuum_schedule=dataset_spec['iceberg_vacuum_schedule'],
+                    iceberg_snapshot_retention=dataset_spec['iceberg_snapshot_retention'],
+                    iceberg_removal_policy=dataset_spec['iceberg_removal_policy']
+                )
+                self.datasets[f'{zone_spec["name"]}.{dataset_spec["s3_prefix"]}'] = dataset
+                for grant_set in dataset_spec['grants']:
+                    for grant in manifest.grants[grant_set]:
+                        dataset.grant_access_to_role(role=roles[grant['role']], table_permissions=grant['table_permissions'])
+
+    @staticmethod
+    def _lifecycle_rule(rule: dict) -> s3.LifecycleRule:
+        def days(key):
+            return core.Duration.days(rule[key]) if rule.get(key) is not None else None
+        return s3.LifecycleRule(
+            enabled=rule.get('enabled', True),
+            expiration=days('expiration_days'),
+            noncurrent_version_expiration=days('noncurrent_version_expiration_days'),
+            abort_incomplete_multipart_upload_after=days('abort_incomplete_multipart_upload_days'),
+            transitions=[
+                s3.Transition(
+                    storage_class=getattr(s3.StorageClass, t['storage_class']),
+                    transition_after=core.Duration.days(t.get('days', 0))
+                )
+                for t in rule.get('transitions') or []
+            ] or None
+        )
@@ -0,0 +1,141 @@
+from typing import List, Optional
+from aws_cdk import (
+    core,
+    aws_iam as iam,
+)
+from vre_data_lake.athena_runner import AthenaRunner
+from vre_data_lake.dataset import Dataset
+from vre_data_lake.filetype import Compression
+from vre_data_lake.lake_permissions import LakePermissionsMode
+from vre_data_lake.policy_aggregator import PolicyAggregator
+from vre_data_lake.role import Role
+from vre_data_lake.zone import DatabasePermission, TablePermission, Zone
+
+
+class MaterializedAggregate(core.Construct):
+    """Materializes the result of a SQL query as a partitioned Parquet table in a zone, refreshed on a schedule.
+
+    The table is created with an Athena CTAS statement when the construct is deployed, and refreshed by the
+    stack's AthenaRunner. With an `incremental_column`, a refresh only recomputes the rows at or beyond the
+    largest value of that column already in the table (the whole partition when it is a partition column), so
+    the query should be cheap to filter on it, e.g. by being partitioned on it in the source. Without one, each
+    refresh recomputes the whole table.
+
+    The query must name its source tables with their database, e.g. `"lake_raw"."events"`. Changing the query
+    replaces the table's columns and recomputes it. Athena writes at most 100 partitions per statement, which
+    bounds the number of partitions a single load or refresh may add.
+    """
+
+    def __init__(self, scope: core.Construct, id: str, *,
+            zone: Zone,
+            s3_prefix: str,
+            sql: str,
+            sources: List[Dataset],
+            schedule: Optional[str]='cron(0 1 * * ? *)',
+            partitioned_by: Optional[List[str]]=None,
+            incremental_column: Optional[str]=None,
+            compression: Compression=Compression.SNAPPY,
+    ):
+        super().__init__(scope, id=id)
+
+        if not sources:
+            raise AttributeError('A materialized aggregate needs at least one source dataset.')
+
+        self._zone = zone
+        self._s3_prefix = s3_prefix
+        self.runner = AthenaRunner.of(self)
+        role = self.runner.role
+
+        zone.register_resource(s3_prefix, scope=self)
+        grants = [
+            zone.grant_db_access_to_role(role, [DatabasePermission.CREATE_TABLE, DatabasePermission.DESCRIBE], scope=self),
+            zone.grant_location_access_to_role(role, s3_prefix, scope=self),
+        ]
+        for source in sources:
+            grants.append(source.grant_access_to_role(role, [TablePermission.DESCRIBE, TablePermission.SELECT], scope=self))
+
+        stack = core.Stack.of(self)
+        databases = {zone.glue_db.database_name} | {source.zone.glue_db.database_name for source in sources}
+        aggregator = PolicyAggregator.of(role, self)
+        aggregator.add_statements(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "glue:GetDatabase",
+                    "glue:GetTable",
+                    "glue:GetPartition",
+                    "glue:GetPartitions",
+                ],
+                resources=[stack.format_arn(service='glue', resource='catalog')] + [
+                    arn
+                    for database in sorted(databases)
+                    for arn in [
+                        stack.format_arn(service='glue', resource='database', resource_name=database),
+                        stack.format_arn(service='glue', resource='table', resource_name=f'{database}/*'),
+                    ]
+                ]
+            ),
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "glue:CreateTable",
+                    "glue:UpdateTable",
+                    "glue:DeleteTable",
+                    "glue:CreatePartition",
+                    "glue:BatchCreatePartition",
+                    "glue:BatchDeletePartition",
+                ],
+                resources=[
+                    stack.format_arn(service='glue', resource='catalog'),
+                    zone.glue_db.database_arn,
+                    stack.format_arn(service='glue', resource='table', resource_name=f'{zone.glue_db.database_name}/{s3_prefix}'),
+                    # Scratch tables that hold the schema of a changed query.
+                    stack.format_arn(service='glue', resource='table', resource_name=f'{zone.glue_db.database_name}/{s3_prefix}_schema_*'),
+                ]
+            )
+        )
+
+        self.operation = self.runner.operation('Materialize',
+            Database=zone.glue_db.database_name,
+            Table=s3_prefix,
+            Location=zone.table_location(s3_prefix),
+            Query=sql.strip().rstrip(';'),
+            Format='PARQUET',
+            Compression=compression.value.upper(),
+            PartitionedBy=partitioned_by or [],
+            IncrementalColumn=incremental_column
+        )
+        self.resource = self.runner.run(self, f'{id}.athena.table',
+            resource_type='Custom::MaterializedAggregate',
+            physical_id=f'{zone.glue_db.database_name}.{s3_prefix}',
+            create=self.operation
+        )
+        self.resource.node.add_dependency(aggregator, *grants)
+
+        self.rule = None
+        if schedule is not None:
+            self.rule = self.runner.schedule(self, f'{id}.events.rule.refresh',
+                schedule=schedule,
+                operation=self.operation
+            )
+            self.rule.node.add_dependency(self.resource)
+
+    @property
+    def s3_prefix(self) -> str:
+        return self._s3_prefix
+
+    @property
+    def zone(self) -> Zone:
+        return self._zone
+
+    def grant_access_to_role(self, role: Role, table_permissions: Optional[List[TablePermission]]=[TablePermission.DESCRIBE, TablePermission.SELECT], scope: Optional[core.Construct]=None):
+        lake_permissions = self._zone.grant_table_access_to_role(
+            role=role,
+            s3_prefix=self._s3_prefix,
+            table_permissions=table_permissions,
+            scope=scope or self,
+            # The table only exists once the aggregate has been created, which is after the stack's batch is applied.
+            lake_permissions_mode=LakePermissionsMode.INDIVIDUAL
+        )
+        if lake_permissions is not None:
+            lake_permissions.node.add_dependency(self.resource)
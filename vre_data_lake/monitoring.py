@@ -0,0 +1,179 @@
+from typing import List, Optional, Set
+from aws_cdk import (
+    core,
+    aws_cloudwatch as cloudwatch,
+    aws_s3 as s3,
+)
+
+# Published by glue_scripts/compact_small_files.py.
+COMPACTION_NAMESPACE = 'VreDataLake/Compaction'
+
+
+class MonitoringProfile:
+    """Alarm thresholds of a zone's performance dashboard. A threshold of None disables its alarm."""
+
+    def __init__(self,
+            server_errors_per_5_minutes: Optional[int]=50,
+            query_latency_p90: Optional[core.Duration]=core.Duration.minutes(5),
+            processed_bytes_per_hour: Optional[int]=None,
+    ):
+        self.server_errors_per_5_minutes = server_errors_per_5_minutes
+        self.query_latency_p90 = query_latency_p90
+        self.processed_bytes_per_hour = processed_bytes_per_hour
+
+
+class ZoneDashboard(core.Construct):
+    """A CloudWatch dashboard of how a zone performs, with alarms on regressions.
+
+    Every prefix added gets an S3 request metrics configuration on the zone's bucket, so its request rates,
+    5xx errors (which include 503 Slow Down) and latencies are published per prefix. S3 request metrics are
+    billed as custom CloudWatch metrics. Athena metrics are shown for the workgroups of the roles that were
+    granted access to the zone. Glue doesn't publish crawler durations as metrics, so the crawlers' start and
+    finish log lines are shown instead.
+    """
+
+    def __init__(self, scope: core.Construct, id: str, *,
+            zone_name: str,
+            bucket: s3.Bucket,
+            profile: MonitoringProfile,
+    ):
+        super().__init__(scope, id)
+        self._zone_name = zone_name
+        self._bucket = bucket
+        self._profile = profile
+        self._workgroups: Set[str] = set()
+        self.alarms: List[cloudwatch.Alarm] = []
+
+        self.dashboard = cloudwatch.Dashboard(self, f'{id}.dashboard',
+            dashboard_name=f'{zone_name}-performance'
+        )
+        # Storage metrics are published daily for the whole bucket only.
+        self.dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title=f'{zone_name}: objects',
+                left=[self._storage_metric('NumberOfObjects', 'AllStorageTypes')],
+                right=[self._storage_metric('BucketSizeBytes', 'StandardStorage')],
+                width=12
+            ),
+            cloudwatch.LogQueryWidget(
+                title=f'{zone_name}: crawls',
+                log_group_names=['/aws-glue/crawlers'],
+                query_lines=[
+                    'fields @timestamp, @logStream, @message',
+                    f'filter @logStream like /^{zone_name}-/ and @message like /BENCHMARK/',
+                    'sort @timestamp desc',
+                    'limit 50',
+                ],
+                width=12
+            )
+        )
+
+    def _storage_metric(self, metric_name: str, storage_type: str) -> cloudwatch.Metric:
+        return cloudwatch.Metric(
+            namespace='AWS/S3',
+            metric_name=metric_name,
+            dimensions_map={'BucketName': self._bucket.bucket_name, 'StorageType': storage_type},
+            statistic='Average',
+            period=core.Duration.days(1)
+        )
+
+    def _request_metric(self, s3_prefix: str, metric_name: str, statistic: str='Sum') -> cloudwatch.Metric:
+        return cloudwatch.Metric(
+            namespace='AWS/S3',
+            metric_name=metric_name,
+            dimensions_map={'BucketName': self._bucket.bucket_name, 'FilterId': s3_prefix},
+            statistic=statistic,
+            label=metric_name,
+            period=core.Duration.minutes(5)
+        )
+
+    def _athena_metric(self, workgroup_name: str, metric_name: str, statistic: str, period: core.Duration) -> cloudwatch.Metric:
+        return cloudwatch.Metric(
+            namespace='AWS/Athena',
+            metric_name=metric_name,
+            dimensions_map={'WorkGroup': workgroup_name, 'QueryState': 'SUCCEEDED', 'QueryType': 'DML'},
+            statistic=statistic,
+            label=metric_name,
+            period=period
+        )
+
+    def add_prefix(self, s3_prefix: str):
+        self._bucket.add_metric(id=s3_prefix, prefix=f'{s3_prefix}/')
+        self.dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title=f'{s3_prefix}: requests',
+                left=[self._request_metric(s3_prefix, name) for name in ['GetRequests', 'PutRequests', 'ListRequests', 'DeleteRequests']],
+                right=[self._request_metric(s3_prefix, name) for name in ['4xxErrors', '5xxErrors']],
+                width=12
+            ),
+            cloudwatch.GraphWidget(
+                title=f'{s3_prefix}: latency (p90)',
+                left=[self._request_metric(s3_prefix, name, 'p90') for name in ['FirstByteLatency', 'TotalRequestLatency']],
+                right=[self._request_metric(s3_prefix, 'BytesDownloaded')],
+                width=12
+            )
+        )
+        if self._profile.server_errors_per_5_minutes is not None:
+            self.alarms.append(cloudwatch.Alarm(self, f'{self.node.id}.{s3_prefix}.alarm.5xx',
+                alarm_name=f'{self._zone_name}-{s3_prefix}-s3-5xx-errors',
+                alarm_description=f"S3 returns server errors, most likely 503 Slow Down, for the prefix '{s3_prefix}'.",
+                metric=self._request_metric(s3_prefix, '5xxErrors'),
+                threshold=self._profile.server_errors_per_5_minutes,
+                comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_OR_EQUAL_TO_THRESHOLD,
+                evaluation_periods=3,
+                datapoints_to_alarm=2,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING
+            ))
+
+    def add_compaction(self, database_name: str, s3_prefix: str):
+        dimensions = {'Database': database_name, 'Table': s3_prefix}
+        self.dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title=f'{s3_prefix}: files before and after compaction',
+                left=[
+                    cloudwatch.Metric(namespace=COMPACTION_NAMESPACE, metric_name=name, dimensions_map=dimensions,
+                        statistic='Maximum', label=name, period=core.Duration.days(1))
+                    for name in ['FileCountBefore', 'FileCountAfter']
+                ],
+                width=24
+            )
+        )
+
+    def add_workgroup(self, workgroup_name: str):
+        if workgroup_name in self._workgroups:
+            return
+        self._workgroups.add(workgroup_name)
+        hour = core.Duration.hours(1)
+        self.dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title=f'{workgroup_name}: bytes scanned',
+                left=[self._athena_metric(workgroup_name, 'ProcessedBytes', 'Sum', hour)],
+                width=12
+            ),
+            cloudwatch.GraphWidget(
+                title=f'{workgroup_name}: query latency (p90)',
+                left=[self._athena_metric(workgroup_name, name, 'p90', hour) for name in ['TotalExecutionTime', 'QueryQueueTime']],
+                width=12
+            )
+        )
+        # Workgroups are shared by zones, so their alarms are named after the zone that watches them.
+        if self._profile.query_latency_p90 is not None:
+            self.alarms.append(cloudwatch.Alarm(self, f'{self.node.id}.{workgroup_name}.alarm.latency',
+                alarm_name=f'{self._zone_name}-{workgroup_name}-query-latency',
+                alarm_description=f"The 90th percentile of the query time of the workgroup '{workgroup_name}' regressed.",
+                metric=self._athena_metric(workgroup_name, 'TotalExecutionTime', 'p90', hour),
+                threshold=self._profile.query_latency_p90.to_milliseconds(),
+                comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+                evaluation_periods=3,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING
+            ))
+        if self._profile.processed_bytes_per_hour is not None:
+            self.alarms.append(cloudwatch.Alarm(self, f'{self.node.id}.{workgroup_name}.alarm.bytes',
+                alarm_name=f'{self._zone_name}-{workgroup_name}-bytes-scanned',
+                alarm_description=f"The workgroup '{workgroup_name}' scans more data than expected.",
+                metric=self._athena_metric(workgroup_name, 'ProcessedBytes', 'Sum', hour),
+                threshold=self._profile.processed_bytes_per_hour,
+                comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+                evaluation_periods=1,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING
+            ))
@@ -0,0 +1,102 @@
+from typing import Dict, List, Optional
+from aws_cdk import (
+    aws_glue as glue,
+)
+import re
+
+
+class PartitionKey:
+    """A partition column of a dataset, projected by Athena instead of looked up in the Glue catalog.
+
+    https://docs.aws.amazon.com/athena/latest/ug/partition-projection-supported-types.html
+    """
+    projection_type = None
+
+    def __init__(self, name: str, type: str='string'):
+        if re.fullmatch('[a-z_][0-9a-z_]*', name) == None:
+            raise AttributeError(f'"name" must contain only lowercase alphanumerical characters and underscores. name given was {name}')
+        self.name = name
+        self.type = type
+
+    def column(self) -> glue.CfnTable.ColumnProperty:
+        return glue.CfnTable.ColumnProperty(name=self.name, type=self.type)
+
+    def projection_parameters(self) -> Dict[str, str]:
+        return {f'projection.{self.name}.type': self.projection_type}
+
+
+class DatePartitionKey(PartitionKey):
+    projection_type = 'date'
+
+    def __init__(self, name: str,
+            range_start: str,
+            range_end: str='NOW',
+            format: str='yyyy-MM-dd',
+            interval: Optional[int]=None,
+            interval_unit: Optional[str]=None,
+            type: str='string',
+    ):
+        super().__init__(name, type=type)
+        self.range_start = range_start
+        self.range_end = range_end
+        self.format = format
+        self.interval = interval
+        self.interval_unit = interval_unit
+
+    def projection_parameters(self) -> Dict[str, str]:
+        parameters = super().projection_parameters()
+        parameters[f'projection.{self.name}.range'] = f'{self.range_start},{self.range_end}'
+        parameters[f'projection.{self.name}.format'] = self.format
+        if self.interval is not None:
+            parameters[f'projection.{self.name}.interval'] = str(self.interval)
+        if self.interval_unit is not None:
+            parameters[f'projection.{self.name}.interval.unit'] = self.interval_unit
+        return parameters
+
+
+class IntegerPartitionKey(PartitionKey):
+    projection_type = 'integer'
+
+    def __init__(self, name: str,
+            minimum: int,
+            maximum: int,
+            interval: Optional[int]=None,
+            digits: Optional[int]=None,
+            type: str='int',
+    ):
+        super().__init__(name, type=type)
+        if minimum > maximum:
+            raise AttributeError(f'"minimum" must not be greater than "maximum" for partition key {name}')
+        self.minimum = minimum
+        self.maximum = maximum
+        self.interval = interval
+        self.digits = digits
+
+    def projection_parameters(self) -> Dict[str, str]:
+        parameters = super().projection_parameters()
+        parameters[f'projection.{self.name}.range'] = f'{self.minimum},{self.maximum}'
+        if self.interval is not None:
+            parameters[f'projection.{self.name}.interval'] = str(self.interval)
+        if self.digits is not None:
+            parameters[f'projection.{self.name}.digits'] = str(self.digits)
+        return parameters
+
+
+class EnumPartitionKey(PartitionKey):
+    projection_type = 'enum'
+
+    def __init__(self, name: str, values: List[str], type: str='string'):
+        super().__init__(name, type=type)
+        if not values:
+            raise AttributeError(f'"values" must not be empty for partition key {name}')
+        self.values = values
+
+    def projection_parameters(self) -> Dict[str, str]:
+        parameters = super().projection_parameters()
+        parameters[f'projection.{self.name}.values'] = ','.join(self.values)
+        return parameters
+
+
+class InjectedPartitionKey(PartitionKey):
+    # Injected values must be supplied by an equality predicate in every query.
+    projection_type = 'injected'
@@ -0,0 +1,134 @@
+import json
+from typing import Dict, List, Tuple
+import jsii
+from aws_cdk import (
+    core,
+    aws_iam as iam,
+)
+
+
+@jsii.implements(core.IAspect)
+class PolicyAggregator(core.Construct):
+    """Collects the IAM grants made to a role during synthesis and emits them as the fewest managed policies.
+
+    Statements with the same actions and conditions are merged into one statement over all of their resources,
+    and repeated resources (e.g. the bucket for s3:ListBucket or "*" for lakeformation:GetDataAccess) are
+    deduplicated. Statements with principals, NotAction or NotResource can't be merged and are rejected.
+    Statements are only split across policies when a policy would exceed the managed policy size limit.
+    """
+
+    # https://docs.aws.amazon.com/IAM/latest/UserGuide/reference_iam-quotas.html
+    MAX_POLICY_SIZE = 6144
+    MAX_POLICIES_PER_ROLE = 10
+    # Deploy-time values such as bucket ARNs have no length at synthesis, so this is an upper bound for them.
+    TOKEN_SIZE_ESTIMATE = 128
+    STATEMENT_OVERHEAD = len('{"Effect":"Allow","Action":[],"Resource":[]},')
+    POLICY_OVERHEAD = len('{"Version":"2012-10-17","Statement":[]}')
+
+    def __init__(self, scope: core.Construct, id: str, *, role: iam.IRole):
+        super().__init__(scope, id)
+        self.role = role
+        self.policies: List[iam.ManagedPolicy] = []
+        self._statements: Dict[Tuple[Tuple[str, ...], str], Dict[str, str]] = {}
+        self._conditions: Dict[Tuple[Tuple[str, ...], str], dict] = {}
+        core.Aspects.of(self).add(self)
+
+    @staticmethod
+    def of(role: iam.IRole, scope: core.Construct) -> 'PolicyAggregator':
+        # One aggregator per role per stack, so the policies live next to the resources they grant access to.
+        stack = core.Stack.of(scope)
+        id = f'{core.Names.unique_id(role)}.policy-aggregator'
+        aggregator = stack.node.try_find_child(id)
+        if aggregator is None:
+            aggregator = PolicyAggregator(stack, id, role=role)
+        return aggregator
+
+    def add_statements(self, *statements: iam.PolicyStatement):
+        for statement in statements:
+            if statement.effect != iam.Effect.ALLOW:
+                raise AttributeError('Only statements that allow access can be aggregated.')
+            if statement.not_actions or statement.not_resources or statement.has_principal:
+                raise AttributeError('Statements with principals, NotAction or NotResource cannot be aggregated.')
+            conditions = statement.conditions or {}
+            key = (tuple(sorted(set(statement.actions))), json.dumps(core.Stack.of(self).resolve(conditions), sort_keys=True) if conditions else '')
+            self._conditions.setdefault(key, conditions)
+            resources = self._statements.setdefault(key, {})
+            for resource in statement.resources:
+                resources.setdefault(self._resource_key(resource), resource)
+
+    def visit(self, node: core.IConstruct) -> None:
+        if node.node.path == self.node.path and not self.policies:
+            self._emit_policies()
+
+    def _resource_key(self, resource: str) -> str:
+        if not core.Token.is_unresolved(resource):
+            return resource
+        return json.dumps(core.Stack.of(self).resolve(resource), sort_keys=True)
+
+    def _estimate_size(self, value: str) -> int:
+        if not core.Token.is_unresolved(value):
+            return len(value) + 3
+        size = 3
+        def measure(resolved):
+            nonlocal size
+            if isinstance(resolved, str):
+                size += len(resolved)
+            elif isinstance(resolved, list):
+                for item in resolved:
+                    measure(item)
+            elif isinstance(resolved, dict):
+                if set(resolved) & {'Ref', 'Fn::GetAtt', 'Fn::ImportValue'}:
+                    size += self.TOKEN_SIZE_ESTIMATE
+                else:
+                    for item in resolved.values():
+                        measure(item)
+        measure(core.Stack.of(self).resolve(value))
+        return size
+
+    def _chunk_statements(self):
+        # Splits each merged statement into chunks of resources that fit into a single policy.
+        for key, resources in self._statements.items():
+            actions, conditions = key
+            base_size = self.STATEMENT_OVERHEAD + sum(len(a) + 3 for a in actions) + len(conditions)
+            chunk, chunk_size = [], base_size
+            for resource in resources.values():
+                resource_size = self._estimate_size(resource)
+                if chunk and chunk_size + resource_size > self.MAX_POLICY_SIZE - self.POLICY_OVERHEAD:
+                    yield key, chunk, chunk_size
+                    chunk, chunk_size = [], base_size
+                chunk.append(resource)
+                chunk_size += resource_size
+            if chunk:
+                yield key, chunk, chunk_size
+
+    def _emit_policies(self):
+        # First fit decreasing packs the statements into as few policies as possible.
+        bins = []
+        for key, resources, size in sorted(self._chunk_statements(), key=lambda s: s[2], reverse=True):
+            for policy_bin in bins:
+                if policy_bin['size'] + size <= self.MAX_POLICY_SIZE:
+                    policy_bin['statements'].append((key, resources))
+                    policy_bin['size'] += size
+                    break
+            else:
+                bins.append({'size': self.POLICY_OVERHEAD + size, 'statements': [(key, resources)]})
+
+        if len(bins) > self.MAX_POLICIES_PER_ROLE:
+            core.Annotations.of(self).add_warning(
+                f'{len(bins)} managed policies are needed for the grants made to this role, '
+                f'more than the default quota of {self.MAX_POLICIES_PER_ROLE} per role.'
+            )
+
+        for i, policy_bin in enumerate(bins):
+            self.policies.append(iam.ManagedPolicy(self, f'policy-{i}',
+                roles=[self.role],
+                statements=[
+                    iam.PolicyStatement(
+                        effect=iam.Effect.ALLOW,
+                        actions=list(key[0]),
+                        resources=resources,
+                        conditions=self._conditions[key] or None
+                    )
+                    for key, resources in policy_bin['statements']
+                ]
+            ))
@@ -0,0 +1,200 @@
+"""Opt-in profiling of synthesis: module imports, construct initialization and the synth itself.
+
+The profiler is started before `aws_cdk` is imported, so import times include the CDK modules and the jsii
+runtime. `instrument` then wraps the `__init__` of every construct class of this package, recording for each
+construct the time spent in it (inclusive and excluding the instrumented constructs within it), the memory it
+allocated and kept, and the number of CloudFormation resources it created anywhere in the app. Time not attributed
+to a construct is spent in the CDK runtime, e.g. in the `synth` phase. The time taken to count resources is left
+out of every record, but it makes a profiled synth of a large lake much slower than an ordinary one.
+
+`write` produces `<prefix>.json` with every record, and `<prefix>.folded`, the folded stacks of self times in
+microseconds that flamegraph.pl, speedscope and inferno read.
+
+    profiler = SynthProfiler('cdk.out/profile')
+    profiler.start()
+    from aws_cdk import core
+    ...
+    profiler.instrument()
+    with profiler.phase('build'):
+        ...
+    with profiler.phase('synth'):
+        app.synth()
+    profiler.write()
+"""
+import builtins
+import functools
+import inspect
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class SynthProfiler:
+
+    def __init__(self, output_prefix: str, trace_allocations: bool=True):
+        self.output_prefix = output_prefix
+        self.trace_allocations = trace_allocations
+        self.imports: List[Dict] = []
+        self.constructs: List[Dict] = []
+        self.phases: List[Dict] = []
+        self._stack: List[Dict] = []
+        self._import = None
+        self._overhead = 0.0
+
+    @staticmethod
+    def from_environment(variable: str='VRE_DATA_LAKE_PROFILE') -> Optional['SynthProfiler']:
+        # The variable holds the output prefix. Profiling is off when it is not set.
+        output_prefix = os.environ.get(variable)
+        if not output_prefix:
+            return None
+        profiler = SynthProfiler(output_prefix)
+        profiler.start()
+        return profiler
+
+    def start(self):
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def stop(self):
+        if self._import is not None:
+            builtins.__import__ = self._import
+            self._import = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Only the first import of a module does any work. Relative imports are resolved by the original import.
+        if level != 0 or name in sys.modules:
+            return self._import(name, globals, locals, fromlist, level)
+        with self._frame('import', f'import {name}'):
+            return self._import(name, globals, locals, fromlist, level)
+
+    def instrument(self, *classes: type):
+        # Without classes, every construct class defined in a loaded module of this package is instrumented.
+        from aws_cdk import core
+        if not classes:
+            package = __name__.split('.')[0]
+            classes = tuple(
+                cls
+                for module_name, module in list(sys.modules.items())
+                if module is not None and (module_name == package or module_name.startswith(f'{package}.'))
+                for _, cls in inspect.getmembers(module, inspect.isclass)
+                if cls.__module__ == module_name and issubclass(cls, core.Construct)
+            )
+        for cls in classes:
+            # Inherited initializers are already wrapped on the class that defines them.
+            init = cls.__dict__.get('__init__')
+            if init is None or getattr(init, '__profiled__', False):
+                continue
+            cls.__init__ = self._wrap(cls, init)
+
+    def _wrap(self, cls: type, init):
+        profiler = self
+
+        @functools.wraps(init)
+        def __init__(construct, *args, **kwargs):
+            scope = args[0] if args else kwargs.get('scope')
+            id = args[1] if len(args) > 1 else kwargs.get('id', '')
+            record = profiler._begin('construct', f'{cls.__name__}({id})', scope)
+            try:
+                init(construct, *args, **kwargs)
+            except BaseException:
+                profiler._end(record)
+                raise
+            profiler._end(record, construct)
+        __init__.__profiled__ = True
+        return __init__
+
+    @contextmanager
+    def phase(self, name: str):
+        with self._frame('phase', name):
+            yield
+
+    @contextmanager
+    def _frame(self, kind: str, name: str):
+        record = self._begin(kind, name)
+        try:
+            yield record
+        finally:
+            self._end(record)
+
+    def _resource_count(self, scope) -> int:
+        # Resources are counted across the whole app, since constructs often create theirs in other scopes.
+        from aws_cdk import core
+        started = time.perf_counter()
+        count = sum(1 for c in scope.node.root.node.find_all() if isinstance(c, core.CfnResource))
+        self._overhead += time.perf_counter() - started
+        return count
+
+    def _begin(self, kind: str, name: str, scope=None) -> Dict:
+        record = {
+            'kind': kind,
+            'name': name,
+            'stack': [f['name'] for f in self._stack] + [name],
+            'children': {'seconds': 0.0, 'allocated_bytes': 0, 'resources': 0},
+            'resource_count': self._resource_count(scope) if scope is not None else None,
+            'started': time.perf_counter(),
+            'overhead': self._overhead,
+            'memory': tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0,
+        }
+        self._stack.append(record)
+        return record
+
+    def _end(self, record: Dict, construct=None):
+        # Times and allocations are taken before resources are counted, so counting is not attributed to the construct.
+        self._stack.pop()
+        record['seconds'] = time.perf_counter() - record.pop('started') - (self._overhead - record.pop('overhead'))
+        record['allocated_bytes'] = (tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0) - record.pop('memory')
+        record['class'] = record['name'].split('(')[0] if record['kind'] == 'construct' else None
+        resource_count = record.pop('resource_count')
+        if construct is not None:
+            record['path'] = construct.node.path
+            record['resources'] = self._resource_count(construct) - resource_count
+        children = record.pop('children')
+        record['self_seconds'] = max(record['seconds'] - children['seconds'], 0.0)
+        record['self_allocated_bytes'] = record['allocated_bytes'] - children['allocated_bytes']
+        record['self_resources'] = record.get('resources', children['resources']) - children['resources']
+        if self._stack:
+            parent = self._stack[-1]['children']
+            parent['seconds'] += record['seconds']
+            parent['allocated_bytes'] += record['allocated_bytes']
+            parent['resources'] += record.get('resources', children['resources'])
+        {'import': self.imports, 'construct': self.constructs, 'phase': self.phases}[record['kind']].append(record)
+
+    def report(self) -> Dict:
+        classes: Dict[str, Dict] = {}
+        for record in self.constructs:
+            totals = classes.setdefault(record['class'], {'count': 0, 'self_seconds': 0.0, 'self_allocated_bytes': 0, 'self_resources': 0})
+            totals['count'] += 1
+            for key in ('self_seconds', 'self_allocated_bytes', 'self_resources'):
+                totals[key] += record.get(key, 0)
+        return {
+            'phases': self.phases,
+            'classes': dict(sorted(classes.items(), key=lambda item: -item[1]['self_seconds'])),
+            'imports': sorted(self.imports, key=lambda r: -r['seconds']),
+            'constructs': self.constructs,
+        }
+
+    def folded(self) -> List[str]:
+        lines = []
+        for record in self.phases + self.imports + self.constructs:
+            microseconds = int(record['self_seconds'] * 1e6)
+            if microseconds > 0:
+                lines.append(f"{';'.join(f.replace(';', ',') for f in record['stack'])} {microseconds}")
+        return lines
+
+    def write(self):
+        self.stop()
+        directory = os.path.dirname(self.output_prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f'{self.output_prefix}.json', 'w') as fp:
+            json.dump(self.report(), fp, indent=2)
+        with open(f'{self.output_prefix}.folded', 'w') as fp:
+            fp.write('\n'.join(self.folded()) + '\n')
@@ -6,36 +6,85 @@ from aws_cdk import (
     aws_s3 as s3,
 )
 
+class WorkgroupProfile:
+    """Performance and cost settings for the Athena workgroup of a role.
+
+    The defaults leave the workgroup as it was before profiles existed: engine version 2, results not encrypted by
+    the workgroup and never expiring. Set e.g. `engine_version='Athena engine version 3'` and
+    `result_expiration=core.Duration.days(30)` to opt in.
+    """
+
+    def __init__(self,
+            engine_version: Optional[str]='Athena engine version 2',
+            bytes_scanned_cutoff_per_query: Optional[int]=None,
+            result_encryption_option: Optional[str]=None,
+            result_expiration: Optional[core.Duration]=None,
+            enforce_work_group_configuration: bool=False,
+    ):
+        # Athena rejects cutoffs below 10 MB.
+        if bytes_scanned_cutoff_per_query is not None and bytes_scanned_cutoff_per_query < 10_000_000:
+            raise AttributeError(f'"bytes_scanned_cutoff_per_query" must be at least 10000000 bytes. bytes_scanned_cutoff_per_query given was {bytes_scanned_cutoff_per_query}')
+        self.engine_version = engine_version
+        self.bytes_scanned_cutoff_per_query = bytes_scanned_cutoff_per_query
+        self.result_encryption_option = result_encryption_option
+        self.result_expiration = result_expiration
+        self.enforce_work_group_configuration = enforce_work_group_configuration
+
+
 class Role(iam.Role):
 
-    def __init__(self, scope: core.Construct, id: str, create_athena_scratch_bucket: Optional[bool]=False, **kwargs):
+    def __init__(self, scope: core.Construct, id: str, create_athena_scratch_bucket: Optional[bool]=False, workgroup_profile: Optional[WorkgroupProfile]=None, **kwargs):
         super().__init__(scope, id, **kwargs)
         self.input_role_name = kwargs['role_name']
+        self.workgroup_profile = workgroup_profile or WorkgroupProfile()
+        self.workgroup_name = None
         if create_athena_scratch_bucket:
             self._create_athena_workgroup()
 
     def _create_athena_workgroup(self):
+        profile = self.workgroup_profile
+        lifecycle_rules = None
+        if profile.result_expiration is not None:
+            lifecycle_rules = [
+                s3.LifecycleRule(
+                    enabled=True,
+                    expiration=profile.result_expiration,
+                    abort_incomplete_multipart_upload_after=core.Duration.days(1)
+                )
+            ]
+        bucket_name = f'{self.input_role_name}.athena-output'.lower()
+        if len(bucket_name) > 63:
+            raise AttributeError(f'The Athena output bucket {bucket_name} is named after the role, and bucket names are at most 63 characters. Use a shorter role name.')
         athena_output_bucket = s3.Bucket(self, f'{self.node.id}.s3.athena-output',
-            bucket_name=f'{self.input_role_name}.athena-output'.lower(),
-            removal_policy=core.RemovalPolicy.DESTROY
+            bucket_name=bucket_name,
+            removal_policy=core.RemovalPolicy.DESTROY,
+            lifecycle_rules=lifecycle_rules
         )
 
+        encryption_configuration = None
+        if profile.result_encryption_option is not None:
+            encryption_configuration = athena.CfnWorkGroup.EncryptionConfigurationProperty(
+                encryption_option=profile.result_encryption_option
+            )
+        self.workgroup_name = f"{self.input_role_name}-workgroup"
+
         workgroup = athena.CfnWorkGroup(self, f'{self.node.id}.athena.workgroup',
-            name=f"{self.input_role_name}-workgroup",
+            name=self.workgroup_name,
             description="Athena Workgroup for the VRE Data Lake.",
             recursive_delete_option=True,
             state='ENABLED',
             work_group_configuration=athena.CfnWorkGroup.WorkGroupConfigurationProperty(
-                enforce_work_group_configuration=False,
+                enforce_work_group_configuration=profile.enforce_work_group_configuration,
                 publish_cloud_watch_metrics_enabled=True,
                 requester_pays_enabled=False,
+                bytes_scanned_cutoff_per_query=profile.bytes_scanned_cutoff_per_query,
                 result_configuration=athena.CfnWorkGroup.ResultConfigurationProperty(
-                    output_location=f'{athena_output_bucket.s3_url_for_object()}/'
+                    output_location=f'{athena_output_bucket.s3_url_for_object()}/',
+                    encryption_configuration=encryption_configuration
                 ),
                 engine_version=athena.CfnWorkGroup.EngineVersionProperty(
-                    selected_engine_version="Athena engine version 2",
-                    effective_engine_version="Athena engine version 2"
-                )
+                    selected_engine_version=profile.engine_version
+                ) if profile.engine_version is not None else None
             )
         )
 
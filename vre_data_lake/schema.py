@@ -0,0 +1,114 @@
+import json
+from typing import Dict, List, Optional
+from aws_cdk import (
+    aws_glue as glue,
+)
+import re
+
+
+class Column:
+
+    def __init__(self, name: str, type: str, comment: Optional[str]=None):
+        if re.fullmatch('[a-z_][0-9a-z_]*', name) == None:
+            raise AttributeError(f'"name" must contain only lowercase alphanumerical characters and underscores. name given was {name}')
+        self.name = name
+        self.type = type
+        self.comment = comment
+
+    def column(self) -> glue.CfnTable.ColumnProperty:
+        return glue.CfnTable.ColumnProperty(name=self.name, type=self.type, comment=self.comment)
+
+
+class SortColumn:
+    """A column the files of a dataset are sorted on, which narrows the row groups readers have to scan."""
+
+    def __init__(self, name: str, ascending: bool=True):
+        self.name = name
+        self.ascending = ascending
+
+    def order(self) -> glue.CfnTable.OrderProperty:
+        return glue.CfnTable.OrderProperty(column=self.name, sort_order=1 if self.ascending else 0)
+
+
+class Schema:
+    """The columns of a dataset, declared up front so its table is usable without a crawler."""
+
+    def __init__(self, columns: List[Column], serde_parameters: Optional[Dict[str, str]]=None):
+        if not columns:
+            raise AttributeError('"columns" must not be empty.')
+        names = [c.name for c in columns]
+        duplicates = sorted({n for n in names if names.count(n) > 1})
+        if duplicates:
+            raise AttributeError(f'Column names must be unique. Duplicated names were {duplicates}')
+        self.columns = columns
+        self.serde_parameters = serde_parameters or {}
+
+    @staticmethod
+    def from_json_file(path: str) -> 'Schema':
+        # Expects {"columns": [{"name": ..., "type": ..., "comment": ...}, ...]} with Hive column types.
+        with open(path) as fp:
+            document = json.load(fp)
+        return Schema(columns=[
+            Column(name=c['name'], type=c['type'], comment=c.get('comment'))
+            for c in document['columns']
+        ])
+
+    @staticmethod
+    def from_avro_file(path: str) -> 'Schema':
+        with open(path) as fp:
+            document = json.load(fp)
+        if document.get('type') != 'record':
+            raise AttributeError(f'The Avro schema in {path} must be a record.')
+        return Schema(
+            columns=[
+                Column(name=f['name'].lower(), type=_avro_to_hive_type(f['type']), comment=f.get('doc'))
+                for f in document['fields']
+            ],
+            # The Avro SerDe reads with this schema rather than the table columns.
+            serde_parameters={"avro.schema.literal": json.dumps(document)}
+        )
+
+
+_AVRO_PRIMITIVE_TYPES = {
+    'boolean': 'boolean',
+    'int': 'int',
+    'long': 'bigint',
+    'float': 'float',
+    'double': 'double',
+    'bytes': 'binary',
+    'string': 'string',
+    'enum': 'string',
+    'fixed': 'binary',
+}
+
+_AVRO_LOGICAL_TYPES = {
+    'date': 'date',
+    'timestamp-millis': 'timestamp',
+    'timestamp-micros': 'timestamp',
+}
+
+
+def _avro_to_hive_type(avro_type) -> str:
+    if isinstance(avro_type, list):
+        non_null_types = [t for t in avro_type if t != 'null']
+        if len(non_null_types) != 1:
+            raise AttributeError(f'Avro unions other than nullable types are not supported. type given was {avro_type}')
+        return _avro_to_hive_type(non_null_types[0])
+    if isinstance(avro_type, str):
+        if avro_type not in _AVRO_PRIMITIVE_TYPES:
+            raise AttributeError(f'Unsupported Avro type {avro_type}')
+        return _AVRO_PRIMITIVE_TYPES[avro_type]
+
+    logical_type = avro_type.get('logicalType')
+    if logical_type == 'decimal':
+        return f"decimal({avro_type['precision']},{avro_type.get('scale', 0)})"
+    if logical_type in _AVRO_LOGICAL_TYPES:
+        return _AVRO_LOGICAL_TYPES[logical_type]
+    if avro_type['type'] == 'record':
+        fields = ','.join(f"{f['name'].lower()}:{_avro_to_hive_type(f['type'])}" for f in avro_type['fields'])
+        return f'struct<{fields}>'
+    if avro_type['type'] == 'array':
+        return f"array<{_avro_to_hive_type(avro_type['items'])}>"
+    if avro_type['type'] == 'map':
+        return f"map<string,{_avro_to_hive_type(avro_type['values'])}>"
+    return _avro_to_hive_type(avro_type['type'])
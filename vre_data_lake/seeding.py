@@ -0,0 +1,99 @@
+from enum import Enum, auto
+import os
+from typing import Dict, Optional
+import jsii
+from aws_cdk import (
+    core,
+    aws_lambda as lambda_,
+    aws_s3 as s3,
+    aws_s3_assets as s3_assets,
+    custom_resources as cr,
+)
+from vre_data_lake.lambda_function import LAMBDA_RUNTIME, lambda_code
+
+
+class SeedingMode(Enum):
+    FULL = auto()         # The whole sample data is copied by a BucketDeployment whenever any of it changes.
+    INCREMENTAL = auto()  # Only changed objects are uploaded, see IncrementalBucketDeployment.
+
+
+@jsii.implements(core.IAnyProducer)
+class _PrefixesProducer:
+
+    def __init__(self, deployment: 'IncrementalBucketDeployment'):
+        self._deployment = deployment
+
+    def produce(self, context: core.IResolveContext):
+        return [
+            {
+                'Prefix': prefix,
+                'AssetBucket': asset.s3_bucket_name,
+                'AssetKey': asset.s3_object_key,
+                'Prune': str(self._deployment.prune.get(prefix, True)).lower(),
+            }
+            for prefix, asset in self._deployment.assets.items()
+        ]
+
+
+class IncrementalBucketDeployment(core.Construct):
+    """Seeds a bucket from a local directory, uploading only what changed since the last deployment.
+
+    Each top level directory becomes its own asset, so a prefix whose files are unchanged keeps its asset hash
+    and is skipped entirely. Within a changed prefix, files are only uploaded when their sha256 differs from the
+    one recorded on the existing object. Pruning only ever deletes objects under the top level directories of
+    the sample data, and can be turned off per prefix.
+    """
+
+    def __init__(self, scope: core.Construct, id: str, *,
+            path: str,
+            destination_bucket: s3.IBucket,
+            memory_limit: Optional[int]=None,
+            ephemeral_storage_size: Optional[core.Size]=None,
+    ):
+        super().__init__(scope, id)
+
+        self.assets: Dict[str, s3_assets.Asset] = {}
+        self.prune: Dict[str, bool] = {}
+
+        root_files = []
+        for entry in sorted(os.listdir(path)):
+            entry_path = os.path.join(path, entry)
+            if os.path.isdir(entry_path):
+                self.assets[entry] = s3_assets.Asset(self, f'{id}.s3.{entry}', path=entry_path)
+            else:
+                root_files.append(entry)
+        if root_files:
+            # Files at the top of the sample data are kept in one asset and are never pruned.
+            self.assets[''] = s3_assets.Asset(self, f'{id}.s3.root',
+                path=path,
+                exclude=list(self.assets)
+            )
+
+        handler = lambda_.Function(self, f'{id}.lambda.handler',
+            description='Seeds the sample data of a zone incrementally.',
+            runtime=LAMBDA_RUNTIME,
+            handler='index.on_event',
+            code=lambda_code('incremental_seeding'),
+            timeout=core.Duration.minutes(15),
+            memory_size=memory_limit or 1024,
+            ephemeral_storage_size=ephemeral_storage_size or core.Size.gibibytes(2)
+        )
+        for asset in self.assets.values():
+            asset.grant_read(handler)
+        destination_bucket.grant_read_write(handler)
+        destination_bucket.grant_delete(handler)
+
+        provider = cr.Provider(self, f'{id}.provider',
+            on_event_handler=handler
+        )
+        self.resource = core.CustomResource(self, f'{id}.resource',
+            service_token=provider.service_token,
+            resource_type='Custom::IncrementalBucketDeployment',
+            properties={
+                'Bucket': destination_bucket.bucket_name,
+                'Prefixes': core.Lazy.any(_PrefixesProducer(self), omit_empty_array=False),
+            }
+        )
+
+    def set_prune(self, s3_prefix: str, prune: bool):
+        self.prune[s3_prefix.strip('/').split('/')[0]] = prune
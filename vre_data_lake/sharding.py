@@ -0,0 +1,68 @@
+from enum import Enum, auto
+from typing import Dict, List
+from aws_cdk import (
+    core,
+)
+from vre_data_lake.zone import Zone
+
+
+class ShardingMode(Enum):
+    NONE = auto()           # Everything is built in the data lake stack.
+    ZONE = auto()           # Each zone and its datasets get their own sibling stack.
+    DATASET_GROUP = auto()  # Each zone gets a sibling stack, and its datasets are spread over further sibling stacks.
+
+
+class StackSharder:
+    """Hands out the scopes zones and datasets are built in, so a large lake is spread across sibling stacks.
+
+    Sibling stacks stay under the CloudFormation resource limit and can be deployed in parallel with
+    `cdk deploy --all --concurrency N`. References between them (role ARNs, buckets, databases) are turned
+    into stack exports and imports by the CDK. Zone stacks only depend on the data lake stack, and dataset
+    stacks only depend on their zone stack and the data lake stack, so no reference cycles can form.
+    """
+
+    def __init__(self, stack: core.Stack,
+            mode: ShardingMode=ShardingMode.NONE,
+            datasets_per_shard: int=20,
+    ):
+        if datasets_per_shard < 1:
+            raise AttributeError(f'"datasets_per_shard" must be at least 1. datasets_per_shard given was {datasets_per_shard}')
+        self._stack = stack
+        self.mode = mode
+        self.datasets_per_shard = datasets_per_shard
+        self.shards: List[core.Stack] = []
+        self._zone_stacks: Dict[str, core.Stack] = {}
+        self._dataset_shards: Dict[str, List[List]] = {}
+        self._orchestration_stack = None
+
+    def _create_shard(self, name: str) -> core.Stack:
+        env = None
+        if not core.Token.is_unresolved(self._stack.account) and not core.Token.is_unresolved(self._stack.region):
+            env = core.Environment(account=self._stack.account, region=self._stack.region)
+        shard = core.Stack(self._stack.node.scope, f'{self._stack.node.id}-{name}', env=env)
+        self.shards.append(shard)
+        return shard
+
+    def zone_scope(self, name: str) -> core.Construct:
+        if self.mode == ShardingMode.NONE:
+            return self._stack
+        if name not in self._zone_stacks:
+            self._zone_stacks[name] = self._create_shard(name)
+        return self._zone_stacks[name]
+
+    def orchestration_scope(self) -> core.Construct:
+        # Orchestration (e.g. CrawlScheduler) depends on the resources of every shard, so it gets its own sibling stack.
+        if self.mode == ShardingMode.NONE:
+            return self._stack
+        if self._orchestration_stack is None:
+            self._orchestration_stack = self._create_shard('orchestration')
+        return self._orchestration_stack
+
+    def dataset_scope(self, zone: Zone) -> core.Construct:
+        if self.mode != ShardingMode.DATASET_GROUP:
+            return core.Stack.of(zone)
+        shards = self._dataset_shards.setdefault(zone.node.path, [])
+        if not shards or shards[-1][1] >= self.datasets_per_shard:
+            shards.append([self._create_shard(f"{zone.zone_name.replace('_', '-')}-datasets-{len(shards)}"), 0])
+        shards[-1][1] += 1
+        return shards[-1][0]
@@ -0,0 +1,98 @@
+from typing import List, Optional, Union
+from aws_cdk import (
+    core,
+    aws_glue as glue,
+    aws_iam as iam,
+)
+from vre_data_lake.glue_job import GlueJob
+from vre_data_lake.policy_aggregator import PolicyAggregator
+from vre_data_lake.zone import TablePermission, Zone
+
+
+class TableStatistics(core.Construct):
+    """Computes the table and column statistics of a dataset and writes them to the Glue catalog.
+
+    Column statistics (row count, NDV, null count, min/max) feed the Athena cost-based optimizer, and the table's
+    recordCount, averageRecordSize, sizeKey and objectCount parameters are set from the data. The job runs on
+    a schedule and/or whenever one of the crawlers or jobs that load the dataset succeeds.
+    """
+
+    def __init__(self, scope: core.Construct, id: str, *,
+            zone: Zone,
+            s3_prefix: str,
+            schedule: Optional[str]=None,
+            after: Optional[List[Union[glue.CfnCrawler, GlueJob]]]=None,
+            number_of_workers: int=2,
+    ):
+        super().__init__(scope, id=id)
+
+        after = after or []
+        if schedule is None and not after:
+            raise AttributeError('Table statistics need a schedule or a crawler or job to run after.')
+
+        zone.grant_table_access_to_role(
+            role=zone.job_role,
+            s3_prefix=s3_prefix,
+            table_permissions=[
+                TablePermission.DESCRIBE,
+                TablePermission.SELECT,
+                TablePermission.ALTER,
+                # Partitions of tables with partition projection are registered before they are read.
+                TablePermission.INSERT,
+            ],
+            scope=self
+        )
+        stack = core.Stack.of(self)
+        PolicyAggregator.of(zone.job_role, self).add_statements(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "glue:GetTable",
+                    "glue:GetPartitions",
+                    "glue:BatchCreatePartition",
+                    "glue:UpdateTable",
+                    "glue:GetColumnStatisticsForTable",
+                    "glue:UpdateColumnStatisticsForTable",
+                ],
+                resources=[
+                    stack.format_arn(service='glue', resource='catalog'),
+                    zone.glue_db.database_arn,
+                    stack.format_arn(service='glue', resource='table', resource_name=f'{zone.glue_db.database_name}/{s3_prefix}'),
+                ]
+            )
+        )
+
+        self.job = GlueJob(self, f'{id}.job',
+            job_name=f'{zone.zone_name}-{s3_prefix}-statistics',
+            script='compute_table_statistics.py',
+            shared_modules=True,
+            role=zone.job_role,
+            description=f"Computes the table and column statistics of the data lake dataset named '{s3_prefix}'.",
+            arguments={
+                "database": zone.glue_db.database_name,
+                "table": s3_prefix,
+            },
+            schedule=schedule,
+            number_of_workers=number_of_workers
+        )
+
+        if after:
+            # Conditional triggers only see runs that were not started by a workflow. Add the job as a stage of
+            # the CrawlScheduler instead when the dataset's crawler is scheduled there.
+            conditions = [
+                glue.CfnTrigger.ConditionProperty(job_name=step.job_name, state='SUCCEEDED', logical_operator='EQUALS')
+                if isinstance(step, GlueJob) else
+                glue.CfnTrigger.ConditionProperty(crawler_name=step.name, crawl_state='SUCCEEDED', logical_operator='EQUALS')
+                for step in after
+            ]
+            trigger = glue.CfnTrigger(self, f'{id}.glue.trigger.after-load',
+                name=f'{zone.zone_name}-{s3_prefix}-statistics-after-load',
+                type='CONDITIONAL',
+                start_on_creation=True,
+                predicate=glue.CfnTrigger.PredicateProperty(
+                    conditions=conditions,
+                    logical='ANY' if len(conditions) > 1 else None
+                ),
+                actions=[glue.CfnTrigger.ActionProperty(job_name=self.job.job_name)]
+            )
+            trigger.node.add_dependency(self.job, *after)
@@ -0,0 +1,165 @@
+from typing import Dict, List, Optional
+from aws_cdk import (
+    core,
+    aws_iam as iam,
+    aws_glue as glue,
+    aws_kinesisfirehose as firehose,
+)
+from vre_data_lake.filetype import Compression, Filetype
+from vre_data_lake.partition import PartitionKey
+from vre_data_lake.policy_aggregator import PolicyAggregator
+from vre_data_lake.role import Role
+from vre_data_lake.zone import TablePermission, Zone
+
+
+class StreamingIngestion(core.Construct):
+    """Delivers JSON records sent to a Firehose stream into a dataset as columnar files.
+
+    Records are converted to the dataset's format against the schema of its Glue table, and are written to
+    the partition given by the values of the partition columns in each record.
+    """
+
+    MIN_BUFFERING_SIZE_MB = 64  # Dynamic partitioning and format conversion both need a buffer of at least 64 MB.
+    MAX_BUFFERING_SIZE_MB = 128
+
+    serializers = {
+        Filetype.APACHE_PARQUET: lambda codec: firehose.CfnDeliveryStream.SerializerProperty(
+            parquet_ser_de=firehose.CfnDeliveryStream.ParquetSerDeProperty(compression=codec)
+        ),
+        Filetype.APACHE_ORC: lambda codec: firehose.CfnDeliveryStream.SerializerProperty(
+            orc_ser_de=firehose.CfnDeliveryStream.OrcSerDeProperty(compression=codec)
+        ),
+    }
+    # Firehose format conversion has no zstd.
+    codecs = {
+        Filetype.APACHE_PARQUET: {Compression.SNAPPY: 'SNAPPY', Compression.GZIP: 'GZIP', Compression.NONE: 'UNCOMPRESSED'},
+        Filetype.APACHE_ORC: {Compression.SNAPPY: 'SNAPPY', Compression.GZIP: 'ZLIB', Compression.NONE: 'NONE'},
+    }
+
+    def __init__(self, scope: core.Construct, id: str, *,
+            zone: Zone,
+            s3_prefix: str,
+            table: glue.CfnTable,
+            filetype: Filetype,
+            partition_keys: Optional[List[PartitionKey]]=None,
+            storage_location_template: Optional[str]=None,
+            partition_key_queries: Optional[Dict[str, str]]=None,
+            buffering_size_mb: int=128,
+            buffering_interval: core.Duration=core.Duration.seconds(300),
+            compression: Optional[Compression]=None,
+    ):
+        super().__init__(scope, id=id)
+
+        if filetype not in self.serializers:
+            raise AttributeError(f'Streaming ingestion is only supported for the filetypes {list(self.serializers)}. filetype given was {filetype}')
+        if not self.MIN_BUFFERING_SIZE_MB <= buffering_size_mb <= self.MAX_BUFFERING_SIZE_MB:
+            raise AttributeError(f'"buffering_size_mb" must be between {self.MIN_BUFFERING_SIZE_MB} and {self.MAX_BUFFERING_SIZE_MB}. buffering_size_mb given was {buffering_size_mb}')
+        if not 60 <= buffering_interval.to_seconds() <= 900:
+            raise AttributeError(f'"buffering_interval" must be between 60 and 900 seconds. buffering_interval given was {buffering_interval.to_seconds()} seconds')
+        compression = compression or Compression.SNAPPY
+        if compression not in self.codecs[filetype]:
+            raise AttributeError(f'Streaming ingestion cannot write {filetype} files with {compression}.')
+        partition_keys = partition_keys or []
+        partition_key_queries = partition_key_queries or {}
+
+        self.role = Role(self, f'{id}.iam.role',
+            role_name=f'{zone.zone_name}-{s3_prefix}-Firehose-Role',
+            assumed_by=iam.ServicePrincipal('firehose.amazonaws.com')
+        )
+        grant = zone.grant_table_access_to_role(
+            role=self.role,
+            s3_prefix=s3_prefix,
+            table_permissions=[TablePermission.DESCRIBE, TablePermission.INSERT],
+            scope=self
+        )
+        error_prefix = f'_errors/{s3_prefix}/'
+        PolicyAggregator.of(self.role, self).add_statements(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["glue:GetTable", "glue:GetTableVersion", "glue:GetTableVersions"],
+                resources=[
+                    core.Stack.of(self).format_arn(service='glue', resource='catalog'),
+                    zone.glue_db.database_arn,
+                    core.Stack.of(self).format_arn(service='glue', resource='table', resource_name=f'{zone.glue_db.database_name}/{s3_prefix}'),
+                ]
+            ),
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["s3:AbortMultipartUpload", "s3:PutObject"],
+                resources=[zone._bucket.arn_for_objects(f'{s3_prefix}/*'), zone._bucket.arn_for_objects(f'{error_prefix}*')]
+            ),
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["s3:GetBucketLocation", "s3:ListBucket", "s3:ListBucketMultipartUploads"],
+                resources=[zone._bucket.bucket_arn]
+            )
+        )
+
+        prefix = f'{s3_prefix}/'
+        processing_configuration = None
+        dynamic_partitioning_configuration = None
+        if partition_keys:
+            # Firehose extracts each partition value from the record with a jq query, by default the field of the same name.
+            if storage_location_template is None:
+                storage_location_template = '/'.join(f'{k.name}=${{{k.name}}}' for k in partition_keys)
+            template = storage_location_template.strip('/')
+            for k in partition_keys:
+                template = template.replace(f'${{{k.name}}}', f'!{{partitionKeyFromQuery:{k.name}}}')
+            prefix = f'{s3_prefix}/{template}/'
+            query = '{' + ','.join(f'{k.name}: {partition_key_queries.get(k.name, "." + k.name)}' for k in partition_keys) + '}'
+            processing_configuration = firehose.CfnDeliveryStream.ProcessingConfigurationProperty(
+                enabled=True,
+                processors=[
+                    firehose.CfnDeliveryStream.ProcessorProperty(
+                        type='MetadataExtraction',
+                        parameters=[
+                            firehose.CfnDeliveryStream.ProcessorParameterProperty(parameter_name='MetadataExtractionQuery', parameter_value=query),
+                            firehose.CfnDeliveryStream.ProcessorParameterProperty(parameter_name='JsonParsingEngine', parameter_value='JQ-1.6'),
+                        ]
+                    )
+                ]
+            )
+            dynamic_partitioning_configuration = firehose.CfnDeliveryStream.DynamicPartitioningConfigurationProperty(
+                enabled=True,
+                retry_options=firehose.CfnDeliveryStream.RetryOptionsProperty(duration_in_seconds=300)
+            )
+
+        self.delivery_stream = firehose.CfnDeliveryStream(self, f'{id}.firehose.stream',
+            delivery_stream_name=f'{zone.zone_name}-{s3_prefix}',
+            delivery_stream_type='DirectPut',
+            extended_s3_destination_configuration=firehose.CfnDeliveryStream.ExtendedS3DestinationConfigurationProperty(
+                bucket_arn=zone._bucket.bucket_arn,
+                role_arn=self.role.role_arn,
+                prefix=prefix,
+                error_output_prefix=f'{error_prefix}!{{firehose:error-output-type}}/',
+                buffering_hints=firehose.CfnDeliveryStream.BufferingHintsProperty(
+                    size_in_m_bs=buffering_size_mb,
+                    interval_in_seconds=int(buffering_interval.to_seconds())
+                ),
+                # Format conversion compresses the files itself, so Firehose must not compress them again.
+                compression_format='UNCOMPRESSED',
+                data_format_conversion_configuration=firehose.CfnDeliveryStream.DataFormatConversionConfigurationProperty(
+                    enabled=True,
+                    input_format_configuration=firehose.CfnDeliveryStream.InputFormatConfigurationProperty(
+                        deserializer=firehose.CfnDeliveryStream.DeserializerProperty(
+                            open_x_json_ser_de=firehose.CfnDeliveryStream.OpenXJsonSerDeProperty()
+                        )
+                    ),
+                    output_format_configuration=firehose.CfnDeliveryStream.OutputFormatConfigurationProperty(
+                        serializer=self.serializers[filetype](self.codecs[filetype][compression])
+                    ),
+                    schema_configuration=firehose.CfnDeliveryStream.SchemaConfigurationProperty(
+                        catalog_id=zone.glue_db.catalog_id,
+                        database_name=zone.glue_db.database_name,
+                        table_name=s3_prefix,
+                        region=core.Stack.of(self).region,
+                        role_arn=self.role.role_arn,
+                        version_id='LATEST'
+                    )
+                ),
+                dynamic_partitioning_configuration=dynamic_partitioning_configuration,
+                processing_configuration=processing_configuration
+            )
+        )
+        # Firehose checks that it can read the table schema when the stream is created.
+        self.delivery_stream.node.add_dependency(table, grant, PolicyAggregator.of(self.role, self))
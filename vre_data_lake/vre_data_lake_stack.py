@@ -1,5 +1,9 @@
+from vre_data_lake.conversion import ColumnarConversion
+from vre_data_lake.crawl_scheduler import CrawlScheduler
 from vre_data_lake.filetype import Filetype
+from vre_data_lake.materialized_aggregate import MaterializedAggregate
 from vre_data_lake.role import Role
+from vre_data_lake.sharding import ShardingMode, StackSharder
 from vre_data_lake.dataset import Dataset, TablePermission
 from vre_data_lake.zone import DatabasePermission, Zone
 from aws_cdk import (
@@ -13,10 +17,15 @@ from functools import cached_property
 class LixarDataLakeStack(core.Stack):
 
 	def __init__(self, scope: core.Construct, id: str, *, 
-			data_lake_name: str
+			data_lake_name: str,
+			sharding_mode: ShardingMode=ShardingMode.NONE
 	) -> None:
 		super().__init__(scope, id=id)
 
+		# Zones and datasets are built in the scopes handed out by the sharder, which puts them into sibling
+		# stacks when sharding is enabled so large lakes stay under the resource limit and deploy in parallel.
+		self.sharder = StackSharder(self, mode=sharding_mode)
+
 		###############################################################################
 		# DEFINE IAM ROLES FOR DATA LAKE
 		###############################################################################
@@ -44,7 +53,7 @@ class LixarDataLakeStack(core.Stack):
 		# DEFINE DATA LAKE ZONES AND GRANT PERMISSIONS
 		###############################################################################
 		'''
-		raw_zone = Zone(self, f'{id}.zone.raw', 
+		raw_zone = Zone(self.sharder.zone_scope('raw'), f'{id}.zone.raw', 
 			zone_name=f"{data_lake_name}_raw",
 			location_registration_role=lake_formation_service_role,
 			sample_data_path='./sample_data/raw/'
@@ -63,7 +72,7 @@ class LixarDataLakeStack(core.Stack):
 			]
 		)
 
-		structured_zone = Zone(self, f'{id}.zone.structured', 
+		structured_zone = Zone(self.sharder.zone_scope('structured'), f'{id}.zone.structured', 
 			zone_name=f"{data_lake_name}_structured", # Must be alphanumeric and underscores only for Athena
 			location_registration_role=lake_formation_service_role,
 			sample_data_path='./sample_data/structured/'
@@ -86,7 +95,7 @@ class LixarDataLakeStack(core.Stack):
 		# curated_zone = Zone(self, f'{id}.zone.raw', 
 		#	 zone_name=f"{data_lake_name}_curated"
 		# )
-		consume_zone = Zone(self, f'{id}.zone.raw', 
+		consume_zone = Zone(self.sharder.zone_scope('consume'), f'{id}.zone.raw', 
 			zone_name=f"{data_lake_name}_consume"
 		)
 		# analytics_zone = Zone(self, f'{id}.zone.raw', 
@@ -106,7 +115,7 @@ class LixarDataLakeStack(core.Stack):
 		# EXAMPLE CSV DATA
 		###############################################################################
 		'''
-		example_data = Dataset(self, f'{id}.dataset.example',
+		example_data = Dataset(self.sharder.dataset_scope(raw_zone), f'{id}.dataset.example',
 			description="Example dataset illustrating a table CSV format.",
 			filetype=Filetype.CSV,
 			zone=raw_zone,
@@ -138,7 +147,7 @@ class LixarDataLakeStack(core.Stack):
 		###############################################################################
 		# EXAMPLE EXCEL DATA
 		###############################################################################
-		example_excel = Dataset(self, f'{id}.dataset.example_excel',
+		example_excel = Dataset(self.sharder.dataset_scope(raw_zone), f'{id}.dataset.example_excel',
 			description="Example dataset illustrating a filetype that classifies as UNKNOWN in Glue",
 			filetype=Filetype.OTHER,
 			zone=raw_zone,
@@ -170,7 +179,7 @@ class LixarDataLakeStack(core.Stack):
 		###############################################################################
 		# EXAMPLE SHAPEFILE DATA (Raw zone in ESRI Shapefile)
 		###############################################################################
-		example_shapefiles_raw = Dataset(self, f'{id}.dataset.example_shapefiles',
+		example_shapefiles_raw = Dataset(self.sharder.dataset_scope(raw_zone), f'{id}.dataset.example_shapefiles',
 			description="Example dataset illustrating a geo-spatial format incompatible with Athena (SHP).",
 			filetype=Filetype.OTHER,
 			zone=raw_zone,
@@ -200,9 +209,9 @@ class LixarDataLakeStack(core.Stack):
 		###############################################################################
 		# EXAMPLE SHAPEFILE DATA (Structured zone in WKT)
 		###############################################################################
-		example_shapefiles_wkt = Dataset(self, f'{id}.dataset.example_shapefiles_wkt',
+		example_shapefiles_wkt = Dataset(self.sharder.dataset_scope(structured_zone), f'{id}.dataset.example_shapefiles_wkt',
 			description="Example dataset illustrating a geo-spatial format compatible with Athena (WKT).",
-			filetype=Filetype.CSV,
+			filetype=Filetype.TSV,
 			zone=structured_zone,
 			s3_prefix='example_shapefiles',
 			lifecycle_rules=[
@@ -216,7 +225,7 @@ class LixarDataLakeStack(core.Stack):
 					]
 				)
 			],
-			crawler_classifer=self._tsv_classifier
+			crawler_classifer=structured_zone.classifiers.tsv(contains_header='ABSENT')
 		)
 		example_shapefiles_wkt.grant_access_to_role(
 			role=data_engineer_role,
@@ -226,6 +235,57 @@ class LixarDataLakeStack(core.Stack):
 			role=emr_ec2_role,
 			table_permissions=[TablePermission.DESCRIBE, TablePermission.SELECT, TablePermission.INSERT]
 		)
+
+		###############################################################################
+		# EXAMPLE CSV DATA (Structured zone in Parquet, converted from the raw zone)
+		###############################################################################
+		example_data_parquet = Dataset(self.sharder.dataset_scope(structured_zone), f'{id}.dataset.example_parquet',
+			description="Example dataset illustrating the raw CSV example converted to Parquet.",
+			filetype=Filetype.APACHE_PARQUET,
+			zone=structured_zone,
+			s3_prefix='example_data',
+			lifecycle_rules=[]
+		)
+		example_data_conversion = ColumnarConversion(self.sharder.dataset_scope(structured_zone), f'{id}.conversion.example_parquet',
+			source=example_data,
+			target=example_data_parquet
+		)
+		example_data_parquet.grant_access_to_role(
+			role=data_engineer_role,
+			table_permissions=[TablePermission.DESCRIBE, TablePermission.SELECT]
+		)
+
+		###############################################################################
+		# CRAWL SCHEDULE
+		###############################################################################
+		# Crawls the raw zone a few crawlers at a time, then converts to Parquet and crawls the structured zone.
+		CrawlScheduler(self.sharder.orchestration_scope(), f'{id}.crawl_scheduler',
+			workflow_name=f'{id}-crawls',
+			stages=[raw_zone, example_data_conversion.job, structured_zone],
+			schedule="cron(0 0 * * ? *)", # Everyday at midnight UTC
+			max_concurrency=5
+		)
+
+		###############################################################################
+		# EXAMPLE AGGREGATE (Consume zone, materialized from the structured zone)
+		###############################################################################
+		example_data_daily = MaterializedAggregate(self.sharder.dataset_scope(consume_zone), f'{id}.aggregate.example_daily',
+			zone=consume_zone,
+			s3_prefix='example_data_daily',
+			sql=f"""
+				SELECT count(*) AS records, date(created_at) AS created_date
+				FROM "{structured_zone.glue_db.database_name}"."example_data"
+				GROUP BY date(created_at)
+			""",
+			sources=[example_data_parquet],
+			schedule="cron(0 2 * * ? *)", # Everyday at 2am UTC, after the crawls
+			partitioned_by=['created_date'],
+			incremental_column='created_date'
+		)
+		example_data_daily.grant_access_to_role(
+			role=data_engineer_role,
+			table_permissions=[TablePermission.DESCRIBE, TablePermission.SELECT]
+		)
 		'''
 	@cached_property
 	def _athena_access_policy(self) -> iam.ManagedPolicy:
@@ -343,17 +403,3 @@ class LixarDataLakeStack(core.Stack):
 		)
 
 		return emr_ec2_instance_role
-
-	@cached_property
-	def _tsv_classifier(self) -> glue.CfnClassifier:
-		tsv_classifier = glue.CfnClassifier(self, f'{id}.glue.classifier.tsv',
-			csv_classifier=glue.CfnClassifier.CsvClassifierProperty(
-				allow_single_column=False,
-				contains_header='ABSENT',
-				delimiter='\t',
-				disable_value_trimming=False,
-				name=f'{id}.tsv.classifier',
-				quote_symbol='"'
-			)
-		)
-		return tsv_classifier
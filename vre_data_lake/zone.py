@@ -1,15 +1,25 @@
 from enum import Enum
+from functools import cached_property
 import json
 from typing import List, Optional
 from aws_cdk import (
     core,
     aws_s3 as s3,
+    aws_s3_notifications as s3n,
+    aws_sqs as sqs,
     aws_iam as iam,
     aws_s3_deployment as s3_deploy,
     aws_glue as glue,
     aws_lakeformation as lf,
 )
-from vre_data_lake.filetype import Filetype
+from vre_data_lake.classifier import ClassifierRegistry
+from vre_data_lake.filetype import Compression, Filetype
+from vre_data_lake.lake_permissions import LakePermissionsBatch, LakePermissionsMode, cfn_resource_property
+from vre_data_lake.monitoring import MonitoringProfile, ZoneDashboard
+from vre_data_lake.partition import PartitionKey
+from vre_data_lake.policy_aggregator import PolicyAggregator
+from vre_data_lake.schema import Schema, SortColumn
+from vre_data_lake.seeding import IncrementalBucketDeployment, SeedingMode
 from vre_data_lake.role import Role
 import re
 
@@ -29,6 +39,23 @@ class TablePermission(Enum):
     SELECT = 'SELECT'
     SUPER = 'Super'
 
+class CrawlMode(Enum):
+    FULL = 'CRAWL_EVERYTHING'
+    NEW_FOLDERS_ONLY = 'CRAWL_NEW_FOLDERS_ONLY'
+    S3_EVENTS = 'CRAWL_EVENT_MODE'
+
+class SchemaUpdateBehavior(Enum):
+    UPDATE_IN_DATABASE = 'UPDATE_IN_DATABASE'
+    LOG = 'LOG'
+
+class SchemaDeleteBehavior(Enum):
+    DELETE_FROM_DATABASE = 'DELETE_FROM_DATABASE'
+    DEPRECATE_IN_DATABASE = 'DEPRECATE_IN_DATABASE'
+    LOG = 'LOG'
+
+# Marker files, job output staging and error records, which Athena, Hive and Spark also skip.
+DEFAULT_CRAWLER_EXCLUSIONS = ['_*', '_*/**', '**/_*', '**/_*/**', '.*', '**/.*']
+
 
 class Zone(core.Construct):
 
@@ -36,6 +63,13 @@ class Zone(core.Construct):
             zone_name: str,
             location_registration_role: iam.Role,
             sample_data_path: Optional[str]=None,
+            lake_permissions_mode: LakePermissionsMode=LakePermissionsMode.INDIVIDUAL,
+            seeding_mode: SeedingMode=SeedingMode.FULL,
+            seeding_memory_limit: Optional[int]=None,
+            seeding_ephemeral_storage_size: Optional[core.Size]=None,
+            monitoring_profile: Optional[MonitoringProfile]=None,
+            inventory_enabled: bool=False,
+            inventory_retention: core.Duration=core.Duration.days(30),
     ):
         super().__init__(scope, id=id)
 
@@ -44,44 +78,65 @@ class Zone(core.Construct):
 
         self.zone_name = zone_name
         self.location_registration_role = location_registration_role
+        self.lake_permissions_mode = lake_permissions_mode
+        self._registrations = {}
+        self.crawlers: List[glue.CfnCrawler] = []
 
         self._bucket = s3.Bucket(self, f'{id}.s3.bucket',
             bucket_name=zone_name.replace('_', '-'),
             removal_policy=core.RemovalPolicy.DESTROY
         )
 
-        self.location_registration_role.attach_inline_policy(
-            iam.Policy(self, f'{id}.registration-policy',
-                statements=[
-                    iam.PolicyStatement(
-                        effect=iam.Effect.ALLOW,
-                        actions=[
-                            "s3:ListBucket"
-                        ],
-                        resources=[self._bucket.bucket_arn]
-                    ),
-                ]
+        PolicyAggregator.of(self.location_registration_role, self).add_statements(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "s3:ListBucket"
+                ],
+                resources=[self._bucket.bucket_arn]
             )
         )
 
-        if sample_data_path is not None:
+        self.seeding_mode = seeding_mode
+        self.sample_data = None
+        if sample_data_path is not None and seeding_mode == SeedingMode.INCREMENTAL:
+            self.sample_data = IncrementalBucketDeployment(self, f'{id}.s3.sample_data',
+                path=sample_data_path,
+                destination_bucket=self._bucket,
+                memory_limit=seeding_memory_limit,
+                ephemeral_storage_size=seeding_ephemeral_storage_size
+            )
+        elif sample_data_path is not None:
             source = s3_deploy.Source.asset(
                 path=sample_data_path
             )
-            s3_deploy.BucketDeployment(self, f'{id}.s3.sample_data',
+            self.sample_data = s3_deploy.BucketDeployment(self, f'{id}.s3.sample_data',
                 destination_bucket=self._bucket,
-                sources=[source]
+                sources=[source],
+                memory_limit=seeding_memory_limit,
+                ephemeral_storage_size=seeding_ephemeral_storage_size
             )
 
         self.glue_db = glue.Database(self, f'{id}.glue.db',
             database_name=zone_name, # Name must be alphanumeric + underscore for Athena
         )
 
+        self.classifiers = ClassifierRegistry(self, f'{id}.glue.classifiers', name_prefix=zone_name)
+
+        # The dashboard gets the metrics of each prefix as it is registered, and of each workgroup granted access.
+        self.monitoring = None
+        if monitoring_profile is not None:
+            self.monitoring = ZoneDashboard(self, f'{id}.monitoring',
+                zone_name=zone_name,
+                bucket=self._bucket,
+                profile=monitoring_profile
+            )
+
         self.crawler_role = Role(self, f'{id}.iam.role.glue',
             role_name=f'{id}-Crawler-Role',
             assumed_by=iam.ServicePrincipal('glue.amazonaws.com'),
-            inline_policies=[
-                iam.PolicyDocument(
+            inline_policies={
+                'crawler-access': iam.PolicyDocument(
                     statements=[
                         iam.PolicyStatement(
                             effect=iam.Effect.ALLOW,
@@ -100,7 +155,7 @@ class Zone(core.Construct):
                         )
                     ]
                 )
-            ],
+            },
             managed_policies=[
                 iam.ManagedPolicy.from_aws_managed_policy_name('service-role/AwsGlueServiceRole'),
                 iam.ManagedPolicy.from_aws_managed_policy_name('AmazonAthenaFullAccess')
@@ -108,43 +163,159 @@ class Zone(core.Construct):
         )
 
         # Next, we grant permission for the Glue crawler service role to create tables in the zone's database.
-        lf.CfnPermissions(self, f'{id}.lake.permissions.crawler.create_table',
-            data_lake_principal=lf.CfnPermissions.DataLakePrincipalProperty(data_lake_principal_identifier=self.crawler_role.role_arn),
-            resource=lf.CfnPermissions.ResourceProperty(
-                database_resource=lf.CfnPermissions.DatabaseResourceProperty(
-                    catalog_id=self.glue_db.catalog_id, 
-                    name=self.glue_db.database_name
-                )
-            ),
+        self._grant_lake_permissions(self, f'{id}.lake.permissions.crawler.create_table',
+            principal_arn=self.crawler_role.role_arn,
+            resource=self._database_resource(),
             permissions=['CREATE_TABLE', 'ALTER', 'DESCRIBE']
         )
 
-    def _authorize_crawling_resource(self, s3_prefix: str):
+        self.inventory = None
+        if inventory_enabled:
+            # Imported here since the inventory module builds on the zone's grants.
+            from vre_data_lake.inventory import ZoneInventory
+            self.inventory = ZoneInventory(self, f'{id}.inventory',
+                zone=self,
+                bucket=self._bucket,
+                bucket_name=zone_name.replace('_', '-'),
+                retention=inventory_retention
+            )
+
+    def _database_resource(self) -> dict:
+        return {'Database': {'CatalogId': self.glue_db.catalog_id, 'Name': self.glue_db.database_name}}
+
+    def _table_resource(self, s3_prefix: str) -> dict:
+        return {'Table': {'CatalogId': self.glue_db.catalog_id, 'DatabaseName': self.glue_db.database_name, 'Name': s3_prefix}}
+
+    def _grant_lake_permissions(self, scope: core.Construct, id: str, principal_arn: str, resource: dict, permissions: List[str],
+            lake_permissions_mode: Optional[LakePermissionsMode]=None,
+    ) -> core.Construct:
+        if (lake_permissions_mode or self.lake_permissions_mode) == LakePermissionsMode.BATCHED:
+            batch_resource = LakePermissionsBatch.of(scope).add(principal_arn, resource, permissions)
+            batch_resource.node.add_dependency(self.glue_db)
+            return batch_resource
+        existing = scope.node.try_find_child(id)
+        if existing is not None:
+            # Repeated grants to the same principal (e.g. the zone's job role) extend the existing grant.
+            existing.permissions = existing.permissions + [p for p in permissions if p not in existing.permissions]
+            return existing
+        return lf.CfnPermissions(scope, id,
+            data_lake_principal=lf.CfnPermissions.DataLakePrincipalProperty(data_lake_principal_identifier=principal_arn),
+            resource=cfn_resource_property(resource),
+            permissions=permissions
+        )
+
+    def _resource_scope(self, scope: Optional[core.Construct]) -> core.Construct:
+        # Per-dataset resources are created in the dataset's scope only when it lives in another stack (see
+        # StackSharder). Otherwise they stay under the zone, so their logical IDs are unchanged.
+        if scope is None or core.Stack.of(scope) is core.Stack.of(self):
+            return self
+        return scope
+
+    def _authorize_crawling_resource(self, s3_prefix: str, scope: Optional[core.Construct]=None):
         resource_arn = self._bucket.arn_for_objects(f'{s3_prefix}/*')
-        lf.CfnPermissions(self, f'{self.node.id}.{s3_prefix}lake.permissions.crawler.access_s3',
-            data_lake_principal=lf.CfnPermissions.DataLakePrincipalProperty(data_lake_principal_identifier=self.crawler_role.role_arn),
-            resource=lf.CfnPermissions.ResourceProperty(
-                data_location_resource=lf.CfnPermissions.DataLocationResourceProperty(
-                    catalog_id=self.glue_db.catalog_id,
-                    s3_resource=resource_arn
-                )
-            ),
+        location_permissions = self._grant_lake_permissions(self._resource_scope(scope), f'{self.node.id}.{s3_prefix}lake.permissions.crawler.access_s3',
+            principal_arn=self.crawler_role.role_arn,
+            resource={'DataLocation': {'CatalogId': self.glue_db.catalog_id, 'ResourceArn': resource_arn}},
             permissions=['DATA_LOCATION_ACCESS']
         )
+        if s3_prefix in self._registrations:
+            # Access to a data location can only be granted once the location is registered.
+            location_permissions.node.add_dependency(self._registrations[s3_prefix])
         self.grant_table_access_to_role(
             role=self.crawler_role,
             s3_prefix=s3_prefix,
             table_permissions=[
                 TablePermission.ALTER,
                 TablePermission.DESCRIBE,
-            ]
+            ],
+            scope=scope
         )
 
-    def create_table(self, s3_prefix: str, description: str) -> glue.CfnTable:
+    def table_location(self, s3_prefix: str) -> str:
         location = self._bucket.s3_url_for_object(s3_prefix)
         if not location.endswith('/'):
             location = f'{location}/'
-        return glue.CfnTable(self, f'{self.node.id}.{s3_prefix}.glue.table',
+        return location
+
+    def create_table(self, s3_prefix: str, description: str,
+            partition_keys: Optional[List[PartitionKey]]=None,
+            storage_location_template: Optional[str]=None,
+            filetype: Filetype=Filetype.OTHER,
+            schema: Optional[Schema]=None,
+            statistics_enabled: bool=False,
+            bucket_columns: Optional[List[str]]=None,
+            number_of_buckets: Optional[int]=None,
+            sort_columns: Optional[List[SortColumn]]=None,
+            compression: Optional[Compression]=None,
+            allow_unsplittable_compression: bool=False,
+            scope: Optional[core.Construct]=None,
+    ) -> glue.CfnTable:
+        location = self.table_location(s3_prefix)
+        self._check_table_layout(partition_keys or [], schema, bucket_columns or [], number_of_buckets, sort_columns or [])
+        columns = []
+        serialization_library = None
+        serde_parameters = {}
+        input_format = None
+        output_format = None
+        classification = "UNKNOWN"
+        compression_type = "unknown"
+        file_format = filetype.file_format()
+        if schema is not None and file_format is None:
+            raise AttributeError(f'Declaring a schema is not supported for the filetype {filetype}')
+        if file_format is not None:
+            # Storage descriptors are taken from the format registry so Athena uses the format's native reader.
+            input_format = file_format.input_format
+            output_format = file_format.output_format
+            serialization_library = file_format.serialization_library
+            serde_parameters.update(file_format.serde_parameters)
+            classification = filetype.glue_classifer()
+            compression_type = file_format.compression_type
+        compression_parameters = {}
+        if compression is not None:
+            if file_format is None:
+                raise AttributeError(f'Declaring a compression is not supported for the filetype {filetype}')
+            if compression != Compression.NONE and not file_format.block_compressed and not allow_unsplittable_compression:
+                raise AttributeError(f'{compression} makes {filetype} files unsplittable, so each file is read by a single reader. '
+                    'Use a columnar filetype, or set allow_unsplittable_compression for datasets of small files.')
+            compression_type = compression.value
+            compression_parameters[file_format.compression_parameter] = file_format.codecs[compression]
+            serde_parameters.update(compression_parameters)
+        if schema is not None:
+            # A declared schema makes the table fully typed at deploy time instead of after the first crawl.
+            columns = [c.column() for c in schema.columns]
+            serde_parameters.update(schema.serde_parameters)
+        parameters = {
+            "CrawlerSchemaDeserializerVersion": "1.0",
+            "CrawlerSchemaSerializerVersion": "1.0",
+            "averageRecordSize": "0",
+            "classification": classification,
+            "compressionType": compression_type,
+            "has_encrypted_data": "false",
+            "objectCount": "0",
+            "recordCount": "0",
+            "sizeKey": "0",
+            "typeOfData": "file"
+        }
+        if statistics_enabled:
+            # The statistics job writes the real values, which a deployment must not reset to zero.
+            for key in ("averageRecordSize", "objectCount", "recordCount", "sizeKey"):
+                del parameters[key]
+        table_parameters = dict(parameters)
+        # Athena takes the codec of the files it writes (CTAS, INSERT INTO) from the table properties.
+        table_parameters.update(compression_parameters)
+        if bucket_columns:
+            # Buckets are written by Spark, whose bucket hashing differs from Hive's.
+            table_parameters["bucketing_format"] = "spark"
+        if partition_keys:
+            # With partition projection, Athena computes partition locations from the table properties
+            # rather than looking them up in the catalog, so new partitions are queryable without a crawl.
+            table_parameters["projection.enabled"] = "true"
+            for partition_key in partition_keys:
+                table_parameters.update(partition_key.projection_parameters())
+            if storage_location_template is None:
+                storage_location_template = '/'.join(f'{k.name}=${{{k.name}}}' for k in partition_keys)
+            table_parameters["storage.location.template"] = f'{location}{storage_location_template.strip("/")}/'
+        return glue.CfnTable(self._resource_scope(scope), f'{self.node.id}.{s3_prefix}.glue.table',
             catalog_id="265456890698",
             database_name=self.glue_db.database_name,
             table_input=glue.CfnTable.TableInputProperty(
@@ -153,67 +324,149 @@ class Zone(core.Construct):
                 owner="owner",
                 retention=0,
                 storage_descriptor=glue.CfnTable.StorageDescriptorProperty(
-                    columns=[],
+                    columns=columns,
                     location=location,
-                    compressed=True,
-                    number_of_buckets=-1,
-                    serde_info=glue.CfnTable.SerdeInfoProperty(parameters={}),
-                    bucket_columns=[],
-                    sort_columns=[],
-                    parameters={
-                        "CrawlerSchemaDeserializerVersion": "1.0",
-                        "CrawlerSchemaSerializerVersion": "1.0",
-                        "averageRecordSize": "0",
-                        "classification": "UNKNOWN",
-                        "compressionType": "unknown",
-                        "has_encrypted_data": "false",
-                        "objectCount": "0",
-                        "recordCount": "0",
-                        "sizeKey": "0",
-                        "typeOfData": "file"
-                    },
+                    input_format=input_format,
+                    output_format=output_format,
+                    compressed=compression != Compression.NONE,
+                    number_of_buckets=number_of_buckets if bucket_columns else -1,
+                    serde_info=glue.CfnTable.SerdeInfoProperty(
+                        serialization_library=serialization_library,
+                        parameters=serde_parameters
+                    ),
+                    bucket_columns=bucket_columns or [],
+                    sort_columns=[c.order() for c in sort_columns or []],
+                    parameters=parameters,
                     stored_as_sub_directories=False
                 ),
-                partition_keys=[],
+                partition_keys=[k.column() for k in partition_keys or []],
                 table_type="EXTERNAL_TABLE",
-                parameters={
-                    "CrawlerSchemaDeserializerVersion": "1.0",
-                    "CrawlerSchemaSerializerVersion": "1.0",
-                    "averageRecordSize": "0",
-                    "classification": "UNKNOWN",
-                    "compressionType": "unknown",
-                    "has_encrypted_data": "false",
-                    "objectCount": "0",
-                    "recordCount": "0",
-                    "sizeKey": "0",
-                    "typeOfData": "file"
-                }
+                parameters=table_parameters
             )
         )
 
+    @staticmethod
+    def _check_table_layout(partition_keys: List[PartitionKey], schema: Optional[Schema], bucket_columns: List[str],
+            number_of_buckets: Optional[int], sort_columns: List[SortColumn]):
+        if bool(bucket_columns) != (number_of_buckets is not None):
+            raise AttributeError('"bucket_columns" and "number_of_buckets" must be declared together.')
+        if number_of_buckets is not None and number_of_buckets < 1:
+            raise AttributeError(f'"number_of_buckets" must be at least 1. number_of_buckets given was {number_of_buckets}')
+        partition_names = {k.name for k in partition_keys}
+        for name in bucket_columns + [c.name for c in sort_columns]:
+            if name in partition_names:
+                raise AttributeError(f'Partition columns cannot be bucket or sort columns. column given was {name}')
+            if schema is not None and name not in {c.name for c in schema.columns}:
+                raise AttributeError(f'Bucket and sort columns must be columns of the schema. column given was {name}')
+
+    @cached_property
+    def job_role(self) -> Role:
+        # Shared by the Glue jobs that maintain the zone's datasets; access to each dataset is granted separately.
+        return Role(self, f'{self.node.id}.iam.role.glue-jobs',
+            role_name=f'{self.node.id}-Job-Role',
+            assumed_by=iam.ServicePrincipal('glue.amazonaws.com'),
+            inline_policies={
+                'job-metrics': iam.PolicyDocument(
+                    statements=[
+                        iam.PolicyStatement(
+                            effect=iam.Effect.ALLOW,
+                            actions=["cloudwatch:PutMetricData"],
+                            resources=["*"]
+                        )
+                    ]
+                )
+            },
+            managed_policies=[
+                iam.ManagedPolicy.from_aws_managed_policy_name('service-role/AWSGlueServiceRole')
+            ]
+        )
+
+    def _create_crawler_event_queues(self, s3_prefix: str):
+        # The crawler consumes object events for the dataset's prefix from this queue instead of listing the prefix.
+        # Events it fails to process are moved to the dead letter queue by the crawler itself.
+        event_queue = sqs.Queue(self, f'{self.node.id}.{s3_prefix}.sqs.crawler-events',
+            retention_period=core.Duration.days(14)
+        )
+        dlq_event_queue = sqs.Queue(self, f'{self.node.id}.{s3_prefix}.sqs.crawler-events-dlq',
+            retention_period=core.Duration.days(14)
+        )
+        prefix = s3_prefix
+        if not prefix.endswith('/'):
+            prefix = f'{prefix}/'
+        for event_type in [s3.EventType.OBJECT_CREATED, s3.EventType.OBJECT_REMOVED]:
+            self._bucket.add_event_notification(
+                event_type,
+                s3n.SqsDestination(event_queue),
+                s3.NotificationKeyFilter(prefix=prefix)
+            )
+        event_queue.grant_consume_messages(self.crawler_role)
+        event_queue.grant(self.crawler_role, "sqs:SetQueueAttributes", "sqs:PurgeQueue")
+        dlq_event_queue.grant_send_messages(self.crawler_role)
+        return event_queue, dlq_event_queue
+
     def create_crawler(
             self, 
             s3_prefix: str, 
             filetype: Filetype, 
             crawler_schedule: Optional[glue.CfnCrawler.ScheduleProperty]=None,
             crawler_classifer: Optional[glue.CfnClassifier]=None, 
+            crawl_mode: CrawlMode=CrawlMode.FULL,
+            exclusions: Optional[List[str]]=None,
+            sample_size: Optional[int]=None,
+            update_behavior: Optional[SchemaUpdateBehavior]=None,
+            delete_behavior: Optional[SchemaDeleteBehavior]=None,
+            scope: Optional[core.Construct]=None,
     ):
+        # `exclusions` are globs relative to the prefix, DEFAULT_CRAWLER_EXCLUSIONS when not given. `sample_size` is
+        # the number of files read per leaf folder, all of them when not given.
+        if sample_size is not None and not 1 <= sample_size <= 249:
+            raise AttributeError(f'"sample_size" must be between 1 and 249. sample_size given was {sample_size}')
         if crawler_classifer != None:
             classifiers = [crawler_classifer.ref]
         else:
             classifiers = None
-        crawler = glue.CfnCrawler(self, f'{self.node.id}.{s3_prefix}.glue.crawler',
+        if exclusions is None:
+            exclusions = DEFAULT_CRAWLER_EXCLUSIONS
+        s3_target = glue.CfnCrawler.S3TargetProperty(
+            path=self._bucket.s3_url_for_object(s3_prefix),
+            exclusions=exclusions or None,
+            sample_size=sample_size
+        )
+        if crawl_mode == CrawlMode.S3_EVENTS:
+            event_queue, dlq_event_queue = self._create_crawler_event_queues(s3_prefix=s3_prefix)
+            s3_target = glue.CfnCrawler.S3TargetProperty(
+                path=self._bucket.s3_url_for_object(s3_prefix),
+                exclusions=exclusions or None,
+                sample_size=sample_size,
+                event_queue_arn=event_queue.queue_arn,
+                dlq_event_queue_arn=dlq_event_queue.queue_arn
+            )
+        elif crawl_mode == CrawlMode.NEW_FOLDERS_ONLY:
+            # Glue only allows incremental crawls when the crawler logs schema changes rather than applying them.
+            if {update_behavior, delete_behavior} - {None, SchemaUpdateBehavior.LOG, SchemaDeleteBehavior.LOG}:
+                raise AttributeError(f'Crawlers in {CrawlMode.NEW_FOLDERS_ONLY} must log schema changes. update_behavior given was {update_behavior}, delete_behavior given was {delete_behavior}')
+            update_behavior = SchemaUpdateBehavior.LOG
+            delete_behavior = SchemaDeleteBehavior.LOG
+        schema_change_policy = None
+        if update_behavior is not None or delete_behavior is not None:
+            schema_change_policy = glue.CfnCrawler.SchemaChangePolicyProperty(
+                update_behavior=update_behavior and update_behavior.value,
+                delete_behavior=delete_behavior and delete_behavior.value
+            )
+        crawler = glue.CfnCrawler(self._resource_scope(scope), f'{self.node.id}.{s3_prefix}.glue.crawler',
             description=f"Crawls the data lake dataset named '{s3_prefix}'.",
             role=self.crawler_role.role_arn,
             targets=glue.CfnCrawler.TargetsProperty(
-                s3_targets=[
-                    glue.CfnCrawler.S3TargetProperty(path=self._bucket.s3_url_for_object(s3_prefix))
-                ]
+                s3_targets=[s3_target]
             ),
             classifiers=classifiers,
             database_name=self.glue_db.database_name,
             name=f'{self.zone_name}-{s3_prefix}-crawler',
             schedule=crawler_schedule,
+            recrawl_policy=glue.CfnCrawler.RecrawlPolicyProperty(
+                recrawl_behavior=crawl_mode.value
+            ),
+            schema_change_policy=schema_change_policy,
             configuration=json.dumps(dict(
                 Grouping=dict(
                     TableGroupingPolicy="CombineCompatibleSchemas"
@@ -221,37 +474,44 @@ class Zone(core.Construct):
                 Version=1.0
             ))
         )
-        self._authorize_crawling_resource(s3_prefix=s3_prefix)
+        self._authorize_crawling_resource(s3_prefix=s3_prefix, scope=scope)
+        self.crawlers.append(crawler)
         return crawler
 
-    def register_resource(self, s3_prefix):
+    def register_resource(self, s3_prefix: str, scope: Optional[core.Construct]=None):
         # This is the S3 ARN for the dataset.
         resource_arn = self._bucket.arn_for_objects(f'{s3_prefix}/*')
 
         # We allow the Lake Formation's service role to be allowed to register this location.
         # https://docs.aws.amazon.com/lake-formation/latest/dg/registration-role.html
-        self.location_registration_role.attach_inline_policy(
-            iam.Policy(self, f'{self.node.id}.{s3_prefix}.registration-policy',
-                statements=[
-                    iam.PolicyStatement(
-                        effect=iam.Effect.ALLOW,
-                        actions=[
-                            "s3:PutObject",
-                            "s3:GetObject",
-                            "s3:DeleteObject"
-                        ],
-                        resources=[resource_arn]
-                    )
-                ]
+        PolicyAggregator.of(self.location_registration_role, self._resource_scope(scope)).add_statements(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "s3:PutObject",
+                    "s3:GetObject",
+                    "s3:DeleteObject"
+                ],
+                resources=[resource_arn]
             )
         )
 
         # We then register that location with the service role.
-        lf.CfnResource(self, f'{self.node.id}.{s3_prefix}.lakeformation.resource',
+        registration = lf.CfnResource(self._resource_scope(scope), f'{self.node.id}.{s3_prefix}.lakeformation.resource',
             resource_arn=resource_arn,
             use_service_linked_role=False,
             role_arn=self.location_registration_role.role_arn
         )
+        self._registrations[s3_prefix] = registration
+        if self.monitoring is not None:
+            self.monitoring.add_prefix(s3_prefix)
+
+    def set_sample_data_prune(self, s3_prefix: str, prune: bool):
+        # Whether objects under the prefix that are not part of the sample data are deleted when seeding.
+        if self.seeding_mode != SeedingMode.INCREMENTAL:
+            raise AttributeError('Pruning can only be set per prefix with the INCREMENTAL seeding mode.')
+        if self.sample_data is not None:
+            self.sample_data.set_prune(s3_prefix, prune)
 
     def add_lifecycle_rules(self, s3_prefix: str, lifecycle_rules: List[s3.LifecycleRule]):
         for lifecycle_rule in lifecycle_rules:
@@ -273,32 +533,53 @@ class Zone(core.Construct):
         }
         return [permission_map[p] for p in database_permissions]
 
-    def grant_db_access_to_role(self, role: Role, database_permissions: List[DatabasePermission]):
+    def grant_db_access_to_role(self, role: Role, database_permissions: List[DatabasePermission], scope: Optional[core.Construct]=None) -> core.Construct:
         if not database_permissions:
             return
-        lf.CfnPermissions(self, f'{self.node.id}.lake.permissions.{role.input_role_name}.db_permissions',
-            data_lake_principal=lf.CfnPermissions.DataLakePrincipalProperty(data_lake_principal_identifier=role.role_arn),
-            resource=lf.CfnPermissions.ResourceProperty(
-                database_resource=lf.CfnPermissions.DatabaseResourceProperty(
-                    catalog_id=self.glue_db.catalog_id, 
-                    name=self.glue_db.database_name
-                )
-            ),
+        scope = self._resource_scope(scope)
+        lake_permissions = self._grant_lake_permissions(scope, f'{self.node.id}.lake.permissions.{role.input_role_name}.db_permissions',
+            principal_arn=role.role_arn,
+            resource=self._database_resource(),
             permissions=[p.value for p in database_permissions]
         )
 
-        role.attach_inline_policy(
-            iam.Policy(self, f'{self.node.id}.{role.input_role_name}.db.permissions',
-                policy_name=f'{self.zone_name}-DB-Policy',
-                statements=[
-                    iam.PolicyStatement(
-                        effect=iam.Effect.ALLOW,
-                        actions=self._map_db_permissions_to_iam_permissions(database_permissions),
-                        resources=[self.glue_db.database_arn]
-                    )
-                ]
+        PolicyAggregator.of(role, scope).add_statements(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=self._map_db_permissions_to_iam_permissions(database_permissions),
+                resources=[self.glue_db.database_arn]
+            )
+        )
+        return lake_permissions
+
+    def grant_location_access_to_role(self, role: Role, s3_prefix: str, scope: Optional[core.Construct]=None) -> core.Construct:
+        # Lets the role create tables whose data is under the prefix, and read and write the objects there.
+        scope = self._resource_scope(scope)
+        location_permissions = self._grant_lake_permissions(scope, f'{self.node.id}.{s3_prefix}.lake.permissions.{role.input_role_name}.location',
+            principal_arn=role.role_arn,
+            resource={'DataLocation': {'CatalogId': self.glue_db.catalog_id, 'ResourceArn': self._bucket.arn_for_objects(f'{s3_prefix}/*')}},
+            permissions=['DATA_LOCATION_ACCESS']
+        )
+        if s3_prefix in self._registrations:
+            location_permissions.node.add_dependency(self._registrations[s3_prefix])
+        PolicyAggregator.of(role, scope).add_statements(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["s3:GetObject", "s3:PutObject", "s3:DeleteObject"],
+                resources=[self._bucket.arn_for_objects(f"{s3_prefix}/*")]
+            ),
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["s3:ListBucket"],
+                resources=[self._bucket.bucket_arn]
+            ),
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=["lakeformation:GetDataAccess"],
+                resources=["*"] # Resource type must be * for lake formation.
             )
         )
+        return location_permissions
 
     @staticmethod
     def _map_table_permissions_to_glue_iam_permissions(table_permissions: List[TablePermission]):
@@ -349,19 +630,19 @@ class Zone(core.Construct):
         ]
         return s3_permissions_list
 
-    def grant_table_access_to_role(self, role: Role, s3_prefix: str, table_permissions: List[TablePermission]) -> lf.CfnPermissions:
+    def grant_table_access_to_role(self, role: Role, s3_prefix: str, table_permissions: List[TablePermission], scope: Optional[core.Construct]=None,
+            lake_permissions_mode: Optional[LakePermissionsMode]=None,
+    ) -> core.Construct:
+        # Returns the lf.CfnPermissions of the grant, or the batch that applies it, for callers to add dependencies to.
+        # `lake_permissions_mode` overrides the zone's mode, for tables that are created after the stack's batch is applied.
         if not table_permissions:
             return
-        lake_permissions = lf.CfnPermissions(self, f'{self.node.id}.{s3_prefix}.lake.permissions.{role.input_role_name}',
-            data_lake_principal=lf.CfnPermissions.DataLakePrincipalProperty(data_lake_principal_identifier=role.role_arn),
-            resource=lf.CfnPermissions.ResourceProperty(
-                table_resource=lf.CfnPermissions.TableResourceProperty(
-                    catalog_id=self.glue_db.catalog_id, 
-                    database_name=self.glue_db.database_name,
-                    name=s3_prefix
-                )
-            ),
-            permissions=[p.value for p in table_permissions]
+        scope = self._resource_scope(scope)
+        lake_permissions = self._grant_lake_permissions(scope, f'{self.node.id}.{s3_prefix}.lake.permissions.{role.input_role_name}',
+            principal_arn=role.role_arn,
+            resource=self._table_resource(s3_prefix),
+            permissions=[p.value for p in table_permissions],
+            lake_permissions_mode=lake_permissions_mode
         )
         s3_actions = self._map_table_permissions_to_s3_iam_permissions(table_permissions)
         glue_actions = self._map_table_permissions_to_glue_iam_permissions(table_permissions)
@@ -398,12 +679,9 @@ class Zone(core.Construct):
                     resources=[self._bucket.bucket_arn]
                 )
             )
-        if statements:
-            role.attach_inline_policy(
-                iam.Policy(self, f'{self.node.id}.{role.input_role_name}.table.{s3_prefix}.permissions',
-                    policy_name=f'{self.zone_name}-{s3_prefix}-Table-Policy',
-                    statements=statements
-                )
-            )
+        # Grants are merged per role rather than attached as one policy per table, which would hit the IAM size limits.
+        PolicyAggregator.of(role, scope).add_statements(*statements)
+        if self.monitoring is not None and role.workgroup_name is not None:
+            self.monitoring.add_workgroup(role.workgroup_name)
 
         return lake_permissions